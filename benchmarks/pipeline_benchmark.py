@@ -0,0 +1,115 @@
+"""
+Benchmarks the whole pull request pipeline offline, against an in-memory
+fake of the hub whose every call is delayed by a fixed latency.
+
+The fake hub holds the forecast and metadata of tests/testfiles/teamA-modelA
+on master, and each pull request updates one value of the forecast. The
+runs are timed, and the hub calls they made are counted per method.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py [--pull_requests N] [--latency SECONDS]
+"""
+import argparse
+import collections
+import json
+import logging
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from main import setup_validation_run_for_pull_request
+from forecast_validation.utilities.hub_backend import InMemoryHubBackend
+
+TESTFILES = pathlib.Path(__file__).parent/".."/"tests"/"testfiles"
+FORECAST = "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+METADATA = "data-processed/teamA-modelA/metadata-teamA-modelA.txt"
+
+
+def make_project(config_path: pathlib.Path, directory: pathlib.Path) -> None:
+    with open(config_path) as config_file:
+        config = json.load(config_file)
+    config.setdefault("submission_formatting_instruction", "")
+    with open(directory/"project-config.json", "w") as config_file:
+        json.dump(config, config_file)
+    locations = directory/config["location_filepath"]
+    os.makedirs(locations.parent, exist_ok=True)
+    shutil.copy(
+        pathlib.Path(__file__).parent/".."/"forecast_validation"/"static"/
+        "locations.csv",
+        locations
+    )
+
+
+def make_backend(
+    pull_request_count: int,
+    latency: float
+) -> InMemoryHubBackend:
+    forecast = (TESTFILES/FORECAST).read_bytes().decode("utf-8")
+    lines = forecast.splitlines(True)
+    pull_requests = {}
+    for number in range(1, pull_request_count + 1):
+        updated = list(lines)
+        updated[1] = updated[1].rsplit(",", 1)[0] + f",{1000 + number}\n"
+        pull_requests[number] = {FORECAST: "".join(updated).encode("utf-8")}
+    return InMemoryHubBackend(
+        {
+            FORECAST: forecast.encode("utf-8"),
+            METADATA: (TESTFILES/METADATA).read_bytes()
+        },
+        pull_requests,
+        latency=latency
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--config", default=str(TESTFILES/"covid-validation-config.json"),
+        help="hub config of the fake hub (default: %(default)s)"
+    )
+    parser.add_argument("--pull_requests", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0.05,
+        help="seconds added to every hub call (default: %(default)s)"
+    )
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = pathlib.Path(directory)
+        os.environ["HUB_VALIDATIONS_CACHE_DIR"] = str(directory/"cache")
+        make_project(pathlib.Path(args.config), directory)
+        backend = make_backend(args.pull_requests, args.latency)
+
+        timings = []
+        for number in backend.list_pull_requests():
+            start = time.perf_counter()
+            validation_run = setup_validation_run_for_pull_request(
+                str(directory), backend=backend, pull_request_number=number
+            )
+            validation_run.store["HUB_MIRRORED_DIRECTORY_ROOT"] = (
+                directory/f"run-{number}"/"hub"
+            )
+            validation_run.store["PULL_REQUEST_DIRECTORY_ROOT"] = (
+                directory/f"run-{number}"/"pull_request"
+            )
+            validation_run.run()
+            timings.append(time.perf_counter() - start)
+            assert validation_run.success, number
+
+    calls = collections.Counter(backend.calls)
+    del calls["list_pull_requests"]
+    print(f"{len(timings)} pull requests, {args.latency * 1000:.0f} ms per "
+          f"hub call: first {timings[0]:.3f}s, best {min(timings):.3f}s, "
+          f"total {sum(timings):.3f}s")
+    print(f"hub calls per pull request: "
+          f"{sum(calls.values()) / len(timings):.1f} "
+          f"({', '.join(f'{m} {n}' for m, n in sorted(calls.items()))})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmarks the native quantile CSV validator on a synthetic county-level
+incident case forecast (every case location x every case target x every
+case quantile, plus point predictions).
+
+If `zoltpy.covid19` is importable, the zoltpy validator is timed on the same
+file for comparison. zoltpy is no longer a dependency, and its releases on
+PyPI predate `zoltpy.covid19`. To run the comparison, install the fork that
+the validations depended on before the native validator:
+
+    pip install "git+https://github.com/Serena-Wang/zoltpy/"
+
+Usage:
+    python benchmarks/quantile_csv_benchmark.py [--config PATH] [--repeat N]
+"""
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from forecast_validation.checks.quantile_csv import (
+    validate_quantile_csv_file
+)
+from forecast_validation.utilities.forecast_frames import (
+    forecast_schema,
+    read_forecast_frame
+)
+from forecast_validation.utilities.hub_config import compile_hub_config
+
+FORECAST_DATE = datetime.date(2021, 11, 29)  # a Monday
+
+
+def make_county_case_forecast(config: dict, path: pathlib.Path) -> int:
+    group = next(
+        g for g in config["target_groups"]
+        if g["outcome_variable"] == "incident cases"
+    )
+    rows = []
+    for target in group["targets"]:
+        weeks = int(target.split(" ")[0])
+        target_end_date = FORECAST_DATE + datetime.timedelta(
+            days=5 + 7 * (weeks - 1)
+        )
+        quantiles = [np.nan] + sorted(group["quantiles"])
+        types = ["point"] + ["quantile"] * len(group["quantiles"])
+        values = [500.0] + list(np.linspace(10, 1000, len(quantiles) - 1))
+        for location in group["locations"]:
+            for row_type, quantile, value in zip(types, quantiles, values):
+                rows.append((
+                    FORECAST_DATE.isoformat(), target,
+                    target_end_date.isoformat(), location, row_type,
+                    quantile, value
+                ))
+    pd.DataFrame(rows, columns=[
+        "forecast_date", "target", "target_end_date", "location", "type",
+        "quantile", "value"
+    ]).to_csv(path, index=False)
+    return len(rows)
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--config", default="covid-validation-config.json",
+        help="hub config whose target groups are used (default: %(default)s)"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.config) as config_file:
+        config = json.load(config_file)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = pathlib.Path(directory)/"2021-11-29-team-model.csv"
+        row_count = make_county_case_forecast(config, path)
+        print(f"synthetic forecast: {row_count} rows, "
+              f"{path.stat().st_size / 1e6:.1f} MB")
+
+        result = validate_quantile_csv_file(path, config)
+        assert result == "no errors", result
+
+        compiled = compile_hub_config(config)
+        schema = forecast_schema(compiled)
+        frame = read_forecast_frame(path, schema)
+        parse = best_of(args.repeat, lambda: read_forecast_frame(path, schema))
+        native = best_of(
+            args.repeat, lambda: validate_quantile_csv_file(frame, compiled)
+        )
+        print(f"native: parse {parse:.3f}s + validate {native:.3f}s, "
+              f"frame {frame.memory_usage(deep=True).sum() / 1e6:.1f} MB")
+
+        try:
+            import zoltpy.covid19
+        except ImportError:
+            print(
+                "zoltpy.covid19 not installed; skipping comparison "
+                "(see the docstring of this benchmark to install it)"
+            )
+            return
+        zoltpy_time = best_of(args.repeat, lambda: (
+            zoltpy.covid19.validate_quantile_csv_file(
+                path, config, silent=True
+            )
+        ))
+        print(f"zoltpy: {zoltpy_time:.3f}s "
+              f"({zoltpy_time / (parse + native):.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmarks the startup of a pull request run, offline: the time to import
+main and to validate one pull request in a fresh interpreter, and which of
+the heavy modules (the scientific stack, the metadata schema checker) it
+imported.
+
+A pull request that changes no forecasts or metadata is classified and
+labeled without importing any of them; one that updates a forecast pays
+for them in its first step that needs them.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--repeat N] [--json]
+"""
+import argparse
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import time
+
+# modules that a pull request without forecasts or metadata never needs
+HEAVY_MODULES = ("pandas", "numpy", "zoltpy", "pykwalify", "pytz", "yaml")
+KINDS = ("other-files", "forecast")
+
+
+def run_once(kind: str, directory: pathlib.Path) -> None:
+    """Validates one pull request of `kind` in this interpreter and prints
+    the timings and the heavy modules imported as JSON."""
+    start = time.perf_counter()
+    import main
+    from forecast_validation.utilities.hub_backend import InMemoryHubBackend
+    imported = time.perf_counter()
+
+    # the fake hub of the pipeline benchmark, without importing anything
+    # more than a pull request run does
+    sys.path.append(os.path.dirname(__file__))
+    from pipeline_benchmark import FORECAST, METADATA, TESTFILES
+    forecast = (TESTFILES/FORECAST).read_bytes()
+    lines = forecast.decode("utf-8").splitlines(True)
+    lines[1] = lines[1].rsplit(",", 1)[0] + ",12345\n"
+    backend = InMemoryHubBackend(
+        {FORECAST: forecast, METADATA: (TESTFILES/METADATA).read_bytes(),
+         "README.md": b"hub"},
+        {1: {"README.md": b"notes"} if kind == "other-files"
+         else {FORECAST: "".join(lines).encode("utf-8")}}
+    )
+    validation_run = main.setup_validation_run_for_pull_request(
+        str(directory), backend=backend, pull_request_number=1
+    )
+    validation_run.store["HUB_MIRRORED_DIRECTORY_ROOT"] = directory/"hub"
+    validation_run.store["PULL_REQUEST_DIRECTORY_ROOT"] = (
+        directory/"pull_request"
+    )
+    validation_run.run()
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "kind": kind,
+        "success": validation_run.success,
+        "import_seconds": imported - start,
+        "run_seconds": finished - imported,
+        "heavy_modules": sorted(
+            name for name in HEAVY_MODULES if name in sys.modules
+        ),
+    }))
+
+
+def measure(kind: str, directory: pathlib.Path) -> dict:
+    """Runs `run_once()` in a fresh interpreter, from the repository root."""
+    process = subprocess.run(
+        [sys.executable, __file__, "--run_once", kind, str(directory)],
+        cwd=pathlib.Path(__file__).parent/"..",
+        env=os.environ | {"HUB_VALIDATIONS_CACHE_DIR": str(directory/"cache")},
+        check=True, stdout=subprocess.PIPE, text=True
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--json", action="store_true",
+        help="print the measurements of each run as JSON lines"
+    )
+    parser.add_argument("--run_once", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run_once:
+        sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+        import logging
+        logging.disable(logging.INFO)
+        run_once(args.run_once[0], pathlib.Path(args.run_once[1]))
+        return
+
+    sys.path.append(os.path.dirname(__file__))
+    from pipeline_benchmark import TESTFILES, make_project
+    with tempfile.TemporaryDirectory() as directory:
+        directory = pathlib.Path(directory)
+        make_project(TESTFILES/"covid-validation-config.json", directory)
+        for kind in KINDS:
+            # the first run fills the compiled config cache
+            measurements = [
+                measure(kind, directory) for _ in range(args.repeat)
+            ]
+            if args.json:
+                for measurement in measurements:
+                    print(json.dumps(measurement))
+                continue
+            best = min(
+                measurements,
+                key=lambda m: m["import_seconds"] + m["run_seconds"]
+            )
+            print(f"{kind} pull request: import {best['import_seconds']:.3f}s, "
+                  f"run {best['run_seconds']:.3f}s, heavy modules: "
+                  f"{', '.join(best['heavy_modules']) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Bulk revalidation of every forecast and metadata file of a hub checkout.
+
+Files are split into shards by a hash of their path, so that `--shard i/N`
+on N machines covers each file exactly once whatever the order in which the
+checkout is walked. Each shard writes one JSON object per file (a JSON
+lines file); `merge_result_files()` combines the files of all shards.
+"""
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, Optional, Union
+import concurrent.futures
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import pickle
+import tempfile
+
+from forecast_validation import PullRequestFileType
+from forecast_validation.validation import (
+    _initialize_worker,
+    _worker_store
+)
+from forecast_validation.validation_logic.forecast_file_content import (
+    validate_forecast_files
+)
+from forecast_validation.validation_logic.metadata import (
+    check_metadata_file
+)
+
+logger = logging.getLogger("hub-validations")
+
+# file kinds of a BulkFileResult
+FORECAST_KIND: str = "forecast"
+METADATA_KIND: str = "metadata"
+
+# files handed to a worker process at a time
+CHUNK_SIZE: int = 8
+# log progress every this many files
+PROGRESS_INTERVAL: int = 100
+
+
+@dataclasses.dataclass(frozen=True)
+class BulkFileResult:
+    """
+    Data class for the outcome of revalidating one file of the hub.
+
+    Fields:
+        path: path of the file relative to the hub checkout, in POSIX form
+        kind: FORECAST_KIND or METADATA_KIND
+        content_hash: SHA-256 of the file content
+        success: whether the file passed all checks
+        errors: the errors found in the file
+        config_hash: hash of the hub config the file was validated against
+        validations_version: version of the validations that ran
+    """
+    path: str
+    kind: str
+    content_hash: str
+    success: bool
+    errors: list[str]
+    config_hash: str
+    validations_version: str
+
+    def to_json(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> BulkFileResult:
+        return cls(
+            path=str(data["path"]),
+            kind=str(data["kind"]),
+            content_hash=str(data["content_hash"]),
+            success=bool(data["success"]),
+            errors=list(data["errors"]),
+            config_hash=str(data["config_hash"]),
+            validations_version=str(data["validations_version"])
+        )
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """Parses a shard given as "i/N", 1 <= i <= N, into (i, N)."""
+    try:
+        index, count = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"shard must be given as i/N, not {shard!r}")
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {shard!r} is not one of 1/{count}..{count}/{count}")
+    return index, count
+
+
+def in_shard(path: str, index: int, count: int) -> bool:
+    """Whether the file at `path` (relative, POSIX) belongs to shard
+    `index` of `count`."""
+    digest = hashlib.sha1(path.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count == index - 1
+
+
+def find_hub_files(
+    hub_directory: Union[str, os.PathLike],
+    forecast_folder_name: str,
+    filename_patterns: dict[PullRequestFileType, Any]
+) -> list[tuple[str, str]]:
+    """Lists the forecast and metadata files of a hub checkout as sorted
+    (relative path, kind) pairs."""
+    hub_directory = pathlib.Path(hub_directory)
+    kinds: dict[PullRequestFileType, str] = {
+        PullRequestFileType.FORECAST: FORECAST_KIND,
+        PullRequestFileType.METADATA: METADATA_KIND
+    }
+    files: list[tuple[str, str]] = []
+    for path in (hub_directory/forecast_folder_name).rglob("*"):
+        if not path.is_file():
+            continue
+        relative_path = path.relative_to(hub_directory).as_posix()
+        # the patterns are ordered FORECAST -> METADATA -> OTHER_FS; the
+        # first match decides the type, as in `match_file()`
+        for file_type, pattern in filename_patterns.items():
+            if pattern.match(relative_path):
+                if file_type in kinds:
+                    files.append((relative_path, kinds[file_type]))
+                break
+    return sorted(files)
+
+
+# the store of a worker process, set by `_initialize_bulk_worker()`
+_worker_bulk_store: Optional[dict[str, Any]] = None
+
+
+def _initialize_bulk_worker(store_bytes: bytes) -> None:
+    global _worker_bulk_store
+    _initialize_worker()
+    _worker_bulk_store = pickle.loads(store_bytes)
+
+
+def _revalidate_in_worker(file: tuple[str, str]) -> BulkFileResult:
+    return revalidate_file(_worker_bulk_store, *file)
+
+
+def revalidate_file(
+    store: dict[str, Any],
+    relative_path: str,
+    kind: str
+) -> BulkFileResult:
+    """Runs the content checks of a forecast or metadata file of the hub
+    checkout at HUB_MIRRORED_DIRECTORY_ROOT.
+
+    Forecasts get the format and value checks of `validate_forecast_files()`;
+    checks that depend on the day of submission or on an earlier version of
+    the file are left out.
+    """
+    path = pathlib.Path(store["HUB_MIRRORED_DIRECTORY_ROOT"])/relative_path
+    with open(path, "rb") as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+
+    # one broken file must not abort the revalidation of all others
+    try:
+        if kind == FORECAST_KIND:
+            result = validate_forecast_files(store, [path])
+            success = result.success
+            errors = (result.file_errors or {}).get(path, [])
+        else:
+            is_metadata_error, metadata_errors = check_metadata_file(path)
+            success = not is_metadata_error
+            errors = list(metadata_errors) if is_metadata_error else []
+    except Exception as e:
+        logger.exception("Could not revalidate %s", relative_path)
+        success = False
+        errors = [f"Validation failed with {type(e).__name__}: {e}"]
+
+    return BulkFileResult(
+        path=relative_path,
+        kind=kind,
+        content_hash=content_hash,
+        success=success,
+        errors=[str(error) for error in errors],
+        config_hash=store["RESULT_CACHE_CONFIG_HASH"],
+        validations_version=str(store["VALIDATIONS_VERSION"])
+    )
+
+
+def revalidate_files(
+    store: dict[str, Any],
+    files: list[tuple[str, str]],
+    workers: int = 1
+) -> Iterator[BulkFileResult]:
+    """Revalidates (relative path, kind) pairs on a pool of `workers`
+    processes, yielding the results in input order."""
+    if workers <= 1:
+        results: Iterable[BulkFileResult] = (
+            revalidate_file(store, *file) for file in files
+        )
+        yield from _log_progress(results, len(files))
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initialize_bulk_worker,
+        initargs=(_worker_store(store),)
+    ) as executor:
+        yield from _log_progress(
+            executor.map(_revalidate_in_worker, files, chunksize=CHUNK_SIZE),
+            len(files)
+        )
+
+
+def _log_progress(
+    results: Iterable[BulkFileResult],
+    total: int
+) -> Iterator[BulkFileResult]:
+    for done, result in enumerate(results, start=1):
+        if done % PROGRESS_INTERVAL == 0 or done == total:
+            logger.info("Revalidated %d of %d files", done, total)
+        yield result
+
+
+def write_result_file(
+    results: Iterable[BulkFileResult],
+    path: Union[str, os.PathLike]
+) -> int:
+    """Writes results as JSON lines sorted by file path; returns the number
+    of failed files. The file is only replaced once fully written."""
+    path = pathlib.Path(path)
+    os.makedirs(path.parent, exist_ok=True)
+    failures = 0
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False, encoding="utf-8"
+    ) as temporary_file:
+        for result in sorted(results, key=lambda r: r.path):
+            temporary_file.write(json.dumps(result.to_json()) + "\n")
+            failures += not result.success
+    os.replace(temporary_file.name, path)
+    return failures
+
+
+def read_result_file(path: Union[str, os.PathLike]) -> list[BulkFileResult]:
+    with open(path, "r", encoding="utf-8") as result_file:
+        return [
+            BulkFileResult.from_json(json.loads(line))
+            for line in result_file if line.strip()
+        ]
+
+
+def merge_result_files(
+    paths: Iterable[Union[str, os.PathLike]],
+    output_path: Union[str, os.PathLike]
+) -> int:
+    """Merges the result files of several shards into one; returns the
+    number of failed files.
+
+    A file that appears in several inputs keeps the result of the last one.
+    Raises ValueError if the inputs were validated against different configs
+    or versions of the validations.
+    """
+    results: dict[str, BulkFileResult] = {}
+    for path in paths:
+        for result in read_result_file(path):
+            results[result.path] = result
+
+    configs = {(r.config_hash, r.validations_version) for r in results.values()}
+    if len(configs) > 1:
+        raise ValueError(
+            "cannot merge results of different configs or validations "
+            "versions: " + ", ".join(
+                f"{config_hash[:12]} (v{version})"
+                for config_hash, version in sorted(configs)
+            )
+        )
+    return write_result_file(results.values(), output_path)
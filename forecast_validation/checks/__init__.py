@@ -1,7 +1,11 @@
-from typing import Optional
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
 import dataclasses
+import datetime
 
-from pandas.core.indexing import is_label_like
+if TYPE_CHECKING:
+    # imports pandas; the checks package is also used to classify PR files
+    from forecast_validation.checks.forecast_diff import ForecastDiff
 
 @dataclasses.dataclass(frozen=True)
 class RetractionCheckResult:
@@ -27,9 +31,10 @@ class RetractionCheckResult:
             error(s) that are specific to forecast files; keyed by file path
     """
     error: Optional[str]
-    has_implicit_retraction: bool = False,
-    has_explicit_retraction: bool = False,
-    is_all_duplicate: bool = False,
+    has_implicit_retraction: bool = False
+    has_explicit_retraction: bool = False
+    is_all_duplicate: bool = False
+    diff: Optional[ForecastDiff] = None
 
     @property
     def has_no_retraction_or_duplication(self) -> bool:
@@ -38,4 +43,23 @@ class RetractionCheckResult:
             self.has_explicit_retraction or
             self.is_all_duplicate
         )
-        
\ No newline at end of file
+        
+
+@dataclasses.dataclass(frozen=True)
+class DistinctDateCheckResult:
+    """
+    Data class to store the result of checking one distinct value of a date
+    column.
+
+    Fields:
+        value: the distinct value, as a string
+        row_count: the number of rows that contain the value
+        date: the parsed date; None if the value is not parseable
+        format_error: why the value is not in YYYY-MM-DD format, if it is not
+        parse_error: why the value is not parseable, if it is not
+    """
+    value: str
+    row_count: int
+    date: Optional[datetime.date] = None
+    format_error: Optional[str] = None
+    parse_error: Optional[str] = None
@@ -0,0 +1,255 @@
+"""
+Memory-bounded validation of forecast files that are too large to parse
+whole.
+
+A forecast whose parsed frame would not fit under the memory limit is read
+`chunk_rows` rows at a time. Row-local checks (format, population, dates)
+run on each chunk and their summaries are merged, and cross-row checks
+keep only compact state between chunks: a hash per row for duplicates, and
+a key, quantile and value per quantile row for the quantile order. The
+error messages are the same as for a file validated whole.
+"""
+from __future__ import annotations
+from typing import Any, Optional, Union
+import dataclasses
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.checks.forecast_diff import row_keys
+from forecast_validation.checks.quantile_csv import (
+    PREDICTION_KEY_COLUMNS,
+    QUANTILE_TYPE,
+    REQUIRED_COLUMNS,
+    RowErrorSummary,
+    _format_row,
+    _summarize,
+    check_header,
+    decreasing_quantiles,
+    duplicate_row_message,
+    format_row_errors,
+    monotonicity_error_message,
+    prediction_keys,
+    row_error_summaries
+)
+from forecast_validation.checks.forecast_file_content import (
+    population_error_message
+)
+from forecast_validation.utilities.forecast_frames import (
+    count_values,
+    forecast_schema,
+    iter_forecast_chunks,
+    read_forecast_header,
+    read_forecast_rows
+)
+from forecast_validation.utilities.hub_config import CompiledHubConfig
+from forecast_validation.utilities.population_index import PopulationIndex
+
+logger = logging.getLogger("hub-validations")
+
+# forecasts whose parsed frame is estimated to need more memory than this
+# are validated in chunks; overridden by the store's FORECAST_MEMORY_LIMIT
+# or the HUB_VALIDATIONS_MEMORY_LIMIT_MB environment variable
+DEFAULT_MEMORY_LIMIT: int = 512 * 1024 * 1024
+# rough memory taken by the parsed frame of a forecast CSV, and the
+# temporary columns of the checks, per byte of the file
+FRAME_BYTES_PER_FILE_BYTE: int = 12
+DEFAULT_CHUNK_ROWS: int = 50_000
+
+
+def memory_limit_from_environment() -> int:
+    value = os.environ.get("HUB_VALIDATIONS_MEMORY_LIMIT_MB")
+    if not value:
+        return DEFAULT_MEMORY_LIMIT
+    try:
+        return max(0, int(float(value) * 1024 * 1024))
+    except ValueError:
+        logger.warning(
+            "Ignoring invalid HUB_VALIDATIONS_MEMORY_LIMIT_MB=%r", value
+        )
+        return DEFAULT_MEMORY_LIMIT
+
+
+def estimated_frame_bytes(path: Union[str, os.PathLike]) -> int:
+    return os.path.getsize(path) * FRAME_BYTES_PER_FILE_BYTE
+
+
+def chunk_rows_for(
+    store: dict[str, Any],
+    path: Union[str, os.PathLike]
+) -> Optional[int]:
+    """The number of rows per chunk in which to validate the forecast at
+    `path`, or None if it fits under the memory limit and is validated
+    whole."""
+    memory_limit: int = store.get("FORECAST_MEMORY_LIMIT")
+    if memory_limit is None:
+        memory_limit = memory_limit_from_environment()
+    if estimated_frame_bytes(path) <= memory_limit:
+        return None
+    return store.get("FORECAST_CHUNK_ROWS") or DEFAULT_CHUNK_ROWS
+
+
+def count_column_values(
+    path: Union[str, os.PathLike],
+    column: str,
+    chunk_rows: int
+) -> Optional[pd.Series]:
+    """The number of rows per distinct value (missing values included) of
+    one column of a forecast CSV; None if the file has no such column."""
+    if column not in read_forecast_header(path):
+        return None
+    counts: list[pd.Series] = [
+        count_values(chunk[column])
+        for chunk in iter_forecast_chunks(path, chunk_rows, [column])
+    ]
+    return pd.concat(counts).groupby(level=0, sort=False, dropna=False).sum()
+
+
+class _DuplicateRows:
+    """Finds rows whose key columns repeat an earlier row, keeping one hash
+    per distinct row."""
+
+    def __init__(self) -> None:
+        self._seen: np.ndarray = np.empty(0, dtype=np.int64)
+        self.first: Optional[RowErrorSummary] = None
+        self.count: int = 0
+
+    def add(self, chunk: pd.DataFrame, offset: int) -> None:
+        keys = row_keys(chunk)
+        positions = np.searchsorted(self._seen, keys).clip(
+            max=max(len(self._seen) - 1, 0)
+        )
+        seen_before = (
+            self._seen[positions] == keys if len(self._seen)
+            else np.zeros(len(keys), dtype=bool)
+        )
+        duplicated = seen_before | pd.Series(keys).duplicated().to_numpy()
+        self._seen = np.union1d(self._seen, keys)
+
+        summary = _summarize(
+            chunk, duplicated, duplicate_row_message, "duplicate_rows"
+        )
+        if summary is None:
+            return
+        self.count += summary.count
+        if self.first is None:
+            self.first = dataclasses.replace(
+                summary, first_row=summary.first_row + offset
+            )
+
+    def error(self) -> Optional[str]:
+        if self.first is None:
+            return None
+        return str(dataclasses.replace(self.first, count=self.count))
+
+
+class _QuantileOrder:
+    """Collects the prediction key, quantile and value of every quantile
+    row, for `decreasing_quantiles()` once all chunks have been seen."""
+
+    def __init__(self) -> None:
+        self._positions: list[np.ndarray] = []
+        self._keys: list[np.ndarray] = []
+        self._quantiles: list[np.ndarray] = []
+        self._values: list[np.ndarray] = []
+
+    def add(self, chunk: pd.DataFrame, offset: int) -> None:
+        is_quantile = (chunk["type"] == QUANTILE_TYPE).to_numpy()
+        rows = chunk.loc[
+            is_quantile, PREDICTION_KEY_COLUMNS + ["quantile", "value"]
+        ]
+        self._positions.append(np.flatnonzero(is_quantile) + offset)
+        self._keys.append(prediction_keys(rows))
+        self._quantiles.append(pd.to_numeric(
+            rows["quantile"], errors="coerce"
+        ).to_numpy(dtype=np.float64))
+        self._values.append(pd.to_numeric(
+            rows["value"], errors="coerce"
+        ).to_numpy(dtype=np.float64))
+
+    def error(
+        self,
+        path: Union[str, os.PathLike],
+        chunk_rows: int
+    ) -> Optional[str]:
+        if not self._keys:
+            return None
+        decreasing = decreasing_quantiles(
+            np.concatenate(self._keys),
+            np.concatenate(self._quantiles),
+            np.concatenate(self._values)
+        )
+        if decreasing is None:
+            return None
+        position, predictions = decreasing
+        row = read_forecast_rows(
+            path, [int(np.concatenate(self._positions)[position])], chunk_rows
+        )
+        return monotonicity_error_message(
+            str(_format_row(row, 0)), predictions
+        )
+
+
+def validate_forecast_file_in_chunks(
+    path: Union[str, os.PathLike],
+    config: CompiledHubConfig,
+    population_index: Optional[PopulationIndex],
+    chunk_rows: int
+) -> tuple[Union[str, list[str]], Optional[str]]:
+    """Runs the format checks of `validate_quantile_csv_file()` and, if a
+    population index is given, the value check of
+    `validate_forecast_values()` in one pass over a forecast CSV.
+
+    Returns:
+        The result of the format checks, as `validate_quantile_csv_file()`
+        returns it, and the value check's error message or None.
+    """
+    header_error = check_header(read_forecast_header(path))
+    if header_error is not None:
+        return [header_error], None
+
+    summaries: dict[tuple[str, Any], RowErrorSummary] = {}
+    duplicates = _DuplicateRows()
+    quantile_order = _QuantileOrder()
+    invalid_value_rows: list[list[Any]] = []
+    offset = 0
+    for chunk in iter_forecast_chunks(
+        path, chunk_rows, schema=forecast_schema(config)
+    ):
+        for summary in row_error_summaries(chunk, config):
+            # the first chunk with a failing row has the reported row
+            merged = summaries.get(summary.key)
+            summaries[summary.key] = (
+                dataclasses.replace(
+                    summary, first_row=summary.first_row + offset
+                ) if merged is None
+                else dataclasses.replace(
+                    merged, count=merged.count + summary.count
+                )
+            )
+        duplicates.add(chunk, offset)
+        quantile_order.add(chunk, offset)
+
+        if population_index is not None:
+            values = pd.to_numeric(
+                chunk["value"], errors="coerce"
+            ).to_numpy(dtype=np.float64)
+            invalid = values >= population_index.lookup(chunk["location"])
+            if invalid.any():
+                invalid_value_rows.extend(
+                    chunk.loc[invalid, REQUIRED_COLUMNS].values.tolist()
+                )
+        offset += len(chunk)
+
+    errors: list[Optional[str]] = format_row_errors(summaries.values()) + [
+        duplicates.error(),
+        quantile_order.error(path, chunk_rows)
+    ]
+    errors = [e for e in errors if e is not None]
+    value_error = (
+        population_error_message(invalid_value_rows)
+        if invalid_value_rows else None
+    )
+    return (errors if errors else "no errors"), value_error
@@ -0,0 +1,286 @@
+"""
+Row-level diff of two versions of a forecast file.
+
+Each row is identified by a single int64 key hashed from the six key columns
+(forecast_date, target, target_end_date, location, type, quantile), so the
+two versions are matched with sorting and binary search over int64 arrays
+rather than through a MultiIndex. `diff_forecast_files()` builds these
+arrays chunk by chunk, so that large forecasts are diffed without ever
+being parsed whole.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Union
+import dataclasses
+import enum
+import os
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.utilities.forecast_frames import (
+    FORECAST_KEY_COLUMNS,
+    iter_forecast_chunks,
+    read_forecast_rows
+)
+
+# at most this many example rows are kept per kind of change
+MAX_DIFF_EXAMPLES: int = 5
+
+
+class RowChange(enum.IntEnum):
+    """How a row changed between the old and the new version of a forecast.
+    """
+    UNCHANGED = 0
+    CHANGED = 1
+    EXPLICITLY_RETRACTED = 2  # the new value is NA
+    IMPLICITLY_RETRACTED = 3  # the row is missing from the new version
+    ADDED = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class ForecastDiff:
+    """
+    Data class to store the result of diffing two versions of a forecast.
+
+    Fields:
+        counts: number of rows per kind of change; UNCHANGED, CHANGED and
+            the retractions count rows of the old version, ADDED counts rows
+            of the new version
+        examples: up to MAX_DIFF_EXAMPLES example rows per kind of change,
+            each as a list of the key column values followed by the old and
+            the new value
+        identical: True if both versions have the same fingerprint, in which
+            case no per-row work was done
+    """
+    counts: dict[RowChange, int]
+    examples: dict[RowChange, list[list[Any]]]
+    identical: bool = False
+
+    @property
+    def old_row_count(self) -> int:
+        return sum(
+            n for change, n in self.counts.items()
+            if change is not RowChange.ADDED
+        )
+
+
+def row_keys(frame: pd.DataFrame) -> np.ndarray:
+    """Hashes the key columns of each row into one int64 key.
+
+    The key does not depend on the type pandas inferred for the quantile
+    column, so that the keys of separately parsed files (or chunks of one
+    file) agree: numeric quantiles are hashed as numbers, and only the
+    others as the text they were read as.
+    """
+    quantile = frame["quantile"]
+    numeric_quantile = pd.to_numeric(quantile, errors="coerce")
+    keys = pd.util.hash_pandas_object(
+        frame[FORECAST_KEY_COLUMNS].assign(
+            quantile=numeric_quantile.astype(np.float64)
+        ),
+        index=False
+    ).to_numpy(copy=True)
+    text = (numeric_quantile.isna() & quantile.notna()).to_numpy()
+    if text.any():
+        keys[text] = pd.util.hash_pandas_object(
+            frame.loc[text, FORECAST_KEY_COLUMNS].assign(
+                quantile=quantile[text].astype(str)
+            ),
+            index=False
+        ).to_numpy()
+    return keys.view(np.int64)
+
+
+def forecast_rows(
+    path: Union[str, os.PathLike],
+    chunk_rows: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """The key (see `row_keys()`) and the value of every row of a
+    forecast CSV, read `chunk_rows` rows at a time."""
+    keys: list[np.ndarray] = []
+    values: list[np.ndarray] = []
+    for chunk in iter_forecast_chunks(path, chunk_rows):
+        keys.append(row_keys(chunk))
+        values.append(_values(chunk))
+    return np.concatenate(keys), np.concatenate(values)
+
+
+def _values(frame: pd.DataFrame) -> np.ndarray:
+    return pd.to_numeric(frame["value"], errors="coerce").to_numpy(
+        dtype=np.float64
+    )
+
+
+def forecast_fingerprint(frame: pd.DataFrame) -> tuple[int, int, int]:
+    """An order-independent fingerprint of a forecast's content.
+
+    Two frames with the same rows (keys and values), in any order, have the
+    same fingerprint.
+    """
+    return _fingerprint(row_keys(frame), _values(frame))
+
+
+def _fingerprint(
+    keys: np.ndarray,
+    values: np.ndarray
+) -> tuple[int, int, int]:
+    row_hashes = pd.util.hash_pandas_object(
+        pd.DataFrame({"key": keys, "value": values}), index=False
+    ).to_numpy()
+    # a second, differently mixed hash guards against sums that collide
+    mixed = (row_hashes ^ (row_hashes >> np.uint64(31))) * np.uint64(
+        0x9E3779B97F4A7C15
+    )
+    return (
+        len(keys),
+        int(np.add.reduce(row_hashes, dtype=np.uint64)),
+        int(np.add.reduce(mixed, dtype=np.uint64)),
+    )
+
+
+def _examples(
+    key_rows: Callable[[np.ndarray], list[list[Any]]],
+    positions: np.ndarray,
+    old_values: np.ndarray,
+    new_values: np.ndarray
+) -> list[list[Any]]:
+    positions = positions[:MAX_DIFF_EXAMPLES]
+    keys = key_rows(positions) if len(positions) else []
+    return [
+        key + [_as_python(old), _as_python(new)]
+        for key, old, new in zip(
+            keys,
+            old_values[:MAX_DIFF_EXAMPLES],
+            new_values[:MAX_DIFF_EXAMPLES]
+        )
+    ]
+
+
+def _as_python(value: float) -> Any:
+    return None if np.isnan(value) else float(value)
+
+
+def diff_forecasts(old: pd.DataFrame, new: pd.DataFrame) -> ForecastDiff:
+    """Classifies every row of two versions of a forecast in one pass.
+
+    Rows are matched on their key columns. A matched row is unchanged if its
+    value is equal (or NA in both versions), explicitly retracted if its new
+    value is NA, and changed otherwise. Rows of the old version that are
+    missing from the new one are implicitly retracted; rows of the new
+    version that are missing from the old one are added.
+    """
+    return _diff_rows(
+        row_keys(old), _values(old), _frame_key_rows(old),
+        row_keys(new), _values(new), _frame_key_rows(new)
+    )
+
+
+def diff_forecast_files(
+    old_path: Union[str, os.PathLike],
+    new_path: Union[str, os.PathLike],
+    chunk_rows: int
+) -> ForecastDiff:
+    """Like `diff_forecasts()`, but for forecast CSVs that are read
+    `chunk_rows` rows at a time.
+
+    Only a key and a value per row are kept in memory; the few example rows
+    are read back from the files afterwards.
+    """
+    old_keys, old_values = forecast_rows(old_path, chunk_rows)
+    new_keys, new_values = forecast_rows(new_path, chunk_rows)
+    return _diff_rows(
+        old_keys, old_values, _file_key_rows(old_path, chunk_rows),
+        new_keys, new_values, _file_key_rows(new_path, chunk_rows)
+    )
+
+
+def _frame_key_rows(
+    frame: pd.DataFrame
+) -> Callable[[np.ndarray], list[list[Any]]]:
+    return lambda positions: (
+        frame[FORECAST_KEY_COLUMNS].iloc[positions].values.tolist()
+    )
+
+
+def _file_key_rows(
+    path: Union[str, os.PathLike],
+    chunk_rows: int
+) -> Callable[[np.ndarray], list[list[Any]]]:
+    return lambda positions: read_forecast_rows(
+        path, positions, chunk_rows
+    )[FORECAST_KEY_COLUMNS].values.tolist()
+
+
+def _diff_rows(
+    old_keys: np.ndarray,
+    old_values: np.ndarray,
+    old_key_rows: Callable[[np.ndarray], list[list[Any]]],
+    new_keys: np.ndarray,
+    new_values: np.ndarray,
+    new_key_rows: Callable[[np.ndarray], list[list[Any]]]
+) -> ForecastDiff:
+    """Classifies the rows of two versions of a forecast given the key and
+    the value of each row; `*_key_rows()` return the key columns of the rows
+    at the given positions, for the examples."""
+    if (
+        _fingerprint(old_keys, old_values)
+        == _fingerprint(new_keys, new_values)
+    ):
+        return ForecastDiff(
+            counts={change: 0 for change in RowChange} | {
+                RowChange.UNCHANGED: len(old_keys)
+            },
+            examples={change: [] for change in RowChange},
+            identical=True
+        )
+
+    # match every old row to a new row by binary search on the sorted keys
+    new_order = np.argsort(new_keys, kind="stable")
+    sorted_new_keys = new_keys[new_order]
+    positions = np.searchsorted(sorted_new_keys, old_keys)
+    positions = positions.clip(max=max(len(sorted_new_keys) - 1, 0))
+    if len(sorted_new_keys) > 0:
+        found = sorted_new_keys[positions] == old_keys
+    else:
+        found = np.zeros(len(old_keys), dtype=bool)
+    matched_new_values = np.where(
+        found,
+        new_values[new_order][positions] if len(new_values) else np.nan,
+        np.nan
+    )
+
+    old_is_na = np.isnan(old_values)
+    new_is_na = np.isnan(matched_new_values)
+    change = np.full(len(old_keys), RowChange.CHANGED, dtype=np.int8)
+    change[(old_values == matched_new_values) | (old_is_na & new_is_na)] = (
+        RowChange.UNCHANGED
+    )
+    change[new_is_na & ~old_is_na] = RowChange.EXPLICITLY_RETRACTED
+    change[~found] = RowChange.IMPLICITLY_RETRACTED
+
+    added = ~np.isin(new_keys, old_keys)
+
+    counts: dict[RowChange, int] = {
+        kind: int(np.count_nonzero(change == kind))
+        for kind in RowChange if kind is not RowChange.ADDED
+    }
+    counts[RowChange.ADDED] = int(np.count_nonzero(added))
+
+    examples: dict[RowChange, list[list[Any]]] = {}
+    for kind in RowChange:
+        if kind is RowChange.ADDED:
+            rows = np.flatnonzero(added)
+            examples[kind] = _examples(
+                new_key_rows, rows, np.full(len(rows), np.nan),
+                new_values[rows]
+            )
+        elif kind is RowChange.UNCHANGED:
+            examples[kind] = []
+        else:
+            rows = np.flatnonzero(change == kind)
+            examples[kind] = _examples(
+                old_key_rows, rows, old_values[rows],
+                matched_new_values[rows]
+            )
+
+    return ForecastDiff(counts=counts, examples=examples)
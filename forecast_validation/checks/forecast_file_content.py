@@ -1,70 +1,91 @@
-from typing import Optional, Tuple, Union
+from typing import Any, Optional, Tuple, Union
 import datetime
 import logging
 import numpy as np
 import os
 import pandas as pd
 from pandas.io.stata import invalid_name_doc
-import zoltpy.covid19
 
 from forecast_validation import ParseDateError
-from forecast_validation.checks import RetractionCheckResult
+from forecast_validation.checks import (
+    DistinctDateCheckResult,
+    RetractionCheckResult
+)
+from forecast_validation.checks.forecast_diff import (
+    ForecastDiff,
+    RowChange,
+    diff_forecast_files,
+    diff_forecasts
+)
+from forecast_validation.utilities.forecast_frames import (
+    count_values,
+    read_forecast_frame
+)
 from forecast_validation.utilities.misc import compile_output_errors
+from forecast_validation.utilities.population_index import (
+    PopulationIndex,
+    load_population_index
+)
 
 logger: logging.Logger = logging.getLogger("hub-validations")
 
+def _as_forecast_frame(
+    forecast: Union[str, os.PathLike, pd.DataFrame]
+) -> pd.DataFrame:
+    if isinstance(forecast, pd.DataFrame):
+        return forecast
+    return read_forecast_frame(forecast)
+
 def compare_forecasts(
-    old_forecast_file_path: Union[str, os.PathLike],
-    new_forecast_file_path: Union[str, os.PathLike]
+    old_forecast_file_path: Union[str, os.PathLike, pd.DataFrame],
+    new_forecast_file_path: Union[str, os.PathLike, pd.DataFrame],
+    chunk_rows: Optional[int] = None
 ) -> RetractionCheckResult:
     """
     Compare the 2 forecasts and returns whether there are any implicit retractions or not
 
     Args:
-        old: Either a file pointer or a path string.
-        new: Either a file pointer or a path string.
+        old: Either a path string or an already parsed forecast frame.
+        new: Either a path string or an already parsed forecast frame.
+        chunk_rows: If given, both forecasts must be paths, and are read
+            this many rows at a time (see `diff_forecast_files()`).
 
     Returns:
         Whether this update has a retraction or not
     """
-    old_df: pd.DataFrame = pd.read_csv(
-        old_forecast_file_path,
-        index_col=["forecast_date", "target", "target_end_date", "location",
-                   "type", "quantile"])
-    new_df: pd.DataFrame = pd.read_csv(
-        new_forecast_file_path,
-        index_col=["forecast_date", "target", "target_end_date", "location",
-                   "type", "quantile"])
+    diff: ForecastDiff = diff_forecasts(
+        _as_forecast_frame(old_forecast_file_path),
+        _as_forecast_frame(new_forecast_file_path)
+    ) if chunk_rows is None else diff_forecast_files(
+        old_forecast_file_path, new_forecast_file_path, chunk_rows
+    )
+    counts = diff.counts
 
     error: Optional[str] = None
     has_implicit_retraction: bool = False
     has_explicit_retraction: bool = False
     is_all_duplicate: bool = False
-    
-    # First check if new dataframe has entries for ALL values of old dataframe
-    try:
-        # Access the indices of old forecast file in the new one
-        # TODO: There is definitely a more elegant way to do this!
-        new_vals = new_df.loc[old_df.index]
-        comparison = (old_df == new_vals)
-        if ((comparison).all(axis=None)) & (len(old_df) == len(new_df)):
-            is_all_duplicate = True
-            error = "Forecast is all duplicate."
-    except KeyError as e:
-        error = f"implicit retractions: {e.args[0]}"
-        # New forecast has some indices that are NOT in old forecast
+
+    if counts[RowChange.IMPLICITLY_RETRACTED] > 0:
+        # new forecast is missing some rows of the old forecast
         has_implicit_retraction = True
-    else:   
-        # check for explicit retractions
-        # check if mismatched positions have NULLs
-        if not (comparison).all(axis=None):
-            if ((new_vals.isnull()) & (~ comparison)).any(axis=None):
-                has_explicit_retraction = True
+        error = (
+            f"implicit retractions: {counts[RowChange.IMPLICITLY_RETRACTED]} "
+            f"row(s) of the existing forecast are missing, e.g. "
+            f"{diff.examples[RowChange.IMPLICITLY_RETRACTED][0][:-2]}"
+        )
+    elif counts[RowChange.EXPLICITLY_RETRACTED] > 0:
+        has_explicit_retraction = True
+    elif (counts[RowChange.CHANGED] == 0 and
+          counts[RowChange.ADDED] == 0):
+        is_all_duplicate = True
+        error = "Forecast is all duplicate."
     return RetractionCheckResult(
         error=error,
         has_implicit_retraction=has_implicit_retraction,
         has_explicit_retraction=has_explicit_retraction,
-        is_all_duplicate=is_all_duplicate
+        is_all_duplicate=is_all_duplicate,
+        diff=diff
     )
 
 def check_date_format(date_str: str) -> None:
@@ -75,7 +96,7 @@ def check_date_format(date_str: str) -> None:
             f"error while parsing date string {date_str}; too many components "
             "(found 4 dashes in date string; should only have 3)"
         )
-        logger.error(error_message, date_str)
+        logger.error(error_message)
         raise ParseDateError(error_message)
     
     if len(month) != 2:
@@ -83,19 +104,79 @@ def check_date_format(date_str: str) -> None:
             f"error while parsing date string {date_str}; must have 2-digit "
             "month"
         )
-        logger.error(error_message, date_str)
+        logger.error(error_message)
         raise ParseDateError(error_message)
 
     if len(day) != 2:
         error_message = (
             f"error while parsing date string {date_str}; must have 2-digit day"
         )
-        logger.error(error_message, date_str)
+        logger.error(error_message)
         raise ParseDateError(error_message)
 
+def check_distinct_dates(dates: pd.Series) -> list[DistinctDateCheckResult]:
+    """Checks the format of, and parses, every distinct value of a date column.
+
+    Well-formed values (YYYY-MM-DD) are matched with one regex over the
+    distinct values and parsed with one vectorized `pd.to_datetime` call.
+    Only distinct values that fail go through the per-value checks that
+    produce the detailed error messages, so the cost scales with the number
+    of distinct dates rather than rows.
+
+    Returns:
+        One result per distinct value, with the number of rows containing it.
+    """
+    return check_distinct_date_counts(count_values(dates))
+
+def check_distinct_date_counts(
+    counts: pd.Series
+) -> list[DistinctDateCheckResult]:
+    """Like `check_distinct_dates()`, but given the number of rows per
+    distinct value of the date column (e.g. counted chunk by chunk)."""
+    counts = counts.copy()
+    counts.index = [str(value) for value in counts.index]
+    counts = counts.groupby(level=0, sort=False).sum()
+    values = pd.Series(counts.index, dtype=object)
+    well_formed = values.str.match(r"^\d{4}-\d{2}-\d{2}$").to_numpy()
+    parsed = pd.to_datetime(
+        values.where(well_formed), format="%Y-%m-%d", errors="coerce"
+    )
+
+    results: list[DistinctDateCheckResult] = []
+    for position, (value, row_count) in enumerate(counts.items()):
+        if well_formed[position] and not pd.isna(parsed[position]):
+            results.append(DistinctDateCheckResult(
+                value=value,
+                row_count=int(row_count),
+                date=parsed[position].date()
+            ))
+            continue
+
+        format_error: Optional[str] = None
+        try:
+            check_date_format(value)
+        except ParseDateError as pde:
+            format_error = pde.args[0]
+
+        date: Optional[datetime.date] = None
+        parse_error: Optional[str] = None
+        try:
+            date = datetime.datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError as ve:
+            parse_error = ve.args[0]
+
+        results.append(DistinctDateCheckResult(
+            value=value,
+            row_count=int(row_count),
+            date=date,
+            format_error=format_error,
+            parse_error=parse_error
+        ))
+    return results
+
 def validate_forecast_values(
-    forecast_file_path: os.PathLike,
-    population_dataframe_path: os.PathLike
+    forecast_file_path: Union[os.PathLike, pd.DataFrame],
+    population_dataframe_path: Union[os.PathLike, PopulationIndex]
 ) -> Optional[str]:
     '''
         Get the numer of invalid predictions in a forecast file.
@@ -105,12 +186,12 @@ def validate_forecast_values(
               region. 
 
         Method:
-        1. convert the location column to an integer (so that we can do an
-           efficient `join` with the forecast DataFrame)
-        2. Do a left join of the forecast DataFrame with population dataframe
-           on the `location` column.
-        3. Find number of rows that have the value in `value` column >= the 
-           value of the `Population` column.
+        1. look up the population of every row's location in the population
+           index (loaded once per process), one binary search per distinct
+           location
+        2. compare the `value` column against the looked up populations in
+           one vectorized comparison; no join, no copy of the forecast frame
+        3. only materialize the rows whose value is >= the population
 
         Population data: 
         Retrieved from the JHU timeseries data used for generating the truth 
@@ -118,24 +199,34 @@ def validate_forecast_values(
         County population aggregated to state and state thereafter aggregated 
         to national. 
     '''
-    model_dataframe = pd.read_csv(forecast_file_path, dtype={'location': str})
-    population_dataframe = (
-        pd.read_csv(population_dataframe_path, dtype={"location": str})
+    model_dataframe = _as_forecast_frame(forecast_file_path)
+    population_index: PopulationIndex = (
+        population_dataframe_path
+        if isinstance(population_dataframe_path, PopulationIndex)
+        else load_population_index(population_dataframe_path)
     )
 
-    merged = model_dataframe.merge(
-        population_dataframe[['location', 'population']],
-        on='location', how='left'
-    )
-    invalid_predictions = merged['value'] >= merged['population']
-    num_invalid_predictions = np.sum(invalid_predictions)
+    values = pd.to_numeric(
+        model_dataframe['value'], errors='coerce'
+    ).to_numpy(dtype=np.float64)
+    populations = population_index.lookup(model_dataframe['location'])
+    invalid_predictions = values >= populations
+    num_invalid_predictions = int(np.count_nonzero(invalid_predictions))
 
     if num_invalid_predictions > 0:
-        return (
-            f"Found {num_invalid_predictions} predictions with forecasted "
-            "value larger than population size of locality in your file, "
-            "at these row(s) "
-            f"{merged.loc[invalid_predictions, ['forecast_date', 'target','target_end_date', 'location', 'type', 'quantile','value']].values.tolist()}"
+        return population_error_message(
+            model_dataframe.loc[invalid_predictions, ['forecast_date', 'target','target_end_date', 'location', 'type', 'quantile','value']].values.tolist()
         )
     else:
         return None
+
+def population_error_message(invalid_rows: list[list[Any]]) -> str:
+    """The error of `validate_forecast_values()` for the given rows, each a
+    list of the forecast_date, target, target_end_date, location, type,
+    quantile and value."""
+    return (
+        f"Found {len(invalid_rows)} predictions with forecasted "
+        "value larger than population size of locality in your file, "
+        "at these row(s) "
+        f"{invalid_rows}"
+    )
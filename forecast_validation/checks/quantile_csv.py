@@ -0,0 +1,662 @@
+"""
+Column-wise validation of quantile forecast CSV files.
+
+This is an in-repo replacement of `zoltpy.covid19.validate_quantile_csv_file`.
+Instead of walking the file row by row, every check is expressed as a
+vectorized operation over a whole parsed forecast frame, and every failing
+check is reported once together with the first offending row and the number
+of rows that failed it.
+
+Checks are split into row-local checks (`row_errors()`), which only look at
+one row at a time, and cross-row checks (`cross_row_errors()`), which need
+to see every row of a prediction. Row-local checks first produce one
+`RowErrorSummary` per failed check, so that the summaries of the chunks of
+a file can be merged (see `forecast_validation.checks.chunked`). The error
+messages keep the wording used by zoltpy.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Optional, Union
+import collections
+import dataclasses
+import itertools
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.utilities.forecast_frames import (
+    FORECAST_KEY_COLUMNS,
+    read_forecast_frame
+)
+from forecast_validation.utilities.hub_config import (
+    CompiledHubConfig,
+    as_compiled_hub_config
+)
+
+REQUIRED_COLUMNS: list[str] = [
+    "forecast_date", "target", "target_end_date", "location", "type",
+    "quantile", "value"
+]
+PREDICTION_KEY_COLUMNS: list[str] = [
+    "forecast_date", "target", "target_end_date", "location"
+]
+POINT_TYPE: str = "point"
+QUANTILE_TYPE: str = "quantile"
+VALID_TYPES: list[str] = [POINT_TYPE, QUANTILE_TYPE]
+
+DATE_PATTERN: re.Pattern = re.compile(r"^\d\d\d\d-\d\d-\d\d$")
+STEP_AHEAD_TARGET_PATTERN: re.Pattern = re.compile(
+    r"^(\d+) (day|wk) ahead "
+)
+
+# each distinct invalid value of a column is reported at most this many times
+MAX_DISTINCT_VALUE_ERRORS: int = 10
+
+# Monday is 0 and Sunday is 6, as with datetime.date.weekday()
+SATURDAY: int = 5
+# day number of a missing or malformed date; see `day_numbers()`
+MISSING_DAY: int = int(np.iinfo(np.int32).min)
+
+# the row-local checks, in the order in which their errors are reported;
+# "type" and "target" report each distinct offending value separately
+ROW_CHECKS: tuple[str, ...] = (
+    "empty_row", "type", "target", "location", "quantile_range",
+    "quantile_for_target", "point_quantile", "value_not_number",
+    "value_negative", "date_format", "day_ahead_end_date",
+    "end_date_not_saturday", "unexpected_saturday"
+)
+DISTINCT_VALUE_CHECKS: frozenset[str] = frozenset({"type", "target"})
+
+
+@dataclasses.dataclass(frozen=True)
+class RowErrorSummary:
+    """
+    Data class for one failed row-local check, summarized over every row
+    that fails it.
+
+    Fields:
+        check: the name of the check, e.g. one of ROW_CHECKS
+        value: for checks in DISTINCT_VALUE_CHECKS, the offending value
+            (None for a missing value); None otherwise
+        first_row: position of the first failing row in the frame
+        count: number of rows that fail the check
+        message: the error message for the first failing row, including the
+            row; None if the summary is never reported (see
+            `_distinct_value_errors()`)
+    """
+    check: str
+    value: Any
+    first_row: int
+    count: int
+    message: Optional[str]
+
+    @property
+    def key(self) -> tuple[str, Any]:
+        return (self.check, self.value)
+
+    def __str__(self) -> str:
+        text = self.message or ""
+        if self.count > 1:
+            text += f" (and {self.count - 1} more row(s) with the same error)"
+        return text
+
+
+def _python_value(value: Any) -> Any:
+    """`value` as a plain Python scalar, so that messages show e.g. 0.5
+    rather than np.float64(0.5)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _row_values(frame: pd.DataFrame, position: int) -> dict[str, Any]:
+    return {
+        column: _python_value(value)
+        for column, value in frame.iloc[position].items()
+    }
+
+
+def _format_row(frame: pd.DataFrame, position: int) -> list[Any]:
+    row = _row_values(frame, position)
+    return [row.get(column) for column in REQUIRED_COLUMNS]
+
+
+def _row_message(
+    frame: pd.DataFrame,
+    position: int,
+    message: Union[str, Callable[[dict[str, Any]], str]]
+) -> str:
+    text = (
+        message(_row_values(frame, position)) if callable(message)
+        else message
+    )
+    return text + f" row={_format_row(frame, position)}"
+
+
+def _summarize(
+    frame: pd.DataFrame,
+    mask: Union[pd.Series, np.ndarray],
+    message: Union[str, Callable[[dict[str, Any]], str]],
+    check: str
+) -> Optional[RowErrorSummary]:
+    """Turns a boolean mask of failing rows into one error summary.
+
+    `message` is either a fixed string or a function of the first failing
+    row (a dict of its Python values) that returns the message for it.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    count = int(mask.sum())
+    if count == 0:
+        return None
+    first = int(np.flatnonzero(mask)[0])
+    return RowErrorSummary(
+        check=check,
+        value=None,
+        first_row=first,
+        count=count,
+        message=_row_message(frame, first, message)
+    )
+
+
+def _distinct_value_errors(
+    frame: pd.DataFrame,
+    mask: Union[pd.Series, np.ndarray],
+    column: str,
+    message: Callable[[dict[str, Any]], str]
+) -> list[RowErrorSummary]:
+    """Like `_summarize()`, but summarizes each distinct offending value of
+    `column` separately; the check is named after the column.
+
+    Only the first MAX_DISTINCT_VALUE_ERRORS values are ever reported, so
+    later values get a summary without a message. A value that is not among
+    the first ones of a frame is not among the first ones of any frame that
+    the frame is a part of, either.
+    """
+    positions = np.flatnonzero(np.asarray(mask, dtype=bool))
+    if len(positions) == 0:
+        return []
+    # codes are assigned in order of first appearance
+    codes, offending = pd.factorize(
+        frame[column].to_numpy()[positions], use_na_sentinel=False
+    )
+    counts = np.bincount(codes)
+    _, first_positions = np.unique(codes, return_index=True)
+    return [
+        RowErrorSummary(
+            check=column,
+            value=None if pd.isna(value) else _python_value(value),
+            first_row=int(positions[first]),
+            count=int(count),
+            message=(
+                _row_message(frame, int(positions[first]), message)
+                if code < MAX_DISTINCT_VALUE_ERRORS else None
+            )
+        )
+        for code, (value, count, first) in enumerate(
+            zip(offending, counts, first_positions)
+        )
+    ]
+
+
+def format_row_errors(summaries: Iterable[RowErrorSummary]) -> list[str]:
+    """Turns row error summaries into error messages, in the order of
+    ROW_CHECKS and, within a check, of the first failing row."""
+    ordered = sorted(
+        summaries, key=lambda s: (ROW_CHECKS.index(s.check), s.first_row)
+    )
+    errors: list[str] = []
+    for check, check_summaries in itertools.groupby(
+        ordered, key=lambda s: s.check
+    ):
+        check_summaries = list(check_summaries)
+        if check not in DISTINCT_VALUE_CHECKS:
+            errors.extend(str(s) for s in check_summaries)
+            continue
+        errors.extend(
+            str(s) for s in check_summaries[:MAX_DISTINCT_VALUE_ERRORS]
+        )
+        if len(check_summaries) > MAX_DISTINCT_VALUE_ERRORS:
+            errors.append(
+                f"... and {len(check_summaries) - MAX_DISTINCT_VALUE_ERRORS} "
+                f"more distinct invalid `{check}` value(s)."
+            )
+    return errors
+
+
+def _codes(values: pd.Series, index: dict[Any, int]) -> np.ndarray:
+    """The code of each of `values` in `index`, or -1 for values (and
+    missing values) that are not in it.
+
+    Each distinct value is looked up once; for a categorical column read
+    with the config's `ForecastSchema` that is once per category, and
+    everything else runs on integer codes.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    table = np.fromiter(
+        (index.get(value, -1) for value in uniques), dtype=np.intp,
+        count=len(uniques)
+    )
+    # code -1 (a missing value) picks the trailing -1
+    return np.append(table, -1)[codes]
+
+
+def day_numbers(values: pd.Series) -> np.ndarray:
+    """Parses YYYY-MM-DD strings into int32 day numbers (days since
+    1970-01-01), one parse per distinct value.
+
+    Returns:
+        An int32 array aligned with `values`; entries that are missing or
+        not strictly YYYY-MM-DD dates are MISSING_DAY.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+    well_formed = uniques.str.match(DATE_PATTERN)
+    parsed = pd.to_datetime(
+        uniques.where(well_formed), format="%Y-%m-%d", errors="coerce"
+    )
+    days = np.full(len(uniques) + 1, MISSING_DAY, dtype=np.int32)
+    valid = parsed.notna().to_numpy()
+    days[:-1][valid] = parsed[valid].to_numpy().astype(
+        "datetime64[D]"
+    ).astype(np.int32)
+    # code -1 (a missing value) picks the trailing MISSING_DAY
+    return days[codes]
+
+
+def check_header(columns: Iterable[str]) -> Optional[str]:
+    header = [str(c) for c in columns]
+    duplicates = [c for c, n in collections.Counter(header).items() if n > 1]
+    if duplicates:
+        return f"invalid header. found duplicate column(s): {duplicates}"
+    if not set(REQUIRED_COLUMNS) <= set(header):
+        return (
+            "invalid header. did not contain the required columns. "
+            f"header={header}, required_columns={REQUIRED_COLUMNS}"
+        )
+    return None
+
+
+def row_errors(
+    frame: pd.DataFrame,
+    config: CompiledHubConfig
+) -> list[str]:
+    """Runs every check that only needs to look at one row at a time.
+    """
+    return format_row_errors(row_error_summaries(frame, config))
+
+
+def row_error_summaries(
+    frame: pd.DataFrame,
+    config: CompiledHubConfig
+) -> list[RowErrorSummary]:
+    """Like `row_errors()`, but returns the summary of each failed check.
+    """
+    errors: list[Optional[RowErrorSummary]] = []
+
+    row_is_empty = frame[REQUIRED_COLUMNS].isna().all(axis=1).to_numpy()
+    errors.append(_summarize(
+        frame, row_is_empty, "entire row is empty.", "empty_row"
+    ))
+    rows = ~row_is_empty
+
+    row_type = frame["type"]
+    is_point = (row_type == POINT_TYPE).to_numpy() & rows
+    is_quantile = (row_type == QUANTILE_TYPE).to_numpy() & rows
+    errors.extend(_distinct_value_errors(
+        frame, rows & ~is_point & ~is_quantile, "type",
+        lambda r: f"invalid type: {r['type']!r}. must be one of {VALID_TYPES}."
+    ))
+
+    # targets, and the locations/quantiles valid for each target's group
+    group = _codes(frame["target"], config.target_to_group)
+    has_group = group >= 0
+    errors.extend(_distinct_value_errors(
+        frame, rows & ~has_group, "target",
+        lambda r: f"invalid target name: {r['target']!r}."
+    ))
+
+    quantile = pd.to_numeric(frame["quantile"], errors="coerce")
+    value = pd.to_numeric(frame["value"], errors="coerce")
+
+    # membership of (group, location) and (group, quantile) pairs is looked
+    # up by integer code in the compiled config's tables; code -1 (not in
+    # the config) picks the last entry, which the masks then discard
+    location_code = _codes(frame["location"], config.location_index)
+    quantile_slot = _codes(quantile, config.quantile_slots)
+    location_valid = (
+        config.group_location_table[group, location_code] &
+        (location_code >= 0)
+    )
+    quantile_valid = (
+        config.group_quantile_table[group, quantile_slot] &
+        (quantile_slot >= 0)
+    )
+    invalid_location = rows & has_group & ~location_valid
+    invalid_group_quantile = (
+        rows & has_group & is_quantile & quantile.notna().to_numpy() &
+        ~quantile_valid
+    )
+    errors.append(_summarize(
+        frame, invalid_location,
+        lambda r: (
+            "invalid location for target. "
+            f"location={r['location']!r}, target={r['target']!r}."
+        ),
+        "location"
+    ))
+
+    # quantile: a number in [0, 1] for quantile rows, empty for point rows
+    quantile_out_of_range = is_quantile & ~(
+        quantile.between(0, 1).to_numpy()
+    )
+    errors.append(_summarize(
+        frame, quantile_out_of_range,
+        lambda r: (
+            "entries in the `quantile` column must be an int or float in "
+            f"[0, 1]: {r['quantile']}."
+        ),
+        "quantile_range"
+    ))
+    errors.append(_summarize(
+        frame, invalid_group_quantile & ~quantile_out_of_range,
+        lambda r: (
+            "invalid quantile for target. "
+            f"quantile={r['quantile']}, target={r['target']!r}."
+        ),
+        "quantile_for_target"
+    ))
+    errors.append(_summarize(
+        frame, is_point & frame["quantile"].notna().to_numpy(),
+        lambda r: (
+            "entries in the `quantile` column must be empty for `point` "
+            f"entries: {r['quantile']}."
+        ),
+        "point_quantile"
+    ))
+
+    # value: a non-negative number; an empty value is an explicit retraction
+    value_not_number = rows & (
+        value.isna() & frame["value"].notna()
+    ).to_numpy()
+    errors.append(_summarize(
+        frame, value_not_number,
+        lambda r: (
+            "entries in the `value` column must be an int or float: "
+            f"{r['value']}."
+        ),
+        "value_not_number"
+    ))
+    errors.append(_summarize(
+        frame, rows & (value < 0).to_numpy(),
+        lambda r: (
+            "entries in the `value` column must be non-negative. "
+            f"value={r['value']}."
+        ),
+        "value_negative"
+    ))
+
+    errors.extend(date_errors(frame, rows))
+
+    return [e for e in errors if e is not None]
+
+
+def date_errors(
+    frame: pd.DataFrame,
+    rows: np.ndarray
+) -> list[RowErrorSummary]:
+    """Checks date formats, and target_end_date against forecast_date and the
+    step-ahead of the target.
+    """
+    errors: list[Optional[RowErrorSummary]] = []
+    forecast_day = day_numbers(frame["forecast_date"])
+    end_day = day_numbers(frame["target_end_date"])
+
+    bad_format = rows & (
+        (forecast_day == MISSING_DAY) | (end_day == MISSING_DAY)
+    )
+    errors.append(_summarize(
+        frame, bad_format,
+        lambda r: (
+            "invalid forecast_date or target_end_date format. "
+            f"forecast_date={r['forecast_date']!r}. "
+            f"target_end_date={r['target_end_date']!r}."
+        ),
+        "date_format"
+    ))
+
+    # step-ahead of each distinct target, e.g. ("1", "wk") for
+    # "1 wk ahead inc death"; targets not of that form are not checked
+    target_codes, targets = pd.factorize(frame["target"])
+    step_ahead = pd.Series(targets, dtype=object).astype(str).str.extract(
+        STEP_AHEAD_TARGET_PATTERN
+    )
+    target_steps = np.append(
+        pd.to_numeric(step_ahead[0], errors="coerce").to_numpy(
+            dtype=np.float64
+        ),
+        np.nan
+    )
+    target_units = np.append(step_ahead[1].fillna("").to_numpy(dtype=str), "")
+    # code -1 (a missing target) picks the trailing "no step-ahead" entry
+    steps = target_steps[target_codes]
+    units = target_units[target_codes]
+    checkable = rows & ~bad_format & ~np.isnan(steps)
+
+    diff = end_day.astype(np.int64) - forecast_day
+
+    is_day_ahead = checkable & (units == "day")
+    errors.append(_summarize(
+        frame, is_day_ahead & (diff != np.nan_to_num(steps).astype(np.int64)),
+        lambda r: (
+            "invalid target_end_date: was not "
+            f"{STEP_AHEAD_TARGET_PATTERN.match(r['target']).group(1)} day(s) "
+            "after forecast_date. "
+            f"forecast_date={r['forecast_date']}, "
+            f"target_end_date={r['target_end_date']}."
+        ),
+        "day_ahead_end_date"
+    ))
+
+    # weeks end on Saturday; a forecast made on a Sunday or Monday has its
+    # 1 wk ahead target end on the following Saturday, later forecasts on
+    # the Saturday after that
+    is_week_ahead = checkable & (units == "wk")
+    forecast_weekday = (forecast_day.astype(np.int64) + 3) % 7
+    end_weekday = (end_day.astype(np.int64) + 3) % 7
+    days_to_saturday = (SATURDAY - forecast_weekday) % 7
+    days_to_saturday = np.where(
+        np.isin(forecast_weekday, [6, 0]), days_to_saturday,
+        days_to_saturday + 7
+    )
+    expected_diff = (
+        days_to_saturday + 7 * (np.nan_to_num(steps).astype(np.int64) - 1)
+    )
+    not_saturday = is_week_ahead & (end_weekday != SATURDAY)
+    errors.append(_summarize(
+        frame, not_saturday,
+        lambda r: (
+            f"target_end_date was not a Saturday: {r['target_end_date']}."
+        ),
+        "end_date_not_saturday"
+    ))
+
+    unexpected_saturday = (
+        is_week_ahead & ~not_saturday & (diff != expected_diff)
+    )
+
+    def _expected_saturday(r: dict[str, Any]) -> str:
+        # the message is only made for the first failing row
+        position = int(np.flatnonzero(unexpected_saturday)[0])
+        expected = np.datetime64(
+            int(forecast_day[position]) + int(expected_diff[position]), "D"
+        )
+        return (
+            "target_end_date was not the expected Saturday. "
+            f"forecast_date={r['forecast_date']}, "
+            f"target_end_date={r['target_end_date']}. "
+            f"exp_target_end_date={expected}."
+        )
+    errors.append(_summarize(
+        frame, unexpected_saturday, _expected_saturday, "unexpected_saturday"
+    ))
+
+    return [e for e in errors if e is not None]
+
+
+def duplicate_row_message(row: dict[str, Any]) -> str:
+    return (
+        "found duplicate prediction rows. "
+        f"location={row['location']!r}, target={row['target']!r}, "
+        f"type={row['type']!r}, quantile={row['quantile']}."
+    )
+
+
+def prediction_keys(frame: pd.DataFrame) -> np.ndarray:
+    """Hashes the columns that identify the prediction of each row
+    (forecast_date, target, target_end_date, location) into one key."""
+    return pd.util.hash_pandas_object(
+        frame[PREDICTION_KEY_COLUMNS], index=False
+    ).to_numpy()
+
+
+def cross_row_errors(frame: pd.DataFrame) -> list[str]:
+    """Runs the checks that need to see every row of a prediction.
+    """
+    errors: list[Optional[str]] = []
+
+    duplicated = frame.duplicated(subset=FORECAST_KEY_COLUMNS, keep="first")
+    duplicate_error = _summarize(
+        frame, duplicated, duplicate_row_message, "duplicate_rows"
+    )
+    errors.append(None if duplicate_error is None else str(duplicate_error))
+
+    quantile_rows = frame.loc[
+        frame["type"] == QUANTILE_TYPE,
+        PREDICTION_KEY_COLUMNS + ["quantile", "value"]
+    ]
+    errors.append(quantile_monotonicity_error(
+        frame,
+        quantile_rows.index.to_numpy(),
+        prediction_keys(quantile_rows),
+        pd.to_numeric(
+            quantile_rows["quantile"], errors="coerce"
+        ).to_numpy(dtype=np.float64),
+        pd.to_numeric(
+            quantile_rows["value"], errors="coerce"
+        ).to_numpy(dtype=np.float64)
+    ))
+
+    return [e for e in errors if e is not None]
+
+
+def decreasing_quantiles(
+    prediction_keys: np.ndarray,
+    quantiles: np.ndarray,
+    values: np.ndarray
+) -> Optional[tuple[int, int]]:
+    """Finds predictions whose values decrease as quantiles increase.
+
+    Args:
+        prediction_keys: an integer key per row, identifying its prediction
+            (forecast_date, target, target_end_date, location).
+        quantiles, values: the quantile and value of each row.
+
+    Returns:
+        None if there are no such predictions; otherwise the position of the
+        row to report, and the number of predictions affected.
+    """
+    usable = np.flatnonzero(~(np.isnan(quantiles) | np.isnan(values)))
+    order = usable[np.lexsort((quantiles[usable], prediction_keys[usable]))]
+    keys = prediction_keys[order]
+    sorted_values = values[order]
+    decreasing = (keys[1:] == keys[:-1]) & (
+        sorted_values[1:] < sorted_values[:-1]
+    )
+    if not decreasing.any():
+        return None
+    return (
+        int(order[1:][decreasing][0]),
+        len(np.unique(keys[1:][decreasing]))
+    )
+
+
+def monotonicity_error_message(row_message: str, predictions: int) -> str:
+    error = (
+        "Entries in `value` must be non-decreasing as quantiles increase."
+        f" row={row_message}"
+    )
+    if predictions > 1:
+        error += f" ({predictions} predictions affected)"
+    return error
+
+
+def quantile_monotonicity_error(
+    frame: pd.DataFrame,
+    row_labels: np.ndarray,
+    prediction_keys: np.ndarray,
+    quantiles: np.ndarray,
+    values: np.ndarray
+) -> Optional[str]:
+    """Checks that values do not decrease as quantiles increase within each
+    prediction.
+
+    Args:
+        frame: the frame the rows come from; used for reporting only.
+        row_labels: the index labels in `frame` of the quantile rows.
+        prediction_keys, quantiles, values: see `decreasing_quantiles()`.
+    """
+    decreasing = decreasing_quantiles(prediction_keys, quantiles, values)
+    if decreasing is None:
+        return None
+    position, predictions = decreasing
+    first = frame.index.get_loc(row_labels[position])
+    return monotonicity_error_message(
+        str(_format_row(frame, first)), predictions
+    )
+
+
+def validate_quantile_csv_frame(
+    frame: pd.DataFrame,
+    validation_config: Union[dict[str, Any], CompiledHubConfig]
+) -> list[str]:
+    """Validates a parsed quantile forecast.
+
+    Returns:
+        A list of error messages; empty if there are no errors.
+    """
+    header_error = check_header(frame.columns)
+    if header_error is not None:
+        return [header_error]
+
+    config = as_compiled_hub_config(validation_config)
+    if not frame.index.is_unique:
+        frame = frame.reset_index(drop=True)
+    return row_errors(frame, config) + cross_row_errors(frame)
+
+
+def validate_quantile_csv_file(
+    forecast: Union[str, os.PathLike, pd.DataFrame],
+    validation_config: Union[dict[str, Any], CompiledHubConfig]
+) -> Union[str, list[str]]:
+    """Validates a quantile forecast CSV file.
+
+    Has the same contract as `zoltpy.covid19.validate_quantile_csv_file()`.
+
+    Args:
+        forecast: a path to the forecast CSV, or its parsed frame.
+        validation_config: the hub config (preferably already compiled)
+            whose `target_groups` define the valid targets, locations and
+            quantiles.
+
+    Returns:
+        "no errors" if the file is valid, or a list of error messages.
+    """
+    if isinstance(forecast, pd.DataFrame):
+        frame = forecast
+    else:
+        try:
+            frame = read_forecast_frame(forecast)
+        except (ValueError, pd.errors.ParserError) as e:
+            return [f"could not parse the file as CSV: {e}"]
+
+    errors = validate_quantile_csv_frame(frame, validation_config)
+    return errors if errors else "no errors"
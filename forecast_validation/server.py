@@ -0,0 +1,220 @@
+"""
+Long-running validation server with a local HTTP API.
+
+The server process imports the validation dependencies and loads the hub
+config, locations and caches once; each request then only pays for the
+validation itself. Endpoints:
+
+    GET  /health    {"status": "ok", "validations_version": ...}
+    POST /validate  validates a submission and returns its results
+
+The body of a /validate request is a JSON object with either
+    "files": {"<path in the hub>": "<file content>", ...}
+        e.g. {"data-processed/team-model/2021-11-29-team-model.csv": "..."},
+or
+    "local_dir": "<directory on the server laid out like the hub>".
+
+The response holds "success", "errors" (by file path), "comments",
+"labels" and a plain-text "report". Every request gets its own validation
+run, and so its own store, and its log lines are prefixed with its id.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional, Union
+import http.server
+import itertools
+import json
+import logging
+import os
+import pathlib
+import shutil
+import tempfile
+import threading
+
+from forecast_validation import VALIDATIONS_VERSION
+from forecast_validation.utilities.log_context import (
+    enable_log_context,
+    logging_context
+)
+from forecast_validation.validation import ValidationRun
+
+logger = logging.getLogger("hub-validations")
+
+# largest accepted request body
+MAX_REQUEST_BYTES: int = 64 * 1024 * 1024
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _submission_path(root: pathlib.Path, name: str) -> pathlib.Path:
+    """The path of an uploaded file under `root`; rejects absolute paths
+    and paths that leave `root`."""
+    relative_path = pathlib.PurePosixPath(name)
+    if relative_path.is_absolute() or ".." in relative_path.parts or not name:
+        raise BadRequest(f"invalid file path: {name!r}")
+    return root.joinpath(*relative_path.parts)
+
+
+class ValidationServer(http.server.ThreadingHTTPServer):
+    """
+    HTTP server that validates submissions with runs made by `run_factory`.
+
+    `run_factory` takes the directory of a submission, laid out like the hub
+    repository, and returns the validation run for it; the server does not
+    know which steps the run has. At most `max_concurrent_runs` runs execute
+    at once; further requests wait.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        run_factory: Callable[[pathlib.Path], ValidationRun],
+        work_directory: Optional[Union[str, os.PathLike]] = None,
+        max_concurrent_runs: Optional[int] = None
+    ) -> None:
+        super().__init__(address, ValidationRequestHandler)
+        self.run_factory: Callable[[pathlib.Path], ValidationRun] = run_factory
+        self.work_directory: Optional[pathlib.Path] = (
+            pathlib.Path(work_directory) if work_directory is not None
+            else None
+        )
+        self._run_slots = threading.BoundedSemaphore(
+            max_concurrent_runs or os.cpu_count() or 1
+        )
+        self._request_ids = itertools.count(1)
+        self._request_ids_lock = threading.Lock()
+        enable_log_context()
+
+    def next_request_id(self) -> str:
+        with self._request_ids_lock:
+            return f"request-{next(self._request_ids)}"
+
+    def validate(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Validates the submission described by a /validate request body
+        and returns the response body."""
+        if "files" in body:
+            files = body["files"]
+            if not isinstance(files, dict) or not files:
+                raise BadRequest('"files" must map file paths to contents')
+            if self.work_directory is not None:
+                os.makedirs(self.work_directory, exist_ok=True)
+            submission_directory = pathlib.Path(tempfile.mkdtemp(
+                prefix="submission-", dir=self.work_directory
+            ))
+            try:
+                for name, content in files.items():
+                    if not isinstance(content, str):
+                        raise BadRequest(f"content of {name!r} must be a string")
+                    path = _submission_path(submission_directory, name)
+                    os.makedirs(path.parent, exist_ok=True)
+                    path.write_text(content, encoding="utf-8")
+                return self._run(submission_directory)
+            finally:
+                shutil.rmtree(submission_directory, ignore_errors=True)
+        elif "local_dir" in body:
+            submission_directory = pathlib.Path(str(body["local_dir"]))
+            if not submission_directory.is_dir():
+                raise BadRequest(f"not a directory: {body['local_dir']!r}")
+            return self._run(submission_directory.resolve())
+        raise BadRequest('request must contain "files" or "local_dir"')
+
+    def _run(self, submission_directory: pathlib.Path) -> dict[str, Any]:
+        with self._run_slots:
+            validation_run = self.run_factory(submission_directory)
+            validation_run.run()
+
+        labels, comments, errors = validation_run.merged_outputs()
+        return {
+            "success": validation_run.success,
+            "errors": {
+                _display_path(path, submission_directory): file_errors
+                for path, file_errors in errors.items()
+            },
+            "comments": [
+                comment.replace(f"{submission_directory}{os.sep}", "")
+                for comment in comments
+            ],
+            "labels": sorted(getattr(l, "name", l) for l in labels),
+            "report": validation_run.report().replace(
+                f"{submission_directory}{os.sep}", ""
+            )
+        }
+
+
+def _display_path(
+    path: os.PathLike,
+    submission_directory: pathlib.Path
+) -> str:
+    """Error paths relative to the submission, as the client named them."""
+    path = pathlib.Path(path)
+    if path.is_absolute():
+        try:
+            path = path.relative_to(submission_directory)
+        except ValueError:
+            pass
+    return path.as_posix()
+
+
+class ValidationRequestHandler(http.server.BaseHTTPRequestHandler):
+    server: ValidationServer
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": f"no such endpoint: {self.path}"})
+            return
+        self._send_json(200, {
+            "status": "ok",
+            "validations_version": VALIDATIONS_VERSION
+        })
+
+    def do_POST(self) -> None:
+        if self.path != "/validate":
+            self._send_json(404, {"error": f"no such endpoint: {self.path}"})
+            return
+
+        request_id = self.server.next_request_id()
+        with logging_context(request_id):
+            try:
+                body = self._read_json()
+                response = self.server.validate(body)
+            except BadRequest as e:
+                logger.warning("Rejected request: %s", e)
+                self._send_json(400, {"request_id": request_id, "error": str(e)})
+                return
+            except Exception as e:
+                logger.exception("Validation failed")
+                self._send_json(500, {
+                    "request_id": request_id,
+                    "error": f"{type(e).__name__}: {e}"
+                })
+                return
+            self._send_json(200, {"request_id": request_id} | response)
+
+    def _read_json(self) -> dict[str, Any]:
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise BadRequest("missing Content-Length")
+        if length > MAX_REQUEST_BYTES:
+            raise BadRequest(f"request body larger than {MAX_REQUEST_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise BadRequest(f"request body is not JSON: {e}")
+        if not isinstance(body, dict):
+            raise BadRequest("request body must be a JSON object")
+        return body
+
+    def _send_json(self, status: int, body: dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info("%s - %s", self.address_string(), format % args)
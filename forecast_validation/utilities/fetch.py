@@ -0,0 +1,169 @@
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Optional, TypeVar, Union
+import concurrent.futures
+import contextvars
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from forecast_validation.utilities import tracing
+
+logger = logging.getLogger("hub-validations")
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# maximum number of downloads in flight at once; overridden by the
+# HUB_VALIDATIONS_MAX_DOWNLOADS environment variable
+DEFAULT_MAX_WORKERS: int = 8
+# (connect, read) timeouts in seconds for each request
+DEFAULT_TIMEOUT: tuple[float, float] = (10.0, 60.0)
+DEFAULT_RETRIES: int = 5
+DEFAULT_BACKOFF_FACTOR: float = 0.5
+RETRY_STATUS_CODES: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+def max_workers_from_environment() -> int:
+    value = os.environ.get("HUB_VALIDATIONS_MAX_DOWNLOADS")
+    if not value:
+        return DEFAULT_MAX_WORKERS
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(
+            "Ignoring invalid HUB_VALIDATIONS_MAX_DOWNLOADS=%r", value
+        )
+        return DEFAULT_MAX_WORKERS
+
+
+class Fetcher:
+    """
+    Downloads files over one pooled keep-alive HTTP session, with retries
+    (exponential backoff on connection errors and 429/5xx responses),
+    per-request timeouts and at most `max_workers` downloads in flight.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: tuple[float, float] = DEFAULT_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers: int = max_workers
+        self.timeout: tuple[float, float] = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=retry
+        )
+        self._session: requests.Session = requests.Session()
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def fetch(
+        self,
+        url: str,
+        to_path: Union[str, os.PathLike]
+    ) -> pathlib.Path:
+        """Downloads `url` to `to_path`, creating parent directories.
+
+        The content is streamed to a temporary file next to `to_path` and
+        moved into place once complete, so a failed download never leaves
+        a partial file behind.
+        """
+        to_path = pathlib.Path(to_path)
+        os.makedirs(to_path.parent, exist_ok=True)
+        with tracing.span("GET " + to_path.name, "network", url=url):
+            self._fetch(url, to_path)
+        return to_path
+
+    def _fetch(self, url: str, to_path: pathlib.Path) -> None:
+        with self._session.get(url, stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            with tempfile.NamedTemporaryFile(
+                dir=to_path.parent, delete=False
+            ) as temporary_file:
+                try:
+                    for chunk in response.iter_content(chunk_size=1 << 16):
+                        temporary_file.write(chunk)
+                except BaseException:
+                    temporary_file.close()
+                    os.unlink(temporary_file.name)
+                    raise
+        os.replace(temporary_file.name, to_path)
+
+    def fetch_all(
+        self,
+        downloads: Iterable[tuple[str, Union[str, os.PathLike]]]
+    ) -> list[pathlib.Path]:
+        """Downloads each (url, path) pair concurrently.
+
+        Returns the local paths in input order. If any download fails, the
+        first failure is raised once all downloads have finished.
+        """
+        return self.map(lambda download: self.fetch(*download), downloads)
+
+    def map(self, function: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Calls `function` on each item with at most `max_workers` calls
+        in flight; used for fetches that go through other clients (e.g.
+        PyGithub). Results are returned in input order.
+        """
+        items = list(items)
+        if len(items) <= 1 or self.max_workers == 1:
+            return [function(item) for item in items]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(items)),
+            thread_name_prefix="fetch"
+        ) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, function, item)
+                for item in items
+            ]
+            concurrent.futures.wait(futures)
+        return [future.result() for future in futures]
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> Fetcher:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_default_fetcher: Optional[Fetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def default_fetcher() -> Fetcher:
+    """The process-wide fetcher, created on first use."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = Fetcher(max_workers_from_environment())
+        return _default_fetcher
+
+
+def get_fetcher(store: dict[str, Any]) -> Fetcher:
+    """The fetcher of a validation run, falling back to the process-wide
+    one when the store does not provide one."""
+    fetcher: Optional[Fetcher] = store.get("fetcher")
+    return fetcher if fetcher is not None else default_fetcher()
@@ -0,0 +1,342 @@
+from __future__ import annotations
+from typing import Any, Iterable, Iterator, Optional, Union
+import dataclasses
+import hashlib
+import io
+import logging
+import os
+import pathlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.hub_config import (
+    FORECAST_TYPES,
+    CompiledHubConfig,
+    ForecastSchema,
+    forecast_schema
+)
+
+logger = logging.getLogger("hub-validations")
+
+FORECAST_KEY_COLUMNS: list[str] = [
+    "forecast_date", "target", "target_end_date", "location", "type",
+    "quantile"
+]
+
+# string-valued columns repeat a handful of distinct values over every row,
+# so they are read as categoricals of str (which also keeps e.g. location
+# "01" from being turned into the integer 1); everything else is left to
+# pandas' inference
+FORECAST_COLUMN_DTYPES: dict[str, Any] = {
+    "forecast_date": "category",
+    "target": "category",
+    "target_end_date": "category",
+    "location": "category",
+    "type": "category",
+}
+
+
+DEFAULT_FORECAST_SCHEMA: ForecastSchema = ForecastSchema()
+
+
+def apply_forecast_schema(
+    frame: pd.DataFrame,
+    schema: ForecastSchema
+) -> pd.DataFrame:
+    """Orders the categories of a frame read with FORECAST_COLUMN_DTYPES
+    after the vocabularies of `schema`, and turns a numeric quantile column
+    into a categorical; modifies and returns `frame`."""
+    for column in FORECAST_COLUMN_DTYPES:
+        if column not in frame.columns:
+            continue
+        vocabulary = schema.vocabularies.get(column, ())
+        frame[column] = frame[column].cat.set_categories(
+            _vocabulary_first(vocabulary, frame[column].cat.categories)
+        )
+    if (
+        "quantile" in frame.columns and
+        pd.api.types.is_float_dtype(frame["quantile"].dtype)
+    ):
+        quantiles = frame["quantile"].to_numpy()
+        frame["quantile"] = pd.Categorical(
+            quantiles,
+            categories=_vocabulary_first(
+                schema.vocabularies.get("quantile", ()),
+                pd.unique(quantiles[~np.isnan(quantiles)])
+            )
+        )
+    return frame
+
+
+def _vocabulary_first(
+    vocabulary: tuple[Any, ...],
+    values: Iterable[Any]
+) -> list[Any]:
+    known = set(vocabulary)
+    return list(vocabulary) + sorted(v for v in values if v not in known)
+
+
+def read_forecast_frame(
+    source: Union[str, os.PathLike, bytes],
+    schema: ForecastSchema = DEFAULT_FORECAST_SCHEMA
+) -> pd.DataFrame:
+    """Parses a forecast CSV into the typed frame shared by all checks.
+
+    Args:
+        source: a path to the forecast CSV, or its raw bytes.
+        schema: the vocabularies of the categorical columns; see
+            `ForecastSchema`.
+
+    Returns:
+        The parsed forecast as a pandas DataFrame.
+    """
+    if isinstance(source, bytes):
+        name, source = "<bytes>", io.BytesIO(source)
+    else:
+        name = os.path.basename(source)
+    with tracing.span("parse " + name, "csv"):
+        return apply_forecast_schema(
+            pd.read_csv(source, dtype=FORECAST_COLUMN_DTYPES), schema
+        )
+
+
+def iter_forecast_chunks(
+    path: Union[str, os.PathLike],
+    chunk_rows: int,
+    columns: Optional[list[str]] = None,
+    schema: ForecastSchema = DEFAULT_FORECAST_SCHEMA
+) -> Iterator[pd.DataFrame]:
+    """Parses a forecast CSV `chunk_rows` rows at a time, typed as by
+    `read_forecast_frame()`.
+
+    Each chunk is indexed by the position of its rows in the file. A file
+    without rows yields one empty chunk that still has the header's columns.
+    `columns`, if given, restricts the chunks to these columns, which must
+    all be in the header.
+    """
+    dtypes = FORECAST_COLUMN_DTYPES if columns is None else {
+        column: dtype for column, dtype in FORECAST_COLUMN_DTYPES.items()
+        if column in columns
+    }
+    name = os.path.basename(path)
+    with pd.read_csv(
+        path, dtype=dtypes, usecols=columns, chunksize=chunk_rows
+    ) as reader:
+        while True:
+            with tracing.span("parse chunk of " + name, "csv"):
+                chunk = next(reader, None)
+                if chunk is not None:
+                    apply_forecast_schema(chunk, schema)
+            if chunk is None:
+                return
+            yield chunk
+
+
+def count_values(values: pd.Series) -> pd.Series:
+    """The number of rows per distinct value of a column, missing values
+    included, in order of first appearance (also for categoricals, whose
+    `value_counts()` is in category order)."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return pd.Series(
+        np.bincount(codes, minlength=len(uniques)),
+        index=pd.Index(np.asarray(uniques, dtype=object))
+    )
+
+
+def read_forecast_header(path: Union[str, os.PathLike]) -> list[str]:
+    return [str(c) for c in pd.read_csv(path, nrows=0).columns]
+
+
+def read_forecast_rows(
+    path: Union[str, os.PathLike],
+    positions: Iterable[int],
+    chunk_rows: int
+) -> pd.DataFrame:
+    """Reads the rows at `positions` (in file order, 0-based) of a forecast
+    CSV without holding more than one chunk of it in memory. The rows are
+    returned in the order of `positions`, indexed by position."""
+    positions = list(positions)
+    if not positions:
+        return pd.DataFrame(columns=read_forecast_header(path))
+    wanted = np.unique(np.asarray(positions, dtype=np.int64))
+    rows: list[pd.DataFrame] = []
+    for chunk in iter_forecast_chunks(path, chunk_rows):
+        if len(chunk) == 0:
+            continue
+        first, last = chunk.index[0], chunk.index[-1]
+        selected = chunk.loc[wanted[(wanted >= first) & (wanted <= last)]]
+        if len(selected):
+            # the chunks' categoricals have different categories, and would
+            # be concatenated into objects; rows keep their values' types
+            rows.append(selected.astype({
+                column: selected[column].cat.categories.dtype
+                for column in selected.columns
+                if isinstance(selected[column].dtype, pd.CategoricalDtype)
+            }))
+        if last >= wanted[-1]:
+            break
+    return pd.concat(rows).loc[positions]
+
+
+def hash_file_content(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+@dataclasses.dataclass
+class _CacheEntry:
+    content_hash: str
+    frame: pd.DataFrame
+    consumers: Optional[int] = None
+
+
+class ForecastFrameCache:
+    """Per-run cache of parsed forecast frames.
+
+    Every forecast file is parsed at most once per validation run, no matter
+    how many validation steps look at it. Frames are keyed by the resolved
+    file path together with a hash of the file content, so a file that is
+    rewritten during the run (e.g. the hub mirror being refreshed) is parsed
+    again rather than served stale.
+
+    Eviction is explicit: a file registered through `retain()` stays cached
+    until `release()` has been called for it as many times as it has
+    consumers. A file that was never registered (e.g. an existing forecast
+    from the hub mirror, only needed by the retraction check) is transient,
+    and is evicted by `release_transient()` at the end of the step that
+    loaded it.
+
+    Frames handed out by the cache are shared between steps and must be
+    treated as read-only. All frames of one cache are expected to be read
+    with the same schema.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[str, _CacheEntry] = {}
+        self._consumers: dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.parse_count: int = 0
+        self.hit_count: int = 0
+
+    @staticmethod
+    def _key(path: Union[str, os.PathLike]) -> str:
+        return str(pathlib.Path(path).resolve())
+
+    def __contains__(self, path: Union[str, os.PathLike]) -> bool:
+        return self._key(path) in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # parsed frames are never shipped to other processes
+        return {}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()
+
+    def get(
+        self,
+        path: Union[str, os.PathLike],
+        schema: ForecastSchema = DEFAULT_FORECAST_SCHEMA
+    ) -> pd.DataFrame:
+        """Returns the parsed frame for the forecast file at `path`.
+
+        Raises whatever pandas raises if the file cannot be parsed; a file
+        that failed to parse is not cached.
+        """
+        key = self._key(path)
+        with open(key, "rb") as forecast_file:
+            content = forecast_file.read()
+        content_hash = hash_file_content(content)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.content_hash == content_hash:
+                self.hit_count += 1
+                return entry.frame
+
+            # identical content under another path (e.g. an unchanged
+            # forecast in both the PR and the hub mirror) shares one frame
+            frame = next((
+                e.frame for e in self._entries.values()
+                if e.content_hash == content_hash
+            ), None)
+            if frame is None:
+                logger.debug("Parsing forecast file %s", key)
+                frame = read_forecast_frame(content, schema)
+                self.parse_count += 1
+            else:
+                self.hit_count += 1
+
+            self._entries[key] = _CacheEntry(
+                content_hash=content_hash,
+                frame=frame,
+                consumers=self._consumers.get(key)
+            )
+            return frame
+
+    def retain(
+        self,
+        paths: Iterable[Union[str, os.PathLike]],
+        consumers: int
+    ) -> None:
+        """Registers the number of steps that will read each file in `paths`.
+        """
+        with self._lock:
+            for path in paths:
+                key = self._key(path)
+                self._consumers[key] = consumers
+                if key in self._entries:
+                    self._entries[key].consumers = consumers
+
+    def release(self, paths: Iterable[Union[str, os.PathLike]]) -> None:
+        """Marks one consumer of each file in `paths` as done.
+
+        A file whose last consumer is done is evicted from the cache.
+        """
+        with self._lock:
+            for path in paths:
+                key = self._key(path)
+                remaining = self._consumers.get(key)
+                if remaining is None:
+                    continue
+                remaining -= 1
+                if remaining > 0:
+                    self._consumers[key] = remaining
+                    if key in self._entries:
+                        self._entries[key].consumers = remaining
+                else:
+                    del self._consumers[key]
+                    self._entries.pop(key, None)
+
+    def release_transient(self) -> None:
+        """Evicts every cached frame that has no registered consumers."""
+        with self._lock:
+            for key in [
+                k for k, e in self._entries.items() if e.consumers is None
+            ]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._consumers.clear()
+
+
+def get_forecast_frame(
+    store: dict[str, Any],
+    path: Union[str, os.PathLike]
+) -> pd.DataFrame:
+    """Returns the parsed forecast at `path`, through the run's frame cache
+    if the store has one, read with the store's FORECAST_SCHEMA.
+    """
+    schema: ForecastSchema = (
+        store.get("FORECAST_SCHEMA") or DEFAULT_FORECAST_SCHEMA
+    )
+    cache: Optional[ForecastFrameCache] = store.get("forecast_frames")
+    if cache is None:
+        return read_forecast_frame(path, schema)
+    return cache.get(path, schema)
@@ -0,0 +1,207 @@
+"""
+A persistent local clone of the hub repository.
+
+The mirror is a bare, blobless partial clone (`--filter=blob:none`): it has
+every commit and tree of the hub's branches but only the file contents that
+have been read, each fetched once on first read. Updating it is an
+incremental `git fetch`, and path lookups, directory listings and blob reads
+are answered from the local object store instead of the GitHub REST API.
+"""
+from __future__ import annotations
+from typing import Optional, Union
+import base64
+import logging
+import os
+import pathlib
+import subprocess
+import threading
+
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.github import HubTreeIndex, TreeEntry
+
+logger = logging.getLogger("hub-validations")
+
+GIT_MIRROR_ENVIRONMENT_VARIABLE: str = "HUB_VALIDATIONS_GIT_MIRROR"
+
+# one lock per mirror directory, so that runs sharing a mirror in one
+# process do not fetch into it at the same time
+_update_locks: dict[str, threading.Lock] = {}
+_update_locks_lock = threading.Lock()
+
+
+def git_mirror_directory_from_environment(
+    cache_directory: Union[str, os.PathLike]
+) -> Optional[pathlib.Path]:
+    """The directory of the hub's git mirror, or None to use the GitHub API.
+
+    HUB_VALIDATIONS_GIT_MIRROR is either a directory for the mirror, or
+    "1"/"true"/"yes" for the default `hub.git` under the cache directory.
+    """
+    value = os.environ.get(GIT_MIRROR_ENVIRONMENT_VARIABLE, "").strip()
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return pathlib.Path(cache_directory)/"hub.git"
+    return pathlib.Path(value)
+
+
+class GitMirrorError(RuntimeError):
+    pass
+
+
+class LocalGitMirror:
+    """
+    A bare partial clone of a remote repository at `directory`.
+
+    `token`, if given, authenticates to GitHub over HTTPS; it is passed to
+    git through the environment rather than on the command line.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        remote_url: str,
+        token: Optional[str] = None
+    ) -> None:
+        self.directory: pathlib.Path = pathlib.Path(directory).resolve()
+        self.remote_url: str = remote_url
+        self._environment: dict[str, str] = dict(os.environ)
+        # a missing blob is fetched from the remote instead of prompting
+        self._environment["GIT_TERMINAL_PROMPT"] = "0"
+        if token is not None:
+            credentials = base64.b64encode(
+                f"x-access-token:{token}".encode("utf-8")
+            ).decode("ascii")
+            self._environment |= {
+                "GIT_CONFIG_COUNT": "1",
+                "GIT_CONFIG_KEY_0": "http.extraheader",
+                "GIT_CONFIG_VALUE_0": f"AUTHORIZATION: basic {credentials}",
+            }
+
+    def _git(self, *args: str, cwd: Optional[pathlib.Path] = None) -> bytes:
+        try:
+            return subprocess.run(
+                ["git", *args],
+                cwd=cwd if cwd is not None else self.directory,
+                env=self._environment,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            ).stdout
+        except subprocess.CalledProcessError as e:
+            raise GitMirrorError(
+                f"git {args[0]} failed in {self.directory}: "
+                f"{e.stderr.decode('utf-8', 'replace').strip()}"
+            ) from e
+        except OSError as e:
+            raise GitMirrorError(f"could not run git: {e}") from e
+
+    def _update_lock(self) -> threading.Lock:
+        with _update_locks_lock:
+            return _update_locks.setdefault(
+                str(self.directory), threading.Lock()
+            )
+
+    def update(self, branch: str = "master") -> str:
+        """Clones the remote if there is no mirror yet, and fetches `branch`
+        into it otherwise.
+
+        Returns:
+            The SHA of the commit at the head of `branch`.
+        """
+        with self._update_lock():
+            if not (self.directory/"HEAD").exists():
+                logger.info(
+                    "Cloning %s into %s", self.remote_url, self.directory
+                )
+                os.makedirs(self.directory.parent, exist_ok=True)
+                with tracing.span("git clone", "git"):
+                    self._git(
+                        "clone", "--bare", "--filter=blob:none", "--quiet",
+                        self.remote_url, str(self.directory),
+                        cwd=self.directory.parent
+                    )
+            else:
+                with tracing.span("git fetch " + branch, "git"):
+                    self._git(
+                        "fetch", "--quiet", "origin",
+                        f"+refs/heads/{branch}:refs/heads/{branch}"
+                    )
+            return self.branch_sha(branch)
+
+    def fetch_pull_requests(self) -> list[int]:
+        """Fetches the head of every pull request of the remote (GitHub's
+        refs/pull/<number>/head) into the mirror.
+
+        Returns:
+            The numbers of the fetched pull requests, in increasing order.
+        """
+        with self._update_lock():
+            with tracing.span("git fetch pull requests", "git"):
+                self._git(
+                    "fetch", "--quiet", "--prune", "origin",
+                    "+refs/pull/*/head:refs/pull/*/head"
+                )
+        refs = self._git(
+            "for-each-ref", "--format=%(refname)", "refs/pull/"
+        ).decode("utf-8").split()
+        return sorted(
+            int(ref.split("/")[2]) for ref in refs if ref.endswith("/head")
+        )
+
+    def changed_files(
+        self,
+        base: str,
+        head: str
+    ) -> list[tuple[str, str, str, str]]:
+        """The files that `head` changes since its merge base with `base`,
+        as GitHub compares pull requests.
+
+        Returns:
+            (status letter, old blob SHA, new blob SHA, path) per file,
+            where the status is "A" (added), "D" (deleted), "M" (modified)
+            or "T" (type changed); the SHA of a missing side is all zeros.
+        """
+        fields = self._git(
+            "diff", "--raw", "-z", "--no-renames", "--no-abbrev",
+            f"{base}...{head}"
+        ).decode("utf-8").split("\0")
+        changes: list[tuple[str, str, str, str]] = []
+        # each change is a ":<modes> <old sha> <new sha> <status>" field
+        # followed by a path field
+        for meta, path in zip(fields[0:-1:2], fields[1::2]):
+            _, _, old_sha, new_sha, status = meta.split()
+            changes.append((status, old_sha, new_sha, path))
+        return changes
+
+    def branch_sha(self, branch: str = "master") -> str:
+        return self._git(
+            "rev-parse", "--verify", f"refs/heads/{branch}^{{commit}}"
+        ).decode("ascii").strip()
+
+    def tree_index(self, commit_sha: str) -> HubTreeIndex:
+        """Indexes every path of the tree of a commit of the mirror.
+
+        Blob sizes are left unknown, since a partial clone would have to
+        fetch every blob to tell them.
+        """
+        with tracing.span("git ls-tree " + commit_sha[:12], "git"):
+            listing = self._git("ls-tree", "-r", "-t", "-z", commit_sha)
+        entries: dict[str, TreeEntry] = {}
+        for line in listing.decode("utf-8").split("\0"):
+            if not line:
+                continue
+            meta, path = line.split("\t", 1)
+            _, object_type, sha = meta.split()
+            entries[path] = TreeEntry(sha, None, object_type)
+        logger.info(
+            "Indexed %d paths of the git mirror at %s", len(entries),
+            commit_sha
+        )
+        return HubTreeIndex(entries, commit_sha, read_blob=self.read_blob)
+
+    def read_blob(self, sha: str) -> bytes:
+        """Returns the content of a blob, fetching it from the remote on
+        first read."""
+        with tracing.span("git cat-file " + sha[:12], "git"):
+            return self._git("cat-file", "blob", sha)
@@ -1,15 +1,147 @@
 import base64
+import dataclasses
+import logging
 import os
 import pathlib
-from typing import Optional, Iterable
+import posixpath
+from typing import Callable, Optional, Iterable
 
-import yaml
 from github.ContentFile import ContentFile
 from github.File import File
 from github.Repository import Repository
 
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.fetch import Fetcher, default_fetcher
 
-def get_existing_models(repository: Repository, path: str) -> set[str]:
+logger = logging.getLogger("hub-validations")
+
+
+@dataclasses.dataclass(frozen=True)
+class TreeEntry:
+    """
+    Data class for one entry of a git tree.
+
+    Fields:
+        sha: the git object SHA of the entry
+        size: the size of the blob in bytes; None for trees, or if unknown
+        type: "blob", "tree" or "commit" (submodules)
+    """
+    sha: str
+    size: Optional[int]
+    type: str
+
+
+class HubTreeIndex:
+    """
+    Every path of a branch of the hub repository, indexed from a single
+    recursive git tree fetch.
+
+    GitHub truncates recursive tree responses for very large trees; when
+    that happens, the truncated tree is walked one level down and each
+    subtree is fetched recursively on its own.
+
+    `read_blob`, if given, returns the content of a blob of the indexed
+    tree by its SHA without going through the GitHub API (see
+    `git_mirror.LocalGitMirror`).
+    """
+
+    def __init__(
+        self,
+        entries: dict[str, TreeEntry],
+        commit_sha: str,
+        read_blob: Optional[Callable[[str], bytes]] = None
+    ) -> None:
+        self.commit_sha: str = commit_sha
+        self.read_blob: Optional[Callable[[str], bytes]] = read_blob
+        self._entries: dict[str, TreeEntry] = entries
+        self._children: dict[str, list[str]] = {}
+        for path in entries:
+            parent, name = posixpath.split(path)
+            self._children.setdefault(parent, []).append(name)
+
+    @classmethod
+    def from_repository(
+        cls,
+        repository: Repository,
+        branch: str = "master",
+        commit_sha: Optional[str] = None
+    ) -> "HubTreeIndex":
+        """Indexes the tree of `branch`, or of `commit_sha` if given."""
+        if commit_sha is None:
+            commit_sha = get_branch_sha(repository, branch)
+        entries: dict[str, TreeEntry] = {}
+        _add_tree_entries(repository, commit_sha, "", entries)
+        logger.info(
+            "Indexed %d paths of %s at %s", len(entries), branch, commit_sha
+        )
+        return cls(entries, commit_sha)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> Optional[TreeEntry]:
+        return self._entries.get(path)
+
+    def blob_sha(self, path: str) -> Optional[str]:
+        """Returns the blob SHA of a file; None if there is no such file."""
+        entry = self._entries.get(path)
+        return entry.sha if entry is not None and entry.type == "blob" else None
+
+    def children(self, directory: str, type: Optional[str] = None) -> list[str]:
+        """Names of the direct children of a directory, optionally only
+        those of the given entry type."""
+        directory = directory.strip("/")
+        names = self._children.get(directory, [])
+        if type is None:
+            return list(names)
+        return [
+            name for name in names
+            if self._entries[posixpath.join(directory, name)].type == type
+        ]
+
+
+def _add_tree_entries(
+    repository: Repository,
+    tree_sha: str,
+    prefix: str,
+    entries: dict[str, TreeEntry]
+) -> None:
+    with tracing.span("get_git_tree " + (prefix or "/"), "network"):
+        tree = repository.get_git_tree(tree_sha, recursive=True)
+    if not tree.raw_data.get("truncated", False):
+        for element in tree.tree:
+            entries[posixpath.join(prefix, element.path)] = TreeEntry(
+                element.sha, element.size, element.type
+            )
+        return
+
+    logger.info(
+        "Recursive tree of %s is truncated; fetching its subtrees",
+        prefix or "/"
+    )
+    with tracing.span("get_git_tree " + (prefix or "/"), "network"):
+        elements = repository.get_git_tree(tree_sha).tree
+    for element in elements:
+        path = posixpath.join(prefix, element.path)
+        entries[path] = TreeEntry(element.sha, element.size, element.type)
+        if element.type == "tree":
+            _add_tree_entries(repository, element.sha, path, entries)
+
+
+def get_branch_sha(repository: Repository, branch: str = "master") -> str:
+    """Returns the SHA of the commit at the head of a branch."""
+    with tracing.span("get_git_ref heads/" + branch, "network"):
+        return repository.get_git_ref(f"heads/{branch}").object.sha
+
+
+def get_existing_models(
+    repository: Repository,
+    path: str,
+    tree_index: Optional[HubTreeIndex] = None
+) -> set[str]:
     """
     Get all currently existing model names in repository.
 
@@ -18,11 +150,16 @@ def get_existing_models(repository: Repository, path: str) -> set[str]:
           to query
         path: A string representing the subfolder in which the models are
           stored. eg: "data-processed" and "data-forecasts"
+        tree_index: If given, the models are looked up in this index instead
+          of through the GitHub contents API
 
     Returns:
         A set of model names.
     """
-    raw_result = repository.get_contents(path)
+    if tree_index is not None:
+        return set(tree_index.children(path, type="tree"))
+    with tracing.span("get_contents " + path, "network"):
+        raw_result = repository.get_contents(path)
     directory_items: list[ContentFile] = (raw_result if isinstance(raw_result, Iterable) else [raw_result])
     models: set[str] = set()
     for item in directory_items:
@@ -42,6 +179,7 @@ def get_metadata_for_model(repo: Repository, model_abbr: str, directory: str) ->
         The metadata file's content as a python dictionary; if not available,
         return None
     """
+    import yaml
     meta: ContentFile = repo.get_contents(f"{directory}/{model_abbr}/metadata-{model_abbr}.txt")
     try:
         return yaml.safe_load(meta.decoded_content)
@@ -49,7 +187,12 @@ def get_metadata_for_model(repo: Repository, model_abbr: str, directory: str) ->
         return None
 
 
-def get_existing_forecast_file(repository: Repository, file: File, local_directory: pathlib.Path, ) -> os.PathLike:
+def get_existing_forecast_file(
+    repository: Repository,
+    file: File,
+    local_directory: pathlib.Path,
+    tree_index: Optional[HubTreeIndex] = None
+) -> Optional[os.PathLike]:
     """
     Retrieve the forecast from master branch of repo.
 
@@ -58,19 +201,84 @@ def get_existing_forecast_file(repository: Repository, file: File, local_directo
     
     If not present, return None.
     """
+    # https://github.com/PyGithub/PyGithub/issues/661
+    if tree_index is not None:
+        content = get_file_content(file.filename, tree_index)
+    else:
+        with tracing.span(
+            "get_git_blob " + os.path.basename(file.filename), "network"
+        ):
+            blob = get_blob_content(repository, "master", file.filename)
+        content = None if blob is None else base64.b64decode(blob.content)
+    if content is None:
+        return None
+
     local_path: pathlib.Path = (local_directory / pathlib.Path(file.filename)).resolve()
     os.makedirs(local_path.parent, exist_ok=True)
-
-    # https://github.com/PyGithub/PyGithub/issues/661
-    blob = get_blob_content(repository, "master", file.filename)
     with open(local_path, "wb") as output_file:
-        output_file.write(base64.b64decode(blob.content))
+        output_file.write(content)
 
     return local_path
 
 
-def get_blob_content(repository: Repository, branch: str, path_name: str):
-    ref = repository.get_git_ref(f'heads/{branch}')
-    tree = repository.get_git_tree(ref.object.sha, recursive='/' in path_name).tree
+def get_existing_files(
+    repository: Repository,
+    files: Iterable[File],
+    local_directory: pathlib.Path,
+    tree_index: Optional[HubTreeIndex] = None,
+    fetcher: Optional[Fetcher] = None
+) -> list[Optional[os.PathLike]]:
+    """
+    Retrieves the master branch copies of several PR files concurrently; see
+    `get_existing_forecast_file()`. Returns the local paths in input order.
+    """
+    fetcher = fetcher if fetcher is not None else default_fetcher()
+    return fetcher.map(
+        lambda file: get_existing_forecast_file(
+            repository, file, local_directory, tree_index
+        ),
+        files
+    )
+
+
+def get_blob_sha(
+    repository: Repository,
+    branch: str,
+    path_name: str,
+    tree_index: Optional[HubTreeIndex] = None
+) -> Optional[str]:
+    """
+    Returns the git blob SHA of a file on a branch; None if the file does
+    not exist there. `tree_index`, if given, must be an index of `branch`.
+    """
+    if tree_index is not None:
+        return tree_index.blob_sha(path_name)
+    with tracing.span("get_git_tree " + branch, "network"):
+        ref = repository.get_git_ref(f'heads/{branch}')
+        tree = repository.get_git_tree(ref.object.sha, recursive='/' in path_name).tree
     sha = [x.sha for x in tree if x.path == path_name]
-    return None if not sha else repository.get_git_blob(sha[0])
+    return None if not sha else sha[0]
+
+
+def get_file_content(
+    path_name: str,
+    tree_index: HubTreeIndex
+) -> Optional[bytes]:
+    """
+    Returns the content of a file of the indexed branch; None if the file
+    does not exist there. The content is read through the index's
+    `read_blob`, which the indexes of a `HubBackend` always have.
+    """
+    if tree_index.read_blob is None:
+        raise ValueError(
+            "tree index cannot read blobs; index the hub through a HubBackend"
+        )
+    sha = tree_index.blob_sha(path_name)
+    if sha is None:
+        return None
+    return tree_index.read_blob(sha)
+
+
+def get_blob_content(repository: Repository, branch: str, path_name: str):
+    sha = get_blob_sha(repository, branch, path_name)
+    return None if sha is None else repository.get_git_blob(sha)
@@ -0,0 +1,228 @@
+"""
+Persistent cache of GitHub API responses, revalidated with conditional
+requests.
+
+`enable_http_cache()` mounts an `ETagCacheAdapter` under the HTTP session of
+a PyGithub client. A cached GET response is served from disk without any
+request while it is younger than its endpoint's TTL; after that, the request
+is sent with `If-None-Match`/`If-Modified-Since`, and a 304 answer (which
+GitHub does not count against the rate limit) is served from disk too.
+Immutable endpoints (git trees and blobs addressed by SHA) never expire;
+most others are revalidated on every request. The requests that are sent go
+through the client's `RateLimitScheduler`, if any.
+"""
+from __future__ import annotations
+from typing import Any, Optional, Union
+import base64
+import collections
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from forecast_validation.utilities.rate_limit import (
+    RateLimitScheduler,
+    ScheduledAdapter,
+    mount_connection_adapter,
+    record_api_usage
+)
+from forecast_validation.utilities.result_cache import JsonFileCache
+
+logger = logging.getLogger("hub-validations")
+
+# bump whenever the layout of cached responses changes
+HTTP_CACHE_FORMAT_VERSION: int = 1
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+# larger responses (e.g. the blobs of big forecasts) are not cached
+MAX_CACHED_BODY_BYTES: int = 1024 * 1024
+# seconds for which a cached response is served without revalidation, by
+# the first pattern that matches the URL path; 0 for all other endpoints
+DEFAULT_TTLS: tuple[tuple[str, float], ...] = (
+    (r"/git/(trees|blobs)/[0-9a-f]{40}$", math.inf),
+    (r"/repos/[^/]+/[^/]+/labels$", 600.0),
+    (r"/repos/[^/]+/[^/]+/contents/", 60.0),
+)
+# added to responses served from the cache: "fresh" (no request was sent)
+# or "revalidated" (GitHub answered 304)
+CACHE_STATUS_HEADER: str = "X-Hub-Validations-Cache"
+# headers of a 304 answer that do not describe the cached body
+_BODY_HEADERS: frozenset[str] = frozenset([
+    "content-length", "content-encoding", "transfer-encoding"
+])
+
+
+def http_cache_enabled_from_environment() -> bool:
+    return os.environ.get("HUB_VALIDATIONS_HTTP_CACHE", "").strip().lower() not in (
+        "0", "false", "no"
+    )
+
+
+class HTTPCache(JsonFileCache):
+    """
+    On-disk store of GET responses, keyed by URL, `Accept` header and
+    (hashed) credentials, with a TTL per endpoint (see DEFAULT_TTLS).
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: tuple[tuple[str, float], ...] = DEFAULT_TTLS
+    ) -> None:
+        super().__init__(directory, max_bytes)
+        self._ttls: list[tuple[re.Pattern, float]] = [
+            (re.compile(pattern), ttl) for pattern, ttl in ttls
+        ]
+        self._counts_lock = threading.Lock()
+        # GET requests answered from the cache without a request ("fresh"),
+        # from the cache after a 304 ("revalidated"), and by GitHub
+        # ("fetched")
+        self.counts: collections.Counter = collections.Counter()
+
+    def ttl(self, url: str) -> float:
+        path = requests.utils.urlparse(url).path
+        for pattern, ttl in self._ttls:
+            if pattern.search(path):
+                return ttl
+        return 0.0
+
+    def count(self, outcome: str) -> None:
+        with self._counts_lock:
+            self.counts[outcome] += 1
+
+
+def http_cache_key(request: requests.PreparedRequest) -> str:
+    return hashlib.sha256("\n".join([
+        str(HTTP_CACHE_FORMAT_VERSION),
+        request.url,
+        request.headers.get("Accept", ""),
+        # responses depend on who asks; never store the credentials
+        hashlib.sha256(
+            request.headers.get("Authorization", "").encode("utf-8")
+        ).hexdigest()
+    ]).encode("utf-8")).hexdigest()
+
+
+class ETagCacheAdapter(ScheduledAdapter):
+    """An HTTPAdapter that answers GET requests from an `HTTPCache`, and
+    stores the responses that carry an ETag or a Last-Modified date."""
+
+    def __init__(
+        self,
+        cache: HTTPCache,
+        scheduler: Optional[RateLimitScheduler] = None,
+        **kwargs: Any
+    ) -> None:
+        super().__init__(scheduler, **kwargs)
+        self.cache: HTTPCache = cache
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        **kwargs: Any
+    ) -> requests.Response:
+        if request.method != "GET":
+            return super().send(request, **kwargs)
+
+        key = http_cache_key(request)
+        entry: Optional[dict[str, Any]] = self.cache.get_json(key, _parse_entry)
+        if entry is not None:
+            headers: CaseInsensitiveDict = entry["headers"]
+            if time.time() - entry["stored_at"] < self.cache.ttl(request.url):
+                self.cache.count("fresh")
+                record_api_usage(cached=1)
+                return _cached_response(request, entry, "fresh")
+            if "ETag" in headers:
+                request.headers["If-None-Match"] = headers["ETag"]
+            if "Last-Modified" in headers:
+                request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.cache.count("revalidated")
+            # the 304's headers (e.g. the rate limit) are the current ones
+            entry["headers"].update(_entry_headers(response.headers))
+            entry["stored_at"] = time.time()
+            self.cache.put_json(key, _entry_json(entry))
+            response.close()
+            return _cached_response(request, entry, "revalidated")
+
+        self.cache.count("fetched")
+        if (
+            response.status_code == 200 and
+            ("ETag" in response.headers or "Last-Modified" in response.headers)
+            and not kwargs.get("stream")
+            and len(response.content) <= MAX_CACHED_BODY_BYTES
+        ):
+            self.cache.put_json(key, _entry_json({
+                "status": response.status_code,
+                "headers": _entry_headers(response.headers),
+                "body": response.content,
+                "stored_at": time.time(),
+            }))
+        return response
+
+
+def _entry_headers(headers: CaseInsensitiveDict) -> CaseInsensitiveDict:
+    return CaseInsensitiveDict({
+        name: value for name, value in headers.items()
+        if name.lower() not in _BODY_HEADERS
+    })
+
+
+def _entry_json(entry: dict[str, Any]) -> dict[str, Any]:
+    return entry | {
+        "headers": dict(entry["headers"].items()),
+        "body": base64.b64encode(entry["body"]).decode("ascii"),
+    }
+
+
+def _parse_entry(data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "status": int(data["status"]),
+        "headers": CaseInsensitiveDict(data["headers"]),
+        "body": base64.b64decode(data["body"]),
+        "stored_at": float(data["stored_at"]),
+    }
+
+
+def _cached_response(
+    request: requests.PreparedRequest,
+    entry: dict[str, Any],
+    cache_status: str
+) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry["status"]
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(entry["headers"])
+    response.headers[CACHE_STATUS_HEADER] = cache_status
+    response._content = entry["body"]
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers
+    ) or "utf-8"
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def enable_http_cache(
+    github: Any,
+    cache: HTTPCache,
+    scheduler: Optional[RateLimitScheduler] = None
+) -> bool:
+    """Makes a PyGithub `Github` client send its API requests through
+    `cache`, and those that are sent through `scheduler`, if given. Returns
+    False, leaving the client as is, if its requester does not have the
+    expected connection hook; see `mount_connection_adapter()`.
+    """
+    return mount_connection_adapter(
+        github,
+        lambda **kwargs: ETagCacheAdapter(cache, scheduler, **kwargs),
+        "GitHub API responses are not cached"
+    )
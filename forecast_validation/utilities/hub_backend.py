@@ -0,0 +1,522 @@
+"""
+Access to the hub repository and its pull requests behind one interface.
+
+The validation steps read the hub through a `HubBackend`: pull request
+listing and files, the hub tree and its blobs, the repository's labels, and
+the labels and comments that a run leaves on a pull request. There are
+three backends:
+
+- `GitHubBackend` talks to the GitHub REST API through PyGithub, optionally
+  answering tree and blob reads from a `LocalGitMirror`;
+- `LocalGitBackend` reads everything from a `LocalGitMirror` of the hub
+  whose pull requests are GitHub's refs/pull/<number>/head refs, and keeps
+  labels and comments in memory;
+- `InMemoryHubBackend` is a fake hub held in dictionaries, with a
+  configurable latency injected into every call, so that the pipeline can
+  be run and benchmarked offline and deterministically.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterable, Optional, Union
+import abc
+import base64
+import collections
+import dataclasses
+import hashlib
+import logging
+import os
+import pathlib
+import posixpath
+import threading
+import time
+
+from github.Repository import Repository
+
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.fetch import Fetcher
+from forecast_validation.utilities.git_mirror import (
+    GitMirrorError,
+    LocalGitMirror
+)
+from forecast_validation.utilities.github import (
+    HubTreeIndex,
+    TreeEntry,
+    get_branch_sha
+)
+
+logger = logging.getLogger("hub-validations")
+
+# the labels that the validation steps apply
+DEFAULT_LABEL_NAMES: tuple[str, ...] = (
+    "automerge",
+    "code",
+    "data-submission",
+    "dependencies",
+    "duplicate-forecast",
+    "file-deletion",
+    "forecast-implicit-retractions",
+    "forecast-retraction",
+    "forecast-updated",
+    "metadata-change",
+    "new-team-submission",
+    "other-files-updated",
+    "passed-validation",
+)
+
+# git's status letters in `git diff --raw`, as GitHub names them for the
+# files of a pull request
+_FILE_STATUSES: dict[str, str] = {
+    "A": "added",
+    "D": "removed",
+    "M": "modified",
+    "T": "modified",
+}
+_NULL_SHA: str = "0" * 40
+
+
+@dataclasses.dataclass(frozen=True)
+class HubLabel:
+    """
+    Stands in for the PyGithub Label of a repository in offline backends.
+
+    Fields:
+        name: the name of the label
+    """
+    name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class HubFile:
+    """
+    Stands in for the PyGithub File of a pull request in offline backends;
+    only the attributes that the validation steps use are provided.
+
+    Fields:
+        filename: path of the file in the hub repository
+        status: "added", "modified" or "removed"
+        sha: the git blob SHA of the file at the head of the pull request
+            (of the removed file, for "removed")
+        raw_url: always None; the content is read through the backend
+    """
+    filename: str
+    status: str
+    sha: str
+    raw_url: Optional[str] = None
+
+
+class HubPullRequest:
+    """
+    Stands in for the PyGithub PullRequest in offline backends: files are
+    listed, and labels and comments applied, through the backend.
+    """
+
+    def __init__(self, backend: HubBackend, number: int) -> None:
+        self.backend: HubBackend = backend
+        self.number: int = number
+
+    def get_files(self) -> list[HubFile]:
+        return self.backend.pull_request_files(self.number)
+
+    def set_labels(self, *labels: Any) -> None:
+        self.backend.set_labels(self.number, labels)
+
+    def create_issue_comment(self, body: str) -> None:
+        self.backend.create_comment(self.number, body)
+
+    def __repr__(self) -> str:
+        return f"HubPullRequest({self.number})"
+
+
+class HubBackend(abc.ABC):
+    """
+    The hub repository and its pull requests, as the validation steps use
+    them.
+    """
+
+    @abc.abstractmethod
+    def list_pull_requests(self) -> list[int]:
+        """The numbers of the open pull requests, in increasing order."""
+
+    def get_pull_request(self, number: int) -> Any:
+        """A pull request with `number`, `get_files()`, `set_labels()` and
+        `create_issue_comment()` like PyGithub's PullRequest."""
+        return HubPullRequest(self, number)
+
+    @abc.abstractmethod
+    def pull_request_files(self, number: int) -> list[Any]:
+        """The files that a pull request changes, with `filename`, `status`
+        and `sha` like PyGithub's File."""
+
+    @abc.abstractmethod
+    def set_labels(self, number: int, labels: Iterable[Any]) -> None:
+        """Replaces the labels of a pull request."""
+
+    @abc.abstractmethod
+    def create_comment(self, number: int, body: str) -> None:
+        """Comments on a pull request."""
+
+    @abc.abstractmethod
+    def get_labels(self) -> list[Any]:
+        """The labels of the repository, each with a `name`."""
+
+    @abc.abstractmethod
+    def get_branch_sha(self, branch: str = "master") -> str:
+        """The SHA of the commit at the head of a branch."""
+
+    @abc.abstractmethod
+    def get_tree_index(
+        self,
+        branch: str = "master",
+        commit_sha: Optional[str] = None
+    ) -> HubTreeIndex:
+        """Indexes the tree of `branch`, or of `commit_sha` if given."""
+
+    @abc.abstractmethod
+    def read_blob(self, sha: str) -> bytes:
+        """The content of a blob of the hub or of a pull request."""
+
+    def download_pull_request_files(
+        self,
+        files: Iterable[Any],
+        directory: pathlib.Path,
+        fetcher: Fetcher
+    ) -> list[pathlib.Path]:
+        """Writes the content of pull request files under `directory`, at
+        their path in the repository. Returns the local paths in input
+        order."""
+        def download(file: Any) -> pathlib.Path:
+            local_path = (directory/pathlib.Path(file.filename)).resolve()
+            os.makedirs(local_path.parent, exist_ok=True)
+            with open(local_path, "wb") as local_file:
+                local_file.write(self.read_blob(file.sha))
+            return local_path
+
+        return fetcher.map(download, files)
+
+
+class GitHubBackend(HubBackend):
+    """
+    The hub on GitHub, read through a PyGithub Repository.
+
+    With a `mirror`, the tree index and its blobs are read from the local
+    git mirror, and from the API only if git fails.
+
+    The files, labels and comments of a pull request are read and written
+    through the PullRequest last returned by `get_pull_request()`, which a
+    run fetches once, rather than through one fetched for each call.
+    """
+
+    def __init__(
+        self,
+        repository: Repository,
+        mirror: Optional[LocalGitMirror] = None
+    ) -> None:
+        self.repository: Repository = repository
+        self.mirror: Optional[LocalGitMirror] = mirror
+        self._pull_requests: dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def list_pull_requests(self) -> list[int]:
+        with tracing.span("get_pulls", "network"):
+            return sorted(
+                pull_request.number
+                for pull_request in self.repository.get_pulls(state="open")
+            )
+
+    def get_pull_request(self, number: int) -> Any:
+        with tracing.span(f"get_pull {number}", "network"):
+            pull_request = self.repository.get_pull(number)
+        with self._lock:
+            self._pull_requests[number] = pull_request
+        return pull_request
+
+    def _pull_request(self, number: int) -> Any:
+        with self._lock:
+            pull_request = self._pull_requests.get(number)
+        if pull_request is None:
+            pull_request = self.get_pull_request(number)
+        return pull_request
+
+    def pull_request_files(self, number: int) -> list[Any]:
+        return list(self._pull_request(number).get_files())
+
+    def set_labels(self, number: int, labels: Iterable[Any]) -> None:
+        self._pull_request(number).set_labels(*labels)
+
+    def create_comment(self, number: int, body: str) -> None:
+        self._pull_request(number).create_issue_comment(body)
+
+    def get_labels(self) -> list[Any]:
+        with tracing.span("get_labels", "network"):
+            return list(self.repository.get_labels())
+
+    def get_branch_sha(self, branch: str = "master") -> str:
+        return get_branch_sha(self.repository, branch)
+
+    def get_tree_index(
+        self,
+        branch: str = "master",
+        commit_sha: Optional[str] = None
+    ) -> HubTreeIndex:
+        if self.mirror is not None:
+            try:
+                head_sha = self.mirror.update(branch)
+                return self.mirror.tree_index(
+                    commit_sha if commit_sha is not None else head_sha
+                )
+            except GitMirrorError as e:
+                logger.warning(
+                    "Could not use the git mirror at %s, indexing through "
+                    "the GitHub API instead: %s", self.mirror.directory, e
+                )
+        index = HubTreeIndex.from_repository(
+            self.repository, branch, commit_sha
+        )
+        # the index's blobs are read through the backend, as the mirror's are
+        index.read_blob = self.read_blob
+        return index
+
+    def read_blob(self, sha: str) -> bytes:
+        with tracing.span("get_git_blob " + sha[:12], "network"):
+            return base64.b64decode(self.repository.get_git_blob(sha).content)
+
+    def download_pull_request_files(
+        self,
+        files: Iterable[Any],
+        directory: pathlib.Path,
+        fetcher: Fetcher
+    ) -> list[pathlib.Path]:
+        return fetcher.fetch_all(
+            (file.raw_url, (directory/pathlib.Path(file.filename)).resolve())
+            for file in files
+        )
+
+
+class _OfflineHubBackend(HubBackend):
+    """A backend that keeps the labels and comments of pull requests in
+    memory instead of posting them anywhere."""
+
+    def __init__(self, label_names: Iterable[str]) -> None:
+        self._labels: dict[str, HubLabel] = {
+            name: HubLabel(name) for name in label_names
+        }
+        self._lock = threading.Lock()
+        # the labels and comments left on each pull request
+        self.applied_labels: dict[int, set[str]] = {}
+        self.comments: dict[int, list[str]] = collections.defaultdict(list)
+
+    def get_labels(self) -> list[Any]:
+        return list(self._labels.values())
+
+    def set_labels(self, number: int, labels: Iterable[Any]) -> None:
+        names = {getattr(label, "name", label) for label in labels}
+        logger.info("Labels of PR %d: %s", number, ", ".join(sorted(names)))
+        with self._lock:
+            self.applied_labels[number] = names
+
+    def create_comment(self, number: int, body: str) -> None:
+        logger.info("Comment on PR %d:\n%s", number, body)
+        with self._lock:
+            self.comments[number].append(body)
+
+
+class LocalGitBackend(_OfflineHubBackend):
+    """
+    The hub read from a `LocalGitMirror`, with the pull requests that were
+    fetched into it as refs/pull/<number>/head.
+
+    The mirror is brought up to date when the head of a branch or the list
+    of pull requests is asked for.
+    """
+
+    def __init__(
+        self,
+        mirror: LocalGitMirror,
+        label_names: Iterable[str] = DEFAULT_LABEL_NAMES
+    ) -> None:
+        super().__init__(label_names)
+        self.mirror: LocalGitMirror = mirror
+
+    def list_pull_requests(self) -> list[int]:
+        return self.mirror.fetch_pull_requests()
+
+    def pull_request_files(self, number: int) -> list[Any]:
+        return [
+            HubFile(
+                filename=path,
+                status=_FILE_STATUSES.get(status, "modified"),
+                sha=old_sha if new_sha == _NULL_SHA else new_sha
+            )
+            for status, old_sha, new_sha, path in self.mirror.changed_files(
+                "refs/heads/master", f"refs/pull/{number}/head"
+            )
+        ]
+
+    def get_branch_sha(self, branch: str = "master") -> str:
+        return self.mirror.update(branch)
+
+    def get_tree_index(
+        self,
+        branch: str = "master",
+        commit_sha: Optional[str] = None
+    ) -> HubTreeIndex:
+        return self.mirror.tree_index(
+            commit_sha if commit_sha is not None
+            else self.get_branch_sha(branch)
+        )
+
+    def read_blob(self, sha: str) -> bytes:
+        return self.mirror.read_blob(sha)
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA git gives to a blob with `content`."""
+    return hashlib.sha1(
+        b"blob %d\0" % len(content) + content
+    ).hexdigest()
+
+
+class InMemoryHubBackend(_OfflineHubBackend):
+    """
+    A fake hub held in memory.
+
+    `files` maps the paths of the master branch to their content, and each
+    pull request maps the paths it changes to their new content (None for a
+    removed file). Every call sleeps for `latency` seconds, or for
+    `latency[method name]` if `latency` is a dict, to stand in for the
+    round trip to GitHub; `calls` counts the calls per method.
+    """
+
+    def __init__(
+        self,
+        files: dict[str, bytes],
+        pull_requests: Optional[dict[int, dict[str, Optional[bytes]]]] = None,
+        label_names: Iterable[str] = DEFAULT_LABEL_NAMES,
+        latency: Union[float, dict[str, float]] = 0.0,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        super().__init__(label_names)
+        self.latency: Union[float, dict[str, float]] = latency
+        self._sleep: Callable[[float], None] = sleep
+        self.calls: collections.Counter = collections.Counter()
+        self._blobs: dict[str, bytes] = {}
+        self._commits: dict[str, dict[str, str]] = {}
+        self._master_sha: str = self._commit(files)
+        self._pull_requests: dict[int, dict[str, Optional[str]]] = {}
+        for number, changes in (pull_requests or {}).items():
+            self.add_pull_request(number, changes)
+
+    def _call(self, method: str) -> None:
+        with self._lock:
+            self.calls[method] += 1
+        latency = (
+            self.latency.get(method, 0.0) if isinstance(self.latency, dict)
+            else self.latency
+        )
+        if latency > 0:
+            self._sleep(latency)
+
+    def _add_blob(self, content: bytes) -> str:
+        sha = git_blob_sha(content)
+        self._blobs[sha] = content
+        return sha
+
+    def _commit(self, files: dict[str, bytes]) -> str:
+        tree = {path: self._add_blob(content) for path, content in files.items()}
+        commit_sha = hashlib.sha1(repr(sorted(tree.items())).encode(
+            "utf-8"
+        )).hexdigest()
+        self._commits[commit_sha] = tree
+        return commit_sha
+
+    def commit(self, files: dict[str, Optional[bytes]]) -> str:
+        """Moves master to a new commit that updates (or, for None, removes)
+        the given paths. Returns the SHA of the new commit."""
+        with self._lock:
+            tree = {
+                path: self._blobs[sha]
+                for path, sha in self._commits[self._master_sha].items()
+            }
+            for path, content in files.items():
+                if content is None:
+                    tree.pop(path, None)
+                else:
+                    tree[path] = content
+            self._master_sha = self._commit(tree)
+            return self._master_sha
+
+    def add_pull_request(
+        self,
+        number: int,
+        changes: dict[str, Optional[bytes]]
+    ) -> None:
+        with self._lock:
+            self._pull_requests[number] = {
+                path: None if content is None else self._add_blob(content)
+                for path, content in changes.items()
+            }
+
+    def list_pull_requests(self) -> list[int]:
+        self._call("list_pull_requests")
+        return sorted(self._pull_requests)
+
+    def get_pull_request(self, number: int) -> Any:
+        self._call("get_pull_request")
+        if number not in self._pull_requests:
+            raise KeyError(f"no pull request {number}")
+        return HubPullRequest(self, number)
+
+    def pull_request_files(self, number: int) -> list[Any]:
+        self._call("pull_request_files")
+        master = self._commits[self._master_sha]
+        files: list[HubFile] = []
+        for path, sha in sorted(self._pull_requests[number].items()):
+            if sha is None:
+                if path in master:
+                    files.append(HubFile(path, "removed", master[path]))
+            elif path not in master:
+                files.append(HubFile(path, "added", sha))
+            elif master[path] != sha:
+                files.append(HubFile(path, "modified", sha))
+        return files
+
+    def set_labels(self, number: int, labels: Iterable[Any]) -> None:
+        self._call("set_labels")
+        super().set_labels(number, labels)
+
+    def create_comment(self, number: int, body: str) -> None:
+        self._call("create_comment")
+        super().create_comment(number, body)
+
+    def get_labels(self) -> list[Any]:
+        self._call("get_labels")
+        return super().get_labels()
+
+    def get_branch_sha(self, branch: str = "master") -> str:
+        self._call("get_branch_sha")
+        if branch != "master":
+            raise KeyError(f"no branch {branch}")
+        return self._master_sha
+
+    def get_tree_index(
+        self,
+        branch: str = "master",
+        commit_sha: Optional[str] = None
+    ) -> HubTreeIndex:
+        if commit_sha is None:
+            commit_sha = self.get_branch_sha(branch)
+        self._call("get_tree_index")
+        entries: dict[str, TreeEntry] = {}
+        for path, sha in self._commits[commit_sha].items():
+            entries[path] = TreeEntry(sha, len(self._blobs[sha]), "blob")
+            directory = posixpath.dirname(path)
+            while directory and directory not in entries:
+                entries[directory] = TreeEntry(
+                    hashlib.sha1(directory.encode("utf-8")).hexdigest(),
+                    None, "tree"
+                )
+                directory = posixpath.dirname(directory)
+        return HubTreeIndex(entries, commit_sha, read_blob=self.read_blob)
+
+    def read_blob(self, sha: str) -> bytes:
+        self._call("read_blob")
+        return self._blobs[sha]
@@ -0,0 +1,254 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, Optional, Union
+import dataclasses
+import functools
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import pickle
+import re
+import tempfile
+
+from forecast_validation import PullRequestFileType
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger("hub-validations")
+
+# bump whenever the layout of CompiledHubConfig changes, so that compiled
+# configs cached by an older version are not loaded
+COMPILED_CONFIG_FORMAT_VERSION: int = 2
+
+# the values of the type column of a forecast
+FORECAST_TYPES: tuple[str, ...] = ("point", "quantile")
+
+
+def build_filename_patterns(
+    forecast_folder_name: str
+) -> dict[PullRequestFileType, re.Pattern]:
+    """Filename regex patterns used to determine the type of PR files.
+
+    Key names indicate the type of files whose filenames the corresponding
+    regex (value) matches on. The dictionary is ordered: a file is of the
+    type of the first pattern it matches.
+    """
+    return {
+        PullRequestFileType.FORECAST:
+            re.compile(r"^%s/(.+)/\d\d\d\d-\d\d-\d\d-\1\.csv$" % forecast_folder_name),
+        PullRequestFileType.METADATA:
+            re.compile(r"^%s/(.+)/metadata-\1\.txt$" % forecast_folder_name),
+        PullRequestFileType.LICENSE:
+            re.compile(r"^%s/(.+)/LICENSE|license\.*\.txt$" % forecast_folder_name),
+        PullRequestFileType.MODEL_OTHER_FS:
+            re.compile(r"^%s/(.+)/.*(?<!(csv|txt))$" % forecast_folder_name),
+        PullRequestFileType.OTHER_FS:
+            re.compile(r"^%s/(.+)\.(csv|txt)$" % forecast_folder_name),
+    }
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledHubConfig:
+    """
+    A hub config with its `target_groups` compiled into lookup tables.
+
+    Fields:
+        config: the hub config as loaded from JSON
+        content_hash: SHA-256 of the config file content
+        target_to_group: maps each valid target to the id (index) of its
+            target group
+        location_index: maps each location of any target group to a dense
+            integer code
+        quantile_slots: maps each quantile of any target group to a dense
+            integer slot; slots are in increasing quantile order
+        forecast_dates: the allowed forecast dates; empty if any date is
+            allowed
+        filename_patterns: see `build_filename_patterns()`
+
+    The numpy tables `group_location_table` and `group_quantile_table` are
+    built on first use, so that loading a config does not import numpy.
+    """
+    config: dict[str, Any]
+    content_hash: str
+    target_to_group: dict[str, int]
+    location_index: dict[str, int]
+    quantile_slots: dict[float, int]
+    forecast_dates: frozenset[str]
+    filename_patterns: dict[PullRequestFileType, re.Pattern]
+
+    @property
+    def targets(self) -> list[str]:
+        return list(self.target_to_group)
+
+    @property
+    def locations(self) -> list[str]:
+        return list(self.location_index)
+
+    @property
+    def quantiles(self) -> list[float]:
+        return list(self.quantile_slots)
+
+    @functools.cached_property
+    def group_location_table(self) -> np.ndarray:
+        """Boolean array of shape (number of groups, number of locations);
+        [g, l] is True if location code l is valid for group g."""
+        import numpy as np
+        target_groups: list[dict[str, Any]] = self.config["target_groups"]
+        table = np.zeros(
+            (len(target_groups), len(self.location_index)), dtype=bool
+        )
+        for group_id, group in enumerate(target_groups):
+            table[group_id, [
+                self.location_index[str(l)] for l in group["locations"]
+            ]] = True
+        return table
+
+    @functools.cached_property
+    def group_quantile_table(self) -> np.ndarray:
+        """Boolean array of shape (number of groups, number of quantiles);
+        [g, q] is True if quantile slot q is valid for group g."""
+        import numpy as np
+        target_groups: list[dict[str, Any]] = self.config["target_groups"]
+        table = np.zeros(
+            (len(target_groups), len(self.quantile_slots)), dtype=bool
+        )
+        for group_id, group in enumerate(target_groups):
+            table[group_id, [
+                self.quantile_slots[float(q)] for q in group["quantiles"]
+            ]] = True
+        return table
+
+    def group_locations(self, group_id: int) -> frozenset[str]:
+        locations = self.locations
+        return frozenset(
+            locations[code] for code in
+            self.group_location_table[group_id].nonzero()[0]
+        )
+
+
+def compile_hub_config(
+    config: dict[str, Any],
+    content_hash: Optional[str] = None
+) -> CompiledHubConfig:
+    if content_hash is None:
+        content_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    target_groups: list[dict[str, Any]] = config["target_groups"]
+    target_to_group: dict[str, int] = {}
+    location_index: dict[str, int] = {}
+    for group_id, group in enumerate(target_groups):
+        for target in group["targets"]:
+            target_to_group.setdefault(target, group_id)
+        for location in group["locations"]:
+            location_index.setdefault(str(location), len(location_index))
+    quantile_slots: dict[float, int] = {
+        quantile: slot for slot, quantile in enumerate(sorted({
+            float(q) for group in target_groups for q in group["quantiles"]
+        }))
+    }
+
+    return CompiledHubConfig(
+        config=config,
+        content_hash=content_hash,
+        target_to_group=target_to_group,
+        location_index=location_index,
+        quantile_slots=quantile_slots,
+        forecast_dates=frozenset(config.get("forecast_dates", [])),
+        filename_patterns=build_filename_patterns(
+            config["forecast_folder_name"]
+        )
+    )
+
+
+@dataclasses.dataclass(frozen=True)
+class ForecastSchema:
+    """
+    The canonical types of a parsed forecast frame, beyond the
+    FORECAST_COLUMN_DTYPES of `forecast_validation.utilities.forecast_frames`.
+
+    Every categorical column (and the quantile column, if it is numeric)
+    gets its vocabulary as its first categories, in order, followed by the
+    values of the file that are not in it. The category code of a valid
+    value is therefore the same in every frame read with the schema, e.g.
+    a target's code is its position in the compiled config's targets and a
+    quantile's code is its slot, while invalid values keep their text for
+    the error messages.
+
+    Fields:
+        vocabularies: the vocabulary of each column that has one
+    """
+    vocabularies: dict[str, tuple[Any, ...]] = dataclasses.field(
+        default_factory=dict
+    )
+
+
+def forecast_schema(config: CompiledHubConfig) -> ForecastSchema:
+    return ForecastSchema(vocabularies={
+        "target": tuple(config.targets),
+        "location": tuple(config.locations),
+        "type": FORECAST_TYPES,
+        "quantile": tuple(config.quantiles),
+    })
+
+
+def as_compiled_hub_config(
+    config: Union[dict[str, Any], CompiledHubConfig]
+) -> CompiledHubConfig:
+    if isinstance(config, CompiledHubConfig):
+        return config
+    return compile_hub_config(config)
+
+
+def load_compiled_hub_config(
+    config_path: Union[str, os.PathLike],
+    cache_directory: Optional[Union[str, os.PathLike]] = None
+) -> CompiledHubConfig:
+    """Loads a hub config file and compiles it.
+
+    If `cache_directory` is given, the compiled config is cached there in a
+    file named after the hash of the config file content, so that a later
+    load of an unchanged config skips JSON parsing and compilation.
+    """
+    with open(config_path, "rb") as config_file:
+        content = config_file.read()
+    content_hash = hashlib.sha256(content).hexdigest()
+
+    cache_path: Optional[pathlib.Path] = None
+    if cache_directory is not None:
+        cache_path = pathlib.Path(cache_directory)/(
+            f"hub-config-v{COMPILED_CONFIG_FORMAT_VERSION}-{content_hash}.pickle"
+        )
+        if cache_path.exists():
+            try:
+                with open(cache_path, "rb") as cache_file:
+                    compiled: CompiledHubConfig = pickle.load(cache_file)
+                logger.info("Loaded compiled hub config from %s", cache_path)
+                return compiled
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning(
+                    "Ignoring unreadable compiled hub config %s: %s",
+                    cache_path, e
+                )
+
+    compiled = compile_hub_config(json.loads(content), content_hash)
+
+    if cache_path is not None:
+        try:
+            os.makedirs(cache_path.parent, exist_ok=True)
+            # write to a temporary file first so that a concurrent reader
+            # never sees a partially written cache file
+            with tempfile.NamedTemporaryFile(
+                dir=cache_path.parent, delete=False
+            ) as temporary_file:
+                pickle.dump(compiled, temporary_file)
+            os.replace(temporary_file.name, cache_path)
+        except OSError as e:
+            logger.warning(
+                "Could not cache compiled hub config to %s: %s", cache_path, e
+            )
+
+    return compiled
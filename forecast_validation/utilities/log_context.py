@@ -0,0 +1,46 @@
+"""
+Per-task context for the "hub-validations" log.
+
+Long-running modes (the validation server, the queue worker) handle several
+requests or pull requests at once. Setting `log_context` to a name while
+handling one prefixes every record logged in that context with the name;
+validation step threads inherit it, see `ValidationRun`.
+"""
+from __future__ import annotations
+from typing import Iterator, Optional
+import contextlib
+import contextvars
+import logging
+
+log_context: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "log_context", default=None
+)
+
+
+class LogContextFilter(logging.Filter):
+    """Prefixes log records with the current `log_context`, if any."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        name = log_context.get()
+        if name is not None:
+            record.msg = f"[{name}] {record.msg}"
+        return True
+
+
+_filter: LogContextFilter = LogContextFilter()
+
+
+def enable_log_context() -> None:
+    """Installs the `LogContextFilter` on the "hub-validations" logger;
+    calling it again has no effect."""
+    logging.getLogger("hub-validations").addFilter(_filter)
+
+
+@contextlib.contextmanager
+def logging_context(name: str) -> Iterator[None]:
+    """Sets `log_context` to `name` for the duration of the block."""
+    token = log_context.set(name)
+    try:
+        yield
+    finally:
+        log_context.reset(token)
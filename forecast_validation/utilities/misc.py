@@ -1,11 +1,11 @@
 from typing import Union
 import os
 import pathlib
-import urllib.request
 
-def fetch_url(url: str, to_path: Union[str, os.PathLike]) -> str:
-    urllib.request.urlretrieve(url, to_path)
-    return pathlib.Path(to_path)
+from forecast_validation.utilities.fetch import default_fetcher
+
+def fetch_url(url: str, to_path: Union[str, os.PathLike]) -> pathlib.Path:
+    return default_fetcher().fetch(url, to_path)
 
 def extract_model_name(filepath: Union[str, os.PathLike]) -> str:
     return "-".join(pathlib.Path(filepath).stem.split("-")[-2:])
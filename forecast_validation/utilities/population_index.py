@@ -0,0 +1,85 @@
+from __future__ import annotations
+from typing import Union
+import functools
+import logging
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("hub-validations")
+
+
+class PopulationIndex:
+    """Population by location code, as two parallel arrays.
+
+    `locations` is a sorted array of location codes and `populations` holds
+    the population of the location at the same position, so that lookups
+    are a binary search rather than a join.
+    """
+
+    def __init__(
+        self,
+        locations: np.ndarray,
+        populations: np.ndarray
+    ) -> None:
+        order = np.argsort(locations, kind="stable")
+        self.locations: np.ndarray = np.asarray(locations, dtype=str)[order]
+        self.populations: np.ndarray = np.asarray(
+            populations, dtype=np.float64
+        )[order]
+
+    @classmethod
+    def from_csv(cls, path: Union[str, os.PathLike]) -> PopulationIndex:
+        dataframe = pd.read_csv(
+            path, usecols=["location", "population"],
+            dtype={"location": str, "population": np.float64}
+        )
+        dataframe = dataframe.drop_duplicates("location", keep="first")
+        return cls(
+            dataframe["location"].to_numpy(dtype=str),
+            dataframe["population"].to_numpy()
+        )
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def lookup(self, locations: Union[pd.Series, np.ndarray]) -> np.ndarray:
+        """Returns the population of each of `locations`.
+
+        Each distinct location is looked up once. Unknown (or missing)
+        locations get NaN, which compares False against any value.
+        """
+        codes, uniques = pd.factorize(
+            pd.Series(locations, copy=False), use_na_sentinel=True
+        )
+        uniques = np.asarray(uniques, dtype=str)
+        if len(self.locations) == 0 or len(uniques) == 0:
+            return np.full(len(codes), np.nan)
+        positions = np.searchsorted(self.locations, uniques).clip(
+            max=len(self.locations) - 1
+        )
+        found = self.locations[positions] == uniques
+        unique_populations = np.where(
+            found, self.populations[positions], np.nan
+        )
+        # code -1 (missing location) picks the trailing NaN
+        return np.append(unique_populations, np.nan)[codes]
+
+
+@functools.lru_cache(maxsize=None)
+def _load_population_index(path: str) -> PopulationIndex:
+    logger.info("Loading populations from %s", path)
+    return PopulationIndex.from_csv(path)
+
+
+def load_population_index(path: Union[str, os.PathLike]) -> PopulationIndex:
+    """Loads the population index of a locations CSV once per process."""
+    return _load_population_index(str(pathlib.Path(path).resolve()))
+
+
+def clear_population_index_cache() -> None:
+    """Forgets the loaded population indexes, e.g. after the locations file
+    changed in a long-running process."""
+    _load_population_index.cache_clear()
@@ -0,0 +1,389 @@
+"""
+Scheduling of GitHub API requests under the token's rate limit.
+
+A `RateLimitScheduler` is shared by every request of a PyGithub client (see
+`enable_rate_limit_scheduler()`), and so by all the validation runs of a
+worker. It tracks the `X-RateLimit-*` headers of the responses and
+
+* holds requests back while the primary rate limit is exhausted (until it
+  resets) or after a secondary rate limit response (for its `Retry-After`, or
+  an exponential backoff), and then sends the rejected request again instead
+  of failing the run;
+* counts the requests in flight against the remaining budget, and caps how
+  many are in flight at once;
+* sends writes (comments, labels, merges) only once no read is waiting, and
+  keeps the last `reserve` requests of the budget for reads.
+
+The requests of the current validation run are recorded in the `APIUsage`
+that `api_usage` holds, if any; see `ValidationRun.run()`.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Optional
+import collections
+import contextvars
+import dataclasses
+import logging
+import math
+import os
+import threading
+import time
+
+import requests
+import requests.adapters
+
+logger = logging.getLogger("hub-validations")
+
+# request priorities: reads of hub data go first, writes are deferred
+DATA: int = 0
+WRITE: int = 1
+
+DEFAULT_MAX_IN_FLIGHT: int = 8
+# requests of the budget that writes leave to reads
+DEFAULT_RESERVE: int = 100
+# longer waits are not worth it: the request is sent, and fails
+DEFAULT_MAX_WAIT: float = 900.0
+# first wait after a secondary rate limit response without Retry-After
+DEFAULT_BACKOFF: float = 60.0
+DEFAULT_MAX_ATTEMPTS: int = 3
+
+
+def rate_limit_scheduler_enabled_from_environment() -> bool:
+    return os.environ.get(
+        "HUB_VALIDATIONS_RATE_LIMIT", ""
+    ).strip().lower() not in ("0", "false", "no")
+
+
+@dataclasses.dataclass
+class APIUsage:
+    """
+    The GitHub API requests of a validation run.
+
+    Fields:
+        requests: requests sent to GitHub, retries included
+        revalidated: sent requests answered with 304 Not Modified, which do
+            not count against the rate limit
+        cached: requests answered by the HTTP cache without being sent
+        waited: seconds spent waiting for the rate limit
+        remaining: the rate limit left after the last response, if known
+    """
+    requests: int = 0
+    revalidated: int = 0
+    cached: int = 0
+    waited: float = 0.0
+    remaining: Optional[int] = None
+    _lock: threading.Lock = dataclasses.field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def budget_used(self) -> int:
+        return self.requests - self.revalidated
+
+    def record(
+        self,
+        requests: int = 0,
+        revalidated: int = 0,
+        cached: int = 0,
+        waited: float = 0.0,
+        remaining: Optional[int] = None
+    ) -> None:
+        with self._lock:
+            self.requests += requests
+            self.revalidated += revalidated
+            self.cached += cached
+            self.waited += waited
+            if remaining is not None:
+                self.remaining = remaining
+
+    def summary(self) -> str:
+        return (
+            f"{self.budget_used} of rate limit used by {self.requests} "
+            f"requests ({self.revalidated} not modified, {self.cached} more "
+            f"answered from the cache), {self.waited:.1f}s waited, "
+            f"{'unknown' if self.remaining is None else self.remaining} left"
+        )
+
+
+api_usage: contextvars.ContextVar[Optional[APIUsage]] = contextvars.ContextVar(
+    "api_usage", default=None
+)
+
+
+def record_api_usage(**kwargs: Any) -> None:
+    """Adds to the current `api_usage`, if any; see `APIUsage.record()`."""
+    usage = api_usage.get()
+    if usage is not None:
+        usage.record(**kwargs)
+
+
+def request_priority(request: requests.PreparedRequest) -> int:
+    return DATA if request.method in ("GET", "HEAD") else WRITE
+
+
+def _int_header(headers: Any, name: str) -> Optional[int]:
+    try:
+        return int(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class RateLimitScheduler:
+    """
+    Admits GitHub API requests according to the rate limit reported by the
+    earlier responses; thread-safe.
+
+    Callers `acquire()` a slot before sending a request and `release()` it
+    with the response.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        reserve: int = DEFAULT_RESERVE,
+        max_wait: float = DEFAULT_MAX_WAIT,
+        backoff: float = DEFAULT_BACKOFF,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        self.max_in_flight: int = max_in_flight
+        self.reserve: int = reserve
+        self.max_wait: float = max_wait
+        self.backoff: float = backoff
+        self.max_attempts: int = max_attempts
+        self._clock: Callable[[], float] = clock
+        self._sleep: Callable[[float], None] = sleep
+        self._condition = threading.Condition()
+        self._in_flight: int = 0
+        self._waiting: collections.Counter = collections.Counter()
+        self._backoffs: int = 0
+        # the primary rate limit, as of the last response; reset_at is an
+        # epoch time, as in X-RateLimit-Reset
+        self.remaining: Optional[int] = None
+        self.limit: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        # no request is sent before this time
+        self.paused_until: float = -math.inf
+
+    @property
+    def waiting(self) -> int:
+        with self._condition:
+            return sum(self._waiting.values())
+
+    def acquire(self, priority: int = DATA) -> float:
+        """Blocks until a request of `priority` may be sent; returns the
+        seconds waited."""
+        waited = 0.0
+        with self._condition:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                with self._condition:
+                    delay = self._delay(priority)
+                    if delay == 0.0:
+                        self._in_flight += 1
+                        return waited
+                    if delay is None:
+                        start = self._clock()
+                        self._condition.wait()
+                        waited += self._clock() - start
+                        continue
+                self._sleep(delay)
+                waited += delay
+        finally:
+            with self._condition:
+                self._waiting[priority] -= 1
+                self._condition.notify_all()
+
+    def _delay(self, priority: int) -> Optional[float]:
+        """0 if a request of `priority` may be sent now, the seconds to wait
+        otherwise, or None to wait for another request to be released."""
+        if priority == WRITE and self._waiting[DATA]:
+            return None
+        now = self._clock()
+        until = self.paused_until
+        if self.remaining is not None and (
+            self.reset_at is None or now < self.reset_at
+        ):
+            # requests in flight will use up some of the remaining budget
+            budget = self.remaining - self._in_flight
+            if budget <= (self.reserve if priority == WRITE else 0):
+                if self._in_flight:
+                    return None
+                if self.reset_at is not None:
+                    until = max(until, self.reset_at)
+        if until > now:
+            if until - now <= self.max_wait:
+                return until - now
+            logger.warning(
+                "GitHub API rate limit holds requests for %.0fs, longer than "
+                "%.0fs; sending the request anyway", until - now, self.max_wait
+            )
+        if self._in_flight >= self.max_in_flight:
+            return None
+        return 0.0
+
+    def release(
+        self,
+        response: Optional[requests.Response] = None
+    ) -> Optional[float]:
+        """Frees the slot of a request and takes in its `response`, if any.
+
+        Returns:
+            the seconds after which the request should be sent again, if
+            GitHub rejected it because of a rate limit, and None otherwise.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            try:
+                if response is None:
+                    return None
+                return self._update(response)
+            finally:
+                self._condition.notify_all()
+
+    def _update(self, response: requests.Response) -> Optional[float]:
+        headers = response.headers
+        now = self._clock()
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        reset_at = _int_header(headers, "X-RateLimit-Reset")
+        # search and GraphQL requests have rate limits of their own
+        if remaining is not None and headers.get(
+            "X-RateLimit-Resource", "core"
+        ) == "core":
+            if (
+                reset_at is not None and reset_at == self.reset_at and
+                self.remaining is not None
+            ):
+                # responses to concurrent requests can arrive out of order
+                remaining = min(remaining, self.remaining)
+            self.remaining = remaining
+            self.limit = _int_header(headers, "X-RateLimit-Limit")
+            self.reset_at = reset_at
+
+        if response.status_code not in (403, 429):
+            self._backoffs = 0
+            return None
+        retry_after = _int_header(headers, "Retry-After")
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif remaining == 0 and reset_at is not None:
+            delay = max(reset_at - now, 0.0)
+        elif response.status_code == 429 or (
+            b"secondary rate limit" in response.content.lower()
+        ):
+            delay = self.backoff * 2 ** self._backoffs
+            self._backoffs += 1
+        else:
+            # e.g. missing permissions
+            return None
+        self.paused_until = max(self.paused_until, now + delay)
+        logger.warning(
+            "GitHub API rate limit reached; holding requests for %.0fs", delay
+        )
+        return delay
+
+
+class ScheduledAdapter(requests.adapters.HTTPAdapter):
+    """An HTTPAdapter that sends its requests through a
+    `RateLimitScheduler`, if given, and records them in the current
+    `api_usage`."""
+
+    def __init__(
+        self,
+        scheduler: Optional[RateLimitScheduler] = None,
+        **kwargs: Any
+    ) -> None:
+        super().__init__(**kwargs)
+        self.scheduler: Optional[RateLimitScheduler] = scheduler
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        **kwargs: Any
+    ) -> requests.Response:
+        if self.scheduler is None:
+            return self._send(request, 0.0, **kwargs)
+
+        priority = request_priority(request)
+        attempt = 1
+        while True:
+            waited = self.scheduler.acquire(priority)
+            response: Optional[requests.Response] = None
+            try:
+                response = self._send(request, waited, **kwargs)
+            finally:
+                retry_in = self.scheduler.release(response)
+            if (
+                retry_in is None or attempt >= self.scheduler.max_attempts or
+                retry_in > self.scheduler.max_wait
+            ):
+                return response
+            response.close()
+            attempt += 1
+
+    def _send(
+        self,
+        request: requests.PreparedRequest,
+        waited: float,
+        **kwargs: Any
+    ) -> requests.Response:
+        response = super().send(request, **kwargs)
+        record_api_usage(
+            requests=1,
+            revalidated=int(response.status_code == 304),
+            waited=waited,
+            remaining=_int_header(response.headers, "X-RateLimit-Remaining")
+        )
+        return response
+
+
+def mount_connection_adapter(
+    github: Any,
+    make_adapter: Callable[..., requests.adapters.HTTPAdapter],
+    consequence: str
+) -> bool:
+    """Makes a PyGithub `Github` client send its API requests through the
+    adapters that `make_adapter(**http_adapter_kwargs)` returns. Returns
+    False, logging `consequence`, if the client's requester does not have
+    the expected connection hook.
+
+    Objects that PyGithub gives a new requester (e.g. through
+    `get_repo(..., lazy=True)`) do not use the adapter.
+    """
+    requester = getattr(github, "requester", None)
+    # PyGithub creates its connections from this per-client attribute
+    connection_class = getattr(requester, "_Requester__connectionClass", None)
+    if connection_class is None:
+        logger.warning(
+            "This PyGithub version cannot be given a connection class; %s",
+            consequence
+        )
+        return False
+
+    class AdaptedConnection(connection_class):
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            super().__init__(*args, **kwargs)
+            self.adapter = make_adapter(
+                max_retries=self.retry,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.pool_size
+            )
+            self.session.mount(f"{self.protocol}://", self.adapter)
+
+    requester._Requester__connectionClass = AdaptedConnection
+    return True
+
+
+def enable_rate_limit_scheduler(
+    github: Any,
+    scheduler: RateLimitScheduler
+) -> bool:
+    """Makes a PyGithub `Github` client send its API requests through
+    `scheduler`; see `mount_connection_adapter()`. Use `enable_http_cache()`
+    instead to also cache the responses."""
+    return mount_connection_adapter(
+        github,
+        lambda **kwargs: ScheduledAdapter(scheduler, **kwargs),
+        "GitHub API requests are not scheduled"
+    )
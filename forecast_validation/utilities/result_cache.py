@@ -0,0 +1,201 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional, TypeVar, Union
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+
+logger = logging.getLogger("hub-validations")
+
+T = TypeVar("T")
+
+# bump whenever the layout of cached entries changes
+RESULT_CACHE_FORMAT_VERSION: int = 1
+# overridden by the HUB_VALIDATIONS_RESULT_CACHE_MAX_MB environment variable
+DEFAULT_MAX_BYTES: int = 256 * 1024 * 1024
+
+# stands for the path of the validated file in cached comments and errors,
+# so that an entry can be replayed for the same content at another path
+FILE_PLACEHOLDER: str = "\x00file\x00"
+
+
+@dataclasses.dataclass(frozen=True)
+class CachedFileResult:
+    """
+    Data class for the outcome of one per-file step on one file.
+
+    Fields:
+        success: whether the step passed for the file
+        comments: the step's comments, with the file path replaced by
+            FILE_PLACEHOLDER
+        errors: the step's errors for the file, likewise
+        labels: the names of the labels the step applied
+    """
+    success: bool
+    comments: list[str]
+    errors: list[str]
+    labels: list[str]
+
+    def to_json(self) -> dict[str, Any]:
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> CachedFileResult:
+        return cls(
+            success=bool(data["success"]),
+            comments=list(data["comments"]),
+            errors=list(data["errors"]),
+            labels=list(data["labels"])
+        )
+
+
+def result_cache_key(
+    step_name: str,
+    file_content_hash: str,
+    config_hash: str,
+    validations_version: Union[str, int]
+) -> str:
+    return hashlib.sha256("\n".join([
+        str(RESULT_CACHE_FORMAT_VERSION), step_name, file_content_hash,
+        config_hash, str(validations_version)
+    ]).encode("utf-8")).hexdigest()
+
+
+def max_bytes_from_environment() -> int:
+    value = os.environ.get("HUB_VALIDATIONS_RESULT_CACHE_MAX_MB")
+    if not value:
+        return DEFAULT_MAX_BYTES
+    try:
+        return max(0, int(float(value) * 1024 * 1024))
+    except ValueError:
+        logger.warning(
+            "Ignoring invalid HUB_VALIDATIONS_RESULT_CACHE_MAX_MB=%r", value
+        )
+        return DEFAULT_MAX_BYTES
+
+
+class JsonFileCache:
+    """
+    Persistent cache of small JSON documents, one file per key at
+    `<directory>/<key[:2]>/<key>.json`. The directory holds nothing else, so
+    CI can save and restore it as is.
+
+    The cache is bounded to `max_bytes`: entries are touched on every hit,
+    and the least recently used ones are deleted once the total size goes
+    over the bound.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, os.PathLike],
+        max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        self.directory: pathlib.Path = pathlib.Path(directory)
+        self.max_bytes: int = max_bytes
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory/key[:2]/f"{key}.json"
+
+    def _entry_paths(self) -> list[pathlib.Path]:
+        if not self.directory.exists():
+            return []
+        return list(self.directory.glob("??/*.json"))
+
+    def get_json(
+        self,
+        key: str,
+        parse: Callable[[Any], T] = lambda data: data
+    ) -> Optional[T]:
+        """The entry for `key` as returned by `parse()` from its JSON
+        document; None if there is no such entry, or if it cannot be read
+        or parsed."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as entry_file:
+                data = parse(json.load(entry_file))
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.miss_count += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            with self._lock:
+                self.miss_count += 1
+            return None
+        with self._lock:
+            self.hit_count += 1
+        return data
+
+    def put_json(self, key: str, data: dict[str, Any]) -> None:
+        path = self._path(key)
+        content = json.dumps(data).encode("utf-8")
+        try:
+            os.makedirs(path.parent, exist_ok=True)
+            # write to a temporary file first so that a concurrent reader
+            # never sees a partially written entry
+            with tempfile.NamedTemporaryFile(
+                dir=path.parent, suffix=".tmp", delete=False
+            ) as temporary_file:
+                temporary_file.write(content)
+            os.replace(temporary_file.name, path)
+        except OSError as e:
+            logger.warning("Could not write cache entry %s: %s", path, e)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(p.stat().st_size for p in self._entry_paths())
+            else:
+                self._size += len(content)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Deletes least recently used entries until the cache is at most
+        three quarters full; must be called with the lock held."""
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * 3 // 4
+        removed = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            removed += 1
+        self._size = size
+        logger.info("Evicted %d cache entries from %s", removed, self.directory)
+
+
+class ResultCache(JsonFileCache):
+    """
+    Persistent, content-addressed cache of per-file validation outcomes.
+
+    The key of an entry hashes the step name, the file content hash, the
+    config hash and the validations version (see `result_cache_key()`).
+    """
+
+    def get(self, key: str) -> Optional[CachedFileResult]:
+        return self.get_json(key, CachedFileResult.from_json)
+
+    def put(self, key: str, result: CachedFileResult) -> None:
+        self.put_json(key, result.to_json())
@@ -0,0 +1,125 @@
+"""
+Span tracing in the Chrome trace-event format.
+
+Tracing is off unless `enable_tracing()` is called (main.py does so for
+--trace or HUB_VALIDATIONS_TRACE). While it is off, `span()` costs one
+global lookup. The written JSON opens in chrome://tracing and
+https://ui.perfetto.dev.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterator, Optional, TypeVar, Union
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger("hub-validations")
+
+TRACE_ENVIRONMENT_VARIABLE: str = "HUB_VALIDATIONS_TRACE"
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Tracer:
+    """Collects complete ("X") trace events from any thread."""
+
+    def __init__(self) -> None:
+        self._events: list[dict[str, Any]] = []
+        self._named_threads: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    def _thread_metadata(self, pid: int, tid: int) -> None:
+        # must be called with the lock held
+        if (pid, tid) in self._named_threads:
+            return
+        self._named_threads.add((pid, tid))
+        self._events.append({
+            "name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+            "args": {"name": threading.current_thread().name}
+        })
+
+    @contextlib.contextmanager
+    def span(
+        self,
+        name: str,
+        category: str = "",
+        **args: Any
+    ) -> Iterator[None]:
+        # timestamps are wall-clock microseconds so that spans recorded in
+        # worker processes line up with the parent's
+        start_us = time.time_ns() // 1000
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration_us = (time.perf_counter_ns() - start) // 1000
+            pid, tid = os.getpid(), threading.get_native_id()
+            event = {
+                "name": name, "cat": category, "ph": "X",
+                "ts": start_us, "dur": duration_us, "pid": pid, "tid": tid,
+            }
+            if args:
+                event["args"] = {k: str(v) for k, v in args.items()}
+            with self._lock:
+                self._thread_metadata(pid, tid)
+                self._events.append(event)
+
+    def extend(self, events: list[dict[str, Any]]) -> None:
+        """Adds events recorded by another tracer, e.g. in a worker."""
+        with self._lock:
+            self._events.extend(events)
+
+    def events(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._events)
+
+    def write(self, path: Union[str, os.PathLike]) -> None:
+        with open(path, "w") as trace_file:
+            json.dump({
+                "traceEvents": self.events(),
+                "displayTimeUnit": "ms"
+            }, trace_file)
+        logger.info("Wrote trace to %s", path)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enable_tracing() -> Tracer:
+    """Starts collecting spans in a new tracer and returns it."""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing() -> None:
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(name: str, category: str = "", **args: Any):
+    """A span in the active tracer; a no-op if tracing is off."""
+    tracer = _tracer
+    if tracer is None:
+        return contextlib.nullcontext()
+    return tracer.span(name, category, **args)
+
+
+def traced(category: str, name: Optional[str] = None) -> Callable[[F], F]:
+    """Decorator that records a span for every call of a function."""
+    def decorate(function: F) -> F:
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,11 +1,17 @@
 from __future__ import annotations
-from typing import Any, Iterable, Optional, Callable
+from typing import TYPE_CHECKING, Any, Iterable, Optional, Callable, Union
 from github.File import File
 from github.Label import Label
+import concurrent.futures
+import contextlib
+import contextvars
 import dataclasses
+import importlib
 import inspect
 import logging
 import os
+import pickle
+import threading
 
 from github.PullRequest import PullRequest
 
@@ -13,9 +19,35 @@ from forecast_validation import (
     PullRequestFileType,
     VALIDATIONS_VERSION
 )
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.rate_limit import APIUsage, api_usage
+from forecast_validation.utilities.result_cache import (
+    FILE_PLACEHOLDER,
+    CachedFileResult,
+    ResultCache,
+    result_cache_key
+)
+
+if TYPE_CHECKING:
+    # imports pandas, which runs without forecast files never need
+    from forecast_validation.utilities.forecast_frames import (
+        ForecastFrameCache
+    )
 
 logger = logging.getLogger("hub-validations")
 
+# number of worker processes used for parallel per-file steps when a
+# ValidationRun is not given one explicitly; 1 runs everything in-process
+WORKERS_ENVIRONMENT_VARIABLE: str = "HUB_VALIDATIONS_WORKERS"
+# number of threads on which independent steps run concurrently when a
+# ValidationRun is not given one explicitly
+STEP_THREADS_ENVIRONMENT_VARIABLE: str = "HUB_VALIDATIONS_STEP_THREADS"
+DEFAULT_STEP_THREADS: int = 4
+
+# dependency name for the forecast file paths collected through
+# ValidationStepResult.forecast_files; read by every per-file step
+FORECAST_FILES_KEY: str = "forecast_files"
+
 @dataclasses.dataclass(frozen=True)
 class ValidationStepResult:
     """
@@ -47,17 +79,212 @@ class ValidationStepResult:
     comments: Optional[list[str]] = None
     file_errors: Optional[dict[os.PathLike, list[str]]] = None
 
+
+class _LazyValue:
+    """The memoized value of a store provider; computed at most once, even
+    when several steps ask for it at the same time."""
+
+    def __init__(
+        self,
+        key: str,
+        provider: Callable[[dict[str, Any]], Any]
+    ) -> None:
+        self._key: str = key
+        self._provider: Callable[[dict[str, Any]], Any] = provider
+        self._lock = threading.Lock()
+        self._computed: bool = False
+        self._value: Any = None
+
+    def get(self, store: ValidationStore) -> Any:
+        with self._lock:
+            if not self._computed:
+                with tracing.span("provide " + self._key, "store"):
+                    self._value = self._provider(store)
+                self._computed = True
+            return self._value
+
+
+class ValidationStore(dict):
+    """
+    The store of a validation run: a dict whose keys may also be filled on
+    demand.
+
+    A provider registered with `register_provider()` computes the value of
+    its key from the store the first time a step reads the key; the value is
+    then memoized for the rest of the run, so expensive lookups (GitHub API
+    calls, downloads) only happen in runs that need them. A key with a
+    provider is `in` the store whether or not it has been computed, and
+    assigning a value to the key overrides the provider.
+
+    `snapshot()` copies share the providers, and so their memoized values,
+    with the store they were taken from.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._providers: dict[str, _LazyValue] = {}
+
+    def register_provider(
+        self,
+        key: str,
+        provider: Callable[[dict[str, Any]], Any]
+    ) -> None:
+        if not isinstance(provider, Callable):
+            raise TypeError("provider must be a Callable (i.e., function)")
+        self._providers[key] = _LazyValue(key, provider)
+
+    def is_computed(self, key: str) -> bool:
+        return dict.__contains__(self, key)
+
+    def __missing__(self, key: str) -> Any:
+        lazy_value: Optional[_LazyValue] = self._providers.get(key)
+        if lazy_value is None:
+            raise KeyError(key)
+        value = lazy_value.get(self)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._providers
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def resolve(self, keys: Iterable[str]) -> None:
+        """Computes the values of those of `keys` that have a provider."""
+        for key in keys:
+            if key in self._providers:
+                self[key]
+
+    def snapshot(self) -> ValidationStore:
+        copy = ValidationStore(self)
+        copy._providers = self._providers
+        return copy
+
+
+def step_provider(
+    logic: Callable[[dict[str, Any]], ValidationStepResult],
+    key: Optional[str] = None
+) -> Callable[[dict[str, Any]], Any]:
+    """Turns the logic of a validation step into a store provider.
+
+    The provider runs `logic` and returns the value it puts into the store
+    under `key`; without a key, the provider is only run for its side
+    effects (e.g. downloading files) and provides None.
+    """
+    def provide(store: dict[str, Any]) -> Any:
+        result: ValidationStepResult = logic(store=store)
+        if not result.success:
+            raise RuntimeError(f"{_logic_name(logic)} failed")
+        if key is None:
+            return None
+        return (result.to_store or {})[key]
+
+    return provide
+
+
+class LazyLogic:
+    """
+    The logic of a validation step, imported from its module the first time
+    the step runs.
+
+    A run that skips the step (e.g. the forecast checks, for a pull request
+    that changes no forecasts) never imports the module or its
+    dependencies. Since the engine inspects the parameters of the logic
+    before running it, they must be given as `parameters`.
+    """
+
+    def __init__(
+        self,
+        module: str,
+        name: str,
+        parameters: Iterable[str] = ("store",)
+    ) -> None:
+        # named like the function, so that result cache keys and trace
+        # spans are the same as with the function itself
+        self.__module__: str = module
+        self.__name__: str = name
+        self.__qualname__: str = name
+        self.parameters: tuple[str, ...] = tuple(parameters)
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        return inspect.Signature([
+            inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY)
+            for name in self.parameters
+        ])
+
+    @property
+    def logic(self) -> Callable:
+        return getattr(importlib.import_module(self.__module__), self.__name__)
+
+    def __call__(self, **kwargs: Any) -> ValidationStepResult:
+        return self.logic(**kwargs)
+
+
 class ValidationStep:
     @staticmethod
     def check_logic(logic: Optional[Callable]) -> None:
         if logic is not None and not isinstance(logic, Callable):
             raise TypeError("logic must be a Callable (i.e., function)")
 
-    def __init__(self, logic: Optional[Callable] = None) -> None:
+    def __init__(
+        self,
+        logic: Optional[Callable] = None,
+        reads: Optional[Iterable[str]] = None,
+        writes: Optional[Iterable[str]] = None
+    ) -> None:
+        """
+        Args:
+            logic: the function that implements the step
+            reads: the store keys whose values the logic uses; store entries
+                that are set before the run starts need not be declared,
+                but declared entries with a provider are computed before
+                the logic runs (see `ValidationStore`)
+            writes: the store keys that the logic's result may set
+        
+        A step that declares neither `reads` nor `writes` is a barrier: it
+        runs after all steps before it and before all steps after it. See
+        `ValidationRun`.
+        """
         ValidationStep.check_logic(logic)
         self._executed: bool = False
         self._result: Optional[ValidationStepResult] = None
         self._logic: Optional[Callable] = logic
+        self._reads: Optional[frozenset[str]] = (
+            None if reads is None and writes is None
+            else frozenset(reads or ())
+        )
+        self._writes: Optional[frozenset[str]] = (
+            None if reads is None and writes is None
+            else frozenset(writes or ())
+        )
+
+    @property
+    def declares_dependencies(self) -> bool:
+        return self._reads is not None
+
+    @property
+    def reads(self) -> Optional[frozenset[str]]:
+        return self._reads
+
+    @property
+    def writes(self) -> Optional[frozenset[str]]:
+        return self._writes
+
+    def depends_on(self, earlier: ValidationStep) -> bool:
+        """Whether this step must run after `earlier`, a step that comes
+        before it in a run."""
+        if not (self.declares_dependencies and earlier.declares_dependencies):
+            return True
+        return bool(
+            earlier.writes & (self.reads | self.writes) or
+            self.writes & earlier.reads
+        )
+
+    def _reset(self) -> None:
+        self._executed = False
+        self._result = None
 
     @property
     def executed(self) -> bool:
@@ -99,11 +326,11 @@ class ValidationStep:
                 "store" in set(inspect.signature(self._logic).parameters)
             )
 
-            if needs_store:
-                result = self._logic(store=store)
-            else:
-                result = self._logic()
-
+            with tracing.span(_logic_name(self._logic), "step"):
+                if needs_store:
+                    result = self._logic(store=store)
+                else:
+                    result = self._logic()
 
             self._executed = True
             self._result = result
@@ -114,6 +341,32 @@ class ValidationStep:
             
 
 class ValidationPerFileStep(ValidationStep):
+    """A validation step whose logic runs on a set of forecast files.
+
+    If `parallel` is True, the logic must only depend on the store and the
+    files it is given, so that a run with worker processes can execute it
+    once per file in a process pool; see `ValidationRun`.
+
+    If `cacheable` is True, the logic's outcome for a file must only depend
+    on the file content, the hub config and the validations version. When
+    the store holds a `result_cache`, the outcome for each file is then
+    looked up there and replayed instead of running the logic again.
+    """
+
+    def __init__(
+        self,
+        logic: Optional[Callable] = None,
+        parallel: bool = False,
+        reads: Optional[Iterable[str]] = None,
+        writes: Optional[Iterable[str]] = None,
+        cacheable: bool = False
+    ) -> None:
+        if reads is not None or writes is not None:
+            # every per-file step uses the forecast file paths of the run
+            reads = set(reads or ()) | {FORECAST_FILES_KEY}
+        super().__init__(logic, reads, writes)
+        self.parallel: bool = parallel
+        self.cacheable: bool = cacheable
 
     def check_logic(logic: Callable) -> None:
         ValidationStep.check_logic(logic)
@@ -129,16 +382,34 @@ class ValidationPerFileStep(ValidationStep):
     def execute(
         self,
         store: dict[str, Any],
-        files: set[os.PathLike]
+        files: set[os.PathLike],
+        executor: Optional[
+            Union[concurrent.futures.Executor, WorkerPool]
+        ] = None
     ) -> ValidationStepResult:
         if self._logic is None:
             raise RuntimeError("validation step has no logic")
         else:
-            parameters = set(inspect.signature(self._logic).parameters)
-            if "store" in parameters:
-                result = self._logic(store=store, files=files)
-            else:
-                result = self._logic(files=files)
+            with tracing.span(
+                _logic_name(self._logic), "step", files=len(files)
+            ):
+                if self.cacheable and store.get("result_cache") is not None:
+                    result = _execute_with_result_cache(
+                        self._logic, store, files,
+                        executor if self.parallel else None
+                    )
+                elif executor is not None and self.parallel and len(files) > 1:
+                    result = _execute_per_file_in_pool(
+                        self._logic, store, files, executor
+                    )
+                elif self.parallel and tracing.get_tracer() is not None:
+                    # run one file at a time so that each file gets a span
+                    result = merge_step_results(
+                        _call_per_file_logic(self._logic, store, {file})
+                        for file in sorted(files, key=str)
+                    )
+                else:
+                    result = _call_per_file_logic(self._logic, store, files)
 
             self._executed = True
             self._result = result
@@ -147,57 +418,651 @@ class ValidationPerFileStep(ValidationStep):
 
             return result
 
+
+def _logic_name(logic: Callable) -> str:
+    return getattr(logic, "__name__", type(logic).__name__)
+
+
+def _call_per_file_logic(
+    logic: Callable,
+    store: dict[str, Any],
+    files: set[os.PathLike]
+) -> ValidationStepResult:
+    parameters = set(inspect.signature(logic).parameters)
+    with contextlib.ExitStack() as file_span:
+        if len(files) == 1:
+            (file,) = files
+            file_span.enter_context(tracing.span(
+                os.path.basename(file), "file", path=file
+            ))
+        if "store" in parameters:
+            return logic(store=store, files=files)
+        else:
+            return logic(files=files)
+
+
+def _is_worker_safe(value: Any, depth: int = 2) -> bool:
+    # PyGithub objects hold an authenticated connection; never ship them,
+    # including inside containers such as `filtered_files`
+    if type(value).__module__.startswith("github."):
+        return False
+    if depth > 0 and isinstance(value, dict):
+        return all(_is_worker_safe(v, depth - 1) for v in value.values())
+    if depth > 0 and isinstance(value, (list, tuple, set, frozenset)):
+        return all(_is_worker_safe(v, depth - 1) for v in value)
+    return True
+
+
+def _worker_store(store: dict[str, Any]) -> bytes:
+    """Pickles the part of the store that worker processes may use.
+
+    PyGithub objects and values that cannot be pickled are left out. The
+    `possible_labels` dict is replaced by one mapping each label name to
+    itself, so that workers report labels by name; see `_label_by_name()`.
+    """
+    subset: dict[str, Any] = {}
+    for key, value in store.items():
+        if key == "possible_labels":
+            subset[key] = {name: name for name in value}
+            continue
+        if not _is_worker_safe(value):
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            logger.debug("Not sending store entry %s to workers", key)
+            continue
+        subset[key] = value
+    return pickle.dumps(subset)
+
+
+def _initialize_worker() -> None:
+    # import the heavy modules once per worker process rather than once
+    # per task
+    import numpy
+    import pandas
+    import forecast_validation.checks.forecast_file_content
+    import forecast_validation.checks.quantile_csv
+
+
+# the frame cache of a `WorkerPool` process, kept across its tasks
+_worker_frames: Optional[ForecastFrameCache] = None
+
+
+def _worker_frame_cache(file: os.PathLike) -> ForecastFrameCache:
+    """The frame cache of this worker process, in which `file` stays until
+    `_release_worker_frames()` runs for it."""
+    global _worker_frames
+    if _worker_frames is None:
+        from forecast_validation.utilities.forecast_frames import (
+            ForecastFrameCache
+        )
+        _worker_frames = ForecastFrameCache()
+    _worker_frames.retain([file], 1)
+    return _worker_frames
+
+
+def _release_worker_frames(files: list[str]) -> None:
+    """Pool task: evicts the frames of `files` from the frame cache of this
+    worker process."""
+    if _worker_frames is not None:
+        _worker_frames.release(files)
+
+
+def _execute_for_file(
+    logic: Callable,
+    store_bytes: bytes,
+    file: os.PathLike,
+    trace: bool = False,
+    keep_frames: bool = False
+) -> tuple[ValidationStepResult, list[dict[str, Any]]]:
+    """Pool task: runs per-file logic on one file. Returns the result and,
+    if `trace` is True, the trace events recorded in the worker.
+
+    If `keep_frames` is True, the task runs in a `WorkerPool` process, and
+    reads forecasts through the worker's frame cache, in which `file` stays
+    until the pool releases it. Otherwise, the frame cache of the store (if
+    any) arrives empty, and the task parses what it reads.
+    """
+    # a forked worker inherits the parent's tracer; never record into it
+    tracer = tracing.enable_tracing() if trace else None
+    if not trace:
+        tracing.disable_tracing()
+    store: dict[str, Any] = pickle.loads(store_bytes)
+    frames: Optional[ForecastFrameCache] = None
+    if keep_frames:
+        # a run's store always provides a frame cache, but it is only sent
+        # to workers once computed
+        frames = _worker_frame_cache(file)
+        store["forecast_frames"] = frames
+    try:
+        result = _call_per_file_logic(logic, store, {file})
+    finally:
+        if frames is not None:
+            # e.g. the hub mirror's copy of the file
+            frames.release_transient()
+    return result, tracer.events() if tracer is not None else []
+
+
+class WorkerPool:
+    """
+    The worker processes of a run's parallel per-file steps.
+
+    Every task for a file goes to the worker that was given the file first,
+    and each worker keeps the frames it parses until `release()` has been
+    called for them by every parallel step of the run: with workers, as
+    without, each forecast file is parsed once per run rather than once per
+    step. Files are spread over the workers in the order they are first
+    submitted.
+    """
+
+    def __init__(self, workers: int, consumers: int) -> None:
+        # one process per executor, so that a file's tasks share a process
+        self._executors: list[concurrent.futures.ProcessPoolExecutor] = [
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, initializer=_initialize_worker
+            )
+            for _ in range(workers)
+        ]
+        # the number of parallel per-file steps that read each file
+        self.consumers: int = consumers
+        self._routes: dict[str, int] = {}
+        self._remaining: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def submit_for_file(
+        self,
+        file: os.PathLike,
+        function: Callable,
+        *args: Any
+    ) -> concurrent.futures.Future:
+        with self._lock:
+            index = self._routes.setdefault(
+                str(file), len(self._routes) % len(self._executors)
+            )
+        return self._executors[index].submit(function, *args)
+
+    def release(self, files: Iterable[os.PathLike]) -> None:
+        """Marks one parallel step as done with each file in `files`, be it
+        validated in the pool, in this process, or replayed from the result
+        cache. A file that every parallel step is done with is evicted from
+        the frame cache of its worker, if it was ever sent one."""
+        released: dict[int, list[str]] = {}
+        with self._lock:
+            for file in files:
+                key = str(file)
+                remaining = self._remaining.get(key, self.consumers) - 1
+                if remaining > 0:
+                    self._remaining[key] = remaining
+                    continue
+                self._remaining.pop(key, None)
+                if key in self._routes:
+                    released.setdefault(self._routes[key], []).append(key)
+        # a worker runs its tasks in order: after those of the files
+        for index, keys in released.items():
+            self._executors[index].submit(_release_worker_frames, keys)
+
+    def shutdown(self) -> None:
+        for executor in self._executors:
+            executor.shutdown()
+
+
+def _label_by_name(
+    labels: Optional[set[Any]],
+    all_labels: Optional[dict[str, Label]]
+) -> Optional[set[Any]]:
+    if labels is None or all_labels is None:
+        return labels
+    return {
+        all_labels.get(label, label) if isinstance(label, str) else label
+        for label in labels
+    }
+
+
+def merge_step_results(
+    results: Iterable[ValidationStepResult]
+) -> ValidationStepResult:
+    """Merges the results of running one step on several sets of files.
+
+    Comments repeated by several results are kept once.
+    """
+    success: bool = True
+    skip_steps_after: bool = False
+    to_store: Optional[dict[str, Any]] = None
+    forecast_files: Optional[set[os.PathLike]] = None
+    labels: Optional[set[Label]] = None
+    comments: Optional[list[str]] = None
+    file_errors: Optional[dict[os.PathLike, list[str]]] = None
+    for result in results:
+        success = success and result.success
+        skip_steps_after = skip_steps_after or result.skip_steps_after
+        if result.to_store is not None:
+            to_store = (to_store or {}) | result.to_store
+        if result.forecast_files is not None:
+            forecast_files = (forecast_files or set()) | result.forecast_files
+        if result.labels is not None:
+            labels = (labels or set()) | result.labels
+        if result.comments is not None:
+            comments = comments or []
+            comments.extend(c for c in result.comments if c not in comments)
+        if result.file_errors is not None:
+            file_errors = file_errors or {}
+            for filepath, errors in result.file_errors.items():
+                file_errors.setdefault(filepath, []).extend(errors)
+    return ValidationStepResult(
+        success=success,
+        skip_steps_after=skip_steps_after,
+        to_store=to_store,
+        forecast_files=forecast_files,
+        labels=labels,
+        comments=comments,
+        file_errors=file_errors
+    )
+
+
+def _execute_files_in_pool(
+    logic: Callable,
+    store: dict[str, Any],
+    files: list[os.PathLike],
+    executor: Union[concurrent.futures.Executor, WorkerPool]
+) -> list[ValidationStepResult]:
+    """Runs per-file logic as one pool task per file; labels of the
+    returned results are label names."""
+    store_bytes: bytes = _worker_store(store)
+    tracer = tracing.get_tracer()
+    if isinstance(executor, WorkerPool):
+        futures = [
+            executor.submit_for_file(
+                file, _execute_for_file, logic, store_bytes, file,
+                tracer is not None, True
+            )
+            for file in files
+        ]
+    else:
+        futures = [
+            executor.submit(
+                _execute_for_file, logic, store_bytes, file, tracer is not None
+            )
+            for file in files
+        ]
+    results: list[ValidationStepResult] = []
+    for future in futures:
+        result, events = future.result()
+        if tracer is not None:
+            tracer.extend(events)
+        results.append(result)
+    return results
+
+
+def _execute_per_file_in_pool(
+    logic: Callable,
+    store: dict[str, Any],
+    files: set[os.PathLike],
+    executor: Union[concurrent.futures.Executor, WorkerPool]
+) -> ValidationStepResult:
+    """Runs per-file logic as one pool task per file and merges the
+    results in file order."""
+    result = merge_step_results(_execute_files_in_pool(
+        logic, store, sorted(files, key=str), executor
+    ))
+    return dataclasses.replace(
+        result,
+        labels=_label_by_name(result.labels, store.get("possible_labels"))
+    )
+
+
+def _to_cached_file_result(
+    result: ValidationStepResult,
+    file: os.PathLike,
+    all_labels: dict[str, Any]
+) -> Optional[CachedFileResult]:
+    """The cacheable form of a step's result for one file; None if the
+    result does more than report an outcome for that file."""
+    if (
+        result.skip_steps_after or
+        result.to_store is not None or
+        result.forecast_files is not None or
+        any(path != file for path in (result.file_errors or {}))
+    ):
+        return None
+    label_names: list[str] = []
+    for label in result.labels or ():
+        if isinstance(label, str):
+            label_names.append(label)
+            continue
+        names = [name for name, l in all_labels.items() if l is label]
+        if not names:
+            return None
+        label_names.append(names[0])
+
+    path = str(file)
+    return CachedFileResult(
+        success=result.success,
+        comments=[c.replace(path, FILE_PLACEHOLDER) for c in result.comments or []],
+        errors=[
+            e.replace(path, FILE_PLACEHOLDER)
+            for e in (result.file_errors or {}).get(file, [])
+        ],
+        labels=sorted(label_names)
+    )
+
+
+def _from_cached_file_result(
+    cached: CachedFileResult,
+    file: os.PathLike
+) -> ValidationStepResult:
+    path = str(file)
+    return ValidationStepResult(
+        success=cached.success,
+        labels=set(cached.labels),
+        comments=[c.replace(FILE_PLACEHOLDER, path) for c in cached.comments],
+        file_errors={
+            file: [e.replace(FILE_PLACEHOLDER, path) for e in cached.errors]
+        } if cached.errors else {}
+    )
+
+
+def _execute_with_result_cache(
+    logic: Callable,
+    store: dict[str, Any],
+    files: set[os.PathLike],
+    executor: Optional[Union[concurrent.futures.Executor, WorkerPool]]
+) -> ValidationStepResult:
+    """Runs per-file logic only on the files whose outcome is not in the
+    run's result cache, one file at a time, and caches the new outcomes."""
+    from forecast_validation.utilities.forecast_frames import (
+        hash_file_content
+    )
+    cache: ResultCache = store["result_cache"]
+    all_labels: dict[str, Any] = store.get("possible_labels") or {}
+    config_hash: Optional[str] = store.get("RESULT_CACHE_CONFIG_HASH")
+    if config_hash is None and store.get("COMPILED_CONFIG") is not None:
+        config_hash = store["COMPILED_CONFIG"].content_hash
+    step_name = f"{logic.__module__}.{logic.__qualname__}"
+    version = store.get("VALIDATIONS_VERSION", VALIDATIONS_VERSION)
+
+    ordered_files = sorted(files, key=str)
+    results: dict[int, ValidationStepResult] = {}
+    keys: dict[int, Optional[str]] = {}
+    for i, file in enumerate(ordered_files):
+        keys[i] = None
+        if config_hash is None:
+            continue
+        try:
+            with open(file, "rb") as f:
+                content_hash = hash_file_content(f.read())
+        except OSError:
+            continue
+        keys[i] = result_cache_key(step_name, content_hash, config_hash, version)
+        cached = cache.get(keys[i])
+        if cached is not None:
+            logger.info("  Replaying cached %s result for %s", logic.__name__, file)
+            results[i] = _from_cached_file_result(cached, file)
+
+    misses = [i for i in range(len(ordered_files)) if i not in results]
+    if executor is not None and len(misses) > 1:
+        miss_results = _execute_files_in_pool(
+            logic, store, [ordered_files[i] for i in misses], executor
+        )
+    else:
+        miss_results = [
+            _call_per_file_logic(logic, store, {ordered_files[i]})
+            for i in misses
+        ]
+    for i, result in zip(misses, miss_results):
+        results[i] = result
+        if keys[i] is None:
+            continue
+        cached = _to_cached_file_result(result, ordered_files[i], all_labels)
+        if cached is not None:
+            cache.put(keys[i], cached)
+
+    result = merge_step_results(results[i] for i in range(len(ordered_files)))
+    return dataclasses.replace(
+        result, labels=_label_by_name(result.labels, all_labels or None)
+    )
+
+
+def _positive_int_from_environment(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning("Ignoring invalid %s=%r", name, value)
+        return default
+
+
+def workers_from_environment() -> int:
+    return _positive_int_from_environment(WORKERS_ENVIRONMENT_VARIABLE, 1)
+
+
+def step_threads_from_environment() -> int:
+    return _positive_int_from_environment(
+        STEP_THREADS_ENVIRONMENT_VARIABLE, DEFAULT_STEP_THREADS
+    )
+
+def _execute_step(
+    step: ValidationStep,
+    store: ValidationStore,
+    *args: Any
+) -> ValidationStepResult:
+    """Executes a step of a run after computing the lazy store entries it
+    declares it reads; entries it reads without declaring them are computed
+    on first access. Worker processes cannot call providers, so this is what
+    makes lazy entries available to parallel per-file steps. A per-file step
+    without files to validate does not need its entries.
+    """
+    without_files: bool = isinstance(step, ValidationPerFileStep) and not args[0]
+    if step.reads and not without_files:
+        store.resolve(step.reads)
+    return step.execute(store, *args)
+
+
+def _forecast_frame_cache(store: dict[str, Any]) -> ForecastFrameCache:
+    from forecast_validation.utilities.forecast_frames import (
+        ForecastFrameCache
+    )
+    return ForecastFrameCache()
+
+
 class ValidationRun:
+    """
+    Runs validation steps and reports their merged results.
+
+    Steps that declare the store keys they read and write are scheduled as a
+    dependency graph: a step starts once every earlier step it conflicts
+    with (see `ValidationStep.depends_on()`) has finished, and independent
+    steps run concurrently on a pool of `step_threads` threads. Results are
+    applied to the store in step order, so a step that sets
+    `skip_steps_after` discards the results of every later step, just as
+    when steps run one after another.
+
+    The GitHub API requests of a run are recorded in the `APIUsage` at its
+    store's "api_usage" key (see `forecast_validation.utilities.rate_limit`).
+    """
+
     def __init__(
         self,
-        steps: list[ValidationStep] = []
+        steps: list[ValidationStep] = [],
+        workers: Optional[int] = None,
+        step_threads: Optional[int] = None
     ) -> None:
         self._steps: list[ValidationStep] = steps
+        # parallel per-file steps run in a WorkerPool of this many processes
+        self._workers: int = (
+            workers if workers is not None else workers_from_environment()
+        )
+        self._step_threads: int = (
+            step_threads if step_threads is not None
+            else step_threads_from_environment()
+        )
         self._forecast_files: set[os.PathLike] = set()
-        self._store: dict[str, Any] = {}
+        self._store: ValidationStore = ValidationStore()
+        # created once a step needs it: runs without forecast files never
+        # import the forecast frame machinery (and pandas)
+        self._store.register_provider("forecast_frames", _forecast_frame_cache)
 
     def run(self):
-        for step in self._steps:
-            assert isinstance(step, ValidationStep), step
+        executor: Optional[WorkerPool] = None
+        parallel_steps: int = sum(
+            isinstance(s, ValidationPerFileStep) and s.parallel
+            for s in self._steps
+        )
+        if self._workers > 1 and parallel_steps:
+            executor = WorkerPool(self._workers, parallel_steps)
+        # the GitHub API requests of this run, including those of its step
+        # threads, which inherit the context
+        usage = APIUsage()
+        usage_token = api_usage.set(usage)
+        try:
+            try:
+                with tracing.span("validation run", "run"):
+                    self._run_steps(executor)
+            finally:
+                if executor is not None:
+                    executor.shutdown()
+
+            # apply labels, comments, and errors to pull request
+            # if applicable
+            if (
+                "pull_request" in self._store and
+                "filtered_files" in self._store and
+                "possible_labels" in self._store
+            ):   
+                self._upload_results_to_pull_request_and_automerge_check()
+        finally:
+            api_usage.reset(usage_token)
+            self._store["api_usage"] = usage
+            if usage.requests or usage.cached:
+                logger.info("GitHub API budget: %s", usage.summary())
+
+    def _step_dependencies(self) -> list[set[int]]:
+        return [
+            {
+                i for i, earlier in enumerate(self._steps[:j])
+                if step.depends_on(earlier)
+            }
+            for j, step in enumerate(self._steps)
+        ]
+
+    def _run_steps(
+        self,
+        executor: Optional[WorkerPool]
+    ) -> None:
+        # looked up once a per-file step is launched
+        frame_cache: Optional[ForecastFrameCache] = None
+        per_file_steps_left: int = sum(
+            isinstance(s, ValidationPerFileStep) for s in self._steps
+        )
+        retained_files: set[os.PathLike] = set()
+
+        dependencies: list[set[int]] = self._step_dependencies()
+        launched: set[int] = set()
+        running: dict[concurrent.futures.Future, int] = {}
+        finished: dict[int, ValidationStepResult] = {}
+        # steps before this index have had their results applied
+        next_to_apply: int = 0
+        skipped_after: Optional[int] = None
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._step_threads,
+            thread_name_prefix="validation-step"
+        ) as thread_pool:
+            while next_to_apply < len(self._steps) and skipped_after is None:
+                for j, step in enumerate(self._steps):
+                    if j in launched or max(
+                        dependencies[j], default=-1
+                    ) >= next_to_apply:
+                        continue
+                    assert isinstance(step, ValidationStep), step
+                    launched.add(j)
+
+                    # steps get a snapshot of the store so that applying
+                    # results never races with a step reading it, and run
+                    # in the caller's context (e.g. a server's request id)
+                    store = self._store.snapshot()
+                    if isinstance(step, ValidationPerFileStep):
+                        # every per-file step is a consumer of the parsed
+                        # frame of each forecast file; the frame is evicted
+                        # once the last per-file step has run
+                        new_files = self._forecast_files - retained_files
+                        frame_cache = self._store["forecast_frames"]
+                        frame_cache.retain(new_files, per_file_steps_left)
+                        retained_files |= new_files
+                        per_file_steps_left -= 1
+                        future = thread_pool.submit(
+                            contextvars.copy_context().run,
+                            _execute_step, step, store,
+                            set(self._forecast_files), executor
+                        )
+                    else:
+                        future = thread_pool.submit(
+                            contextvars.copy_context().run,
+                            _execute_step, step, store
+                        )
+                    running[future] = j
 
-            if isinstance(step, ValidationPerFileStep):
-                result: ValidationStepResult = step.execute(
-                    self._store, self._forecast_files
+                done, _ = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
                 )
+                for future in done:
+                    j = running.pop(future)
+                    if isinstance(self._steps[j], ValidationPerFileStep):
+                        frame_cache.release(self._forecast_files)
+                        if executor is not None and self._steps[j].parallel:
+                            executor.release(self._forecast_files)
+                    finished[j] = future.result()
+                if not running and frame_cache is not None:
+                    frame_cache.release_transient()
+
+                while next_to_apply in finished:
+                    result = finished.pop(next_to_apply)
+                    self._apply_result(result)
+                    if result.skip_steps_after:
+                        skipped_after = next_to_apply
+                        break
+                    next_to_apply += 1
+
+        if frame_cache is not None:
+            frame_cache.release_transient()
+        if skipped_after is not None:
+            for step in self._steps[skipped_after + 1:]:
+                step._reset()
+
+    def _apply_result(self, result: ValidationStepResult) -> None:
+        if result.to_store is not None:
+            self._store |= result.to_store
+        elif result.forecast_files is not None:
+            self._forecast_files |= result.forecast_files
+
+        if result.skip_steps_after and "pull_request" in self._store:
+            # get corresponding pr
+            pull_request: PullRequest = self._store["pull_request"]
+            # get labels
+            labels = result.labels
+            # append labels to pr
+            if len(labels) > 0:
+                logger.info("Labels to be applied: %s", str(labels))
+                pull_request.set_labels(*list(labels))
             else:
-                result: ValidationStepResult = step.execute(self._store)
+                logger.info("No labels to be applied")
             
-            if result.to_store is not None:
-                self._store |= result.to_store
-            elif result.forecast_files is not None:
-                self._forecast_files |= result.forecast_files
-
-            if result.skip_steps_after:
-                # get corresponding pr
-                pull_request: PullRequest = self._store["pull_request"]
-                # get labels
-                labels = result.labels
-                # append labels to pr
-                if len(labels) > 0:
-                    logger.info("Labels to be applied: %s", str(labels))
-                    pull_request.set_labels(*list(labels))
-                else:
-                    logger.info("No labels to be applied")
-                
-                logger.info("Skipping the rest of validation steps")
-                break
-
-        # apply labels, comments, and errors to pull request
-        # if applicable
-        if (
-            "pull_request" in self._store and
-            "filtered_files" in self._store and
-            "possible_labels" in self._store
-        ):   
-            self._upload_results_to_pull_request_and_automerge_check()
+            logger.info("Skipping the rest of validation steps")
+        elif result.skip_steps_after:
+            logger.info("Skipping the rest of validation steps")
+
+    @property
+    def workers(self) -> int:
+        return self._workers
 
     @property
-    def store(self) -> dict[str, Any]:
+    def step_threads(self) -> int:
+        return self._step_threads
+
+    @property
+    def store(self) -> ValidationStore:
         return self._store
 
     @property
@@ -220,17 +1085,10 @@ class ValidationRun:
             [s.success for s in self.executed_steps]
         )
 
-    def _upload_results_to_pull_request_and_automerge_check(self):
-        pull_request: PullRequest = self._store["pull_request"]
-        filtered_files: dict[PullRequestFileType, list[File]] = (
-            self._store["filtered_files"]
-        )
-        all_labels: dict[str, Label] = self._store["possible_labels"]
-        
-        # if true, add additional automerge PR label
-        automerge: bool = self._store["AUTOMERGE"]
-
-        # merge all labels, comments, and errors generated at each step
+    def merged_outputs(self) -> tuple[
+        set[Label], list[str], dict[os.PathLike, list[str]]
+    ]:
+        """The labels, comments, and errors of all executed steps."""
         labels: set[Label] = set()
         comments: list[str] = []
         errors: dict[os.PathLike, list[str]] = {}
@@ -249,6 +1107,42 @@ class ValidationRun:
                         errors[filepath] = (
                             step.result.file_errors[filepath].copy()
                         )
+        return labels, comments, errors
+
+    def report(self) -> str:
+        """A plain-text report of the run, with the same errors, comments
+        and labels that would be posted on a pull request."""
+        labels, comments, errors = self.merged_outputs()
+
+        lines: list[str] = [f"Validations v{VALIDATIONS_VERSION}", ""]
+        if self.success:
+            lines.append("✔️ No validation errors.")
+        else:
+            lines.append("❌ There are validation errors.")
+        for path in errors:
+            lines.extend(["", f"{path}:"])
+            lines.extend(f"  {error}" for error in errors[path])
+        if comments:
+            lines.extend(["", "Comments:"])
+            lines.extend(f"  {comment}" for comment in comments)
+        if labels:
+            lines.extend(["", "Labels: " + ", ".join(sorted(
+                getattr(label, "name", label) for label in labels
+            ))])
+        return "\n".join(lines)
+
+    def _upload_results_to_pull_request_and_automerge_check(self):
+        pull_request: PullRequest = self._store["pull_request"]
+        filtered_files: dict[PullRequestFileType, list[File]] = (
+            self._store["filtered_files"]
+        )
+        all_labels: dict[str, Label] = self._store["possible_labels"]
+        
+        # if true, add additional automerge PR label
+        automerge: bool = self._store["AUTOMERGE"]
+
+        # merge all labels, comments, and errors generated at each step
+        labels, comments, errors = self.merged_outputs()
 
         no_errors: bool = len(errors) == 0
         has_non_csv_or_metadata: bool = (
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Any
+from typing import Any, Optional
 from github.File import File
 from github.Label import Label
 import datetime
@@ -9,17 +9,35 @@ import os.path
 import pandas as pd
 import pathlib
 import pytz
-import zoltpy.covid19
 from forecast_validation import (
-    ParseDateError, PullRequestFileType
+    PullRequestFileType
 )
 from forecast_validation.checks import RetractionCheckResult
+from forecast_validation.checks.chunked import (
+    chunk_rows_for,
+    count_column_values,
+    validate_forecast_file_in_chunks
+)
 from forecast_validation.checks.forecast_file_content import (
-    check_date_format,
+    check_distinct_date_counts,
     compare_forecasts,
     validate_forecast_values
 )
+from forecast_validation.checks.quantile_csv import (
+    validate_quantile_csv_file
+)
+from forecast_validation.utilities.forecast_frames import (
+    count_values,
+    get_forecast_frame
+)
+from forecast_validation.utilities.hub_config import (
+    CompiledHubConfig,
+    as_compiled_hub_config
+)
 from forecast_validation.utilities.misc import extract_model_name
+from forecast_validation.utilities.population_index import (
+    load_population_index
+)
 from forecast_validation.validation import ValidationStepResult
 
 logger = logging.getLogger("hub-validations")
@@ -65,14 +83,38 @@ def validate_forecast_files(
     errors: dict[os.PathLike, list[str]] = {}
     correctly_formatted_files: set[os.PathLike] = set()
     population_dataframe_path: pathlib.Path = store["POPULATION_DATAFRAME_PATH"]
+    compiled_config: CompiledHubConfig = store.get(
+        "COMPILED_CONFIG"
+    ) or as_compiled_hub_config(store["CONFIG_FILE"])
+
+    # value check results of the files validated in chunks, whose format
+    # and value checks run in the same pass over the file
+    chunked_value_results: dict[os.PathLike, Optional[str]] = {}
 
     logger.info("Checking forecast formats and values...")
 
     for file in files:
         logger.info("  Checking forecast format for %s", file)
-        file_result = zoltpy.covid19.validate_quantile_csv_file(
-            file, store["CONFIG_FILE"],silent=True
-        )
+        try:
+            chunk_rows = chunk_rows_for(store, file)
+            if chunk_rows is not None:
+                logger.info(
+                    "    %s is validated in chunks of %d rows",
+                    file, chunk_rows
+                )
+                file_result, chunked_value_results[file] = (
+                    validate_forecast_file_in_chunks(
+                        file, compiled_config,
+                        load_population_index(population_dataframe_path),
+                        chunk_rows
+                    )
+                )
+            else:
+                file_result = validate_quantile_csv_file(
+                    get_forecast_frame(store, file), compiled_config
+                )
+        except (ValueError, pd.errors.ParserError) as e:
+            file_result = [f"could not parse the file as CSV: {e}"]
         if file_result == "no errors":
             logger.info("    %s format validated", file)
             comments.append(
@@ -104,8 +146,11 @@ def validate_forecast_files(
             error_list.append(error_message)
             errors[file] = error_list
         else:
-            file_result = validate_forecast_values(
-                file, population_dataframe_path
+            file_result = (
+                chunked_value_results[file] if file in chunked_value_results
+                else validate_forecast_values(
+                    get_forecast_frame(store, file), population_dataframe_path
+                )
             )
             if file_result is not None:
                 error_message = (
@@ -129,6 +174,22 @@ def validate_forecast_files(
         file_errors=errors
     )
 
+def _forecast_date_counts(
+    store: dict[str, Any],
+    file: os.PathLike,
+    column: str
+) -> Optional[pd.Series]:
+    """The number of rows per distinct value of the forecast date column of
+    a forecast; None if there is no such column."""
+    chunk_rows = chunk_rows_for(store, file)
+    if chunk_rows is not None:
+        return count_column_values(file, column, chunk_rows)
+    # the parsed frame is shared with the other per-file steps
+    frame = get_forecast_frame(store, file)
+    if column not in frame.columns:
+        return None
+    return count_values(frame[column])
+
 def filename_match_forecast_date_check(
     store: dict[str, Any],
     files: set[os.PathLike]
@@ -145,6 +206,11 @@ def filename_match_forecast_date_check(
     pull_request_directory_root: pathlib.Path = (
         store["PULL_REQUEST_DIRECTORY_ROOT"]
     )
+    # existing forecasts that the PR resubmits byte for byte; these are not
+    # downloaded into the hub mirrored directory
+    unchanged_existing_files: set[str] = store.get(
+        "unchanged_existing_files", set()
+    )
 
     for file in files:
         filepath: pathlib.Path = pathlib.Path(file).relative_to(
@@ -154,10 +220,21 @@ def filename_match_forecast_date_check(
         
         logger.info("Checking dates in forecast file %s...", basename)
 
-        # read only the forecast date column to save space
         try:
-            df = pd.read_csv(file, usecols=[forecast_date_column_name])
-        except ValueError:
+            date_counts = _forecast_date_counts(
+                store, file, forecast_date_column_name
+            )
+        except (ValueError, pd.errors.ParserError) as e:
+            logger.error(
+                "❌ Forecast file %s could not be parsed: %s", basename, e
+            )
+            return ValidationStepResult(
+                success=False,
+                file_errors={filepath: [(
+                    f"Forecast file could not be parsed as a CSV file: {e}"
+                )]}
+            )
+        if date_counts is None:
             logger.error(
                 "❌ Forecast file %s is missing the %s column",
                 basename, forecast_date_column_name
@@ -171,17 +248,17 @@ def filename_match_forecast_date_check(
                 )]}
             )
         
+        # dates are checked per distinct value, not per row; a forecast
+        # file normally has a single distinct forecast date
         cannot_parse_infile_date: bool = False
         forecast_dates: set[datetime.date] = set()
-        for date_object in df['forecast_date']:
-            date_str = str(date_object)
-            try:
-                check_date_format(date_str)
-            except ParseDateError as pde:
+        for distinct_date in check_distinct_date_counts(date_counts):
+            if distinct_date.format_error is not None:
                 error_message = (
                     f"column {forecast_date_column_name} contains dates "
                     "that are not in the YYYY-MM-DD format; specifically, "
-                    f"{pde.args[0]}"
+                    f"{distinct_date.format_error} "
+                    f"(in {distinct_date.row_count} row(s))"
                 )
                 logger.error("❌ " + error_message)
                 success = False
@@ -189,21 +266,21 @@ def filename_match_forecast_date_check(
                 error_list.append(error_message)
                 errors[filepath] = error_list
 
-            try:
-                date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError as ve:
+            if distinct_date.parse_error is not None:
                 cannot_parse_infile_date = True
                 error_message = (
                     f"column {forecast_date_column_name} contains dates "
-                    f"that are not parseable; specifically, {ve.args[0]}"
+                    "that are not parseable; specifically, "
+                    f"{distinct_date.parse_error} "
+                    f"(in {distinct_date.row_count} row(s))"
                 )
                 logger.error(error_message)
                 success = False
                 error_list = errors.get(filepath, [])
                 error_list.append(error_message)
                 errors[filepath] = error_list
-                
-            forecast_dates.add(date)
+            else:
+                forecast_dates.add(distinct_date.date)
 
         # extract date from filename
         cannot_parse_filename_date: bool = False
@@ -298,7 +375,10 @@ def filename_match_forecast_date_check(
             ).date()
 
             # compare validation run date and forecast date if submitting new forecast file
-            if not existing_file_path.exists():
+            if not (
+                existing_file_path.exists() or
+                filepath.as_posix() in unchanged_existing_files
+            ):
                 if (store["HUB_REPOSITORY_NAME"] == "cdcepi/Flusight-forecast-data"):
                     if today - file_forecast_date > datetime.timedelta(days=1):
                         logger.warning(
@@ -365,7 +445,6 @@ def check_new_model(
     metadata_files: list[File] = filtered_files.get(
         PullRequestFileType.METADATA, []
     )
-    existing_models: list[str] = store["model_names"]
 
     models_in_pull_request = set()
     model_to_file: dict[str, os.PathLike] = {}
@@ -376,7 +455,7 @@ def check_new_model(
             )
             model = extract_model_name(filepath)
             models_in_pull_request.add(model)
-            model_to_file[file] = model
+            model_to_file[model] = file
 
     models_with_metadata_in_pull_request = set()
     for metadata_file in metadata_files:
@@ -387,6 +466,11 @@ def check_new_model(
             model = extract_model_name(metadata_file.filename)
             models_with_metadata_in_pull_request.add(model)
 
+    # the existing models are only looked up for PRs with forecasts
+    existing_models: set[str] = (
+        store["model_names"] if models_in_pull_request else set()
+    )
+
     # read all binary operators below as set operations
     if not models_in_pull_request <= existing_models:
         labels.add(all_labels["new-team-submission"])
@@ -437,6 +521,9 @@ def check_forecast_retraction(
     pull_request_directory_root: pathlib.Path = (
         store["PULL_REQUEST_DIRECTORY_ROOT"]
     )
+    unchanged_existing_files: set[str] = store.get(
+        "unchanged_existing_files", set()
+    )
     # if "updates_allowed": check for duplication, retractions and regular updates
     # this function errors when there's duplication or implicit retractions
     # if not "updates_allowed": check for duplication and regular updates
@@ -456,7 +543,11 @@ def check_forecast_retraction(
         existing_file_path = (
             hub_mirrored_directory_root/relative_path_str
         ).resolve()
-        if existing_file_path.exists():
+        is_unchanged: bool = (
+            pathlib.PurePath(relative_path_str).as_posix()
+            in unchanged_existing_files
+        )
+        if is_unchanged or existing_file_path.exists():
             no_files_checked_log = False
 
             if store["UPDATES_ALLOWED"]:
@@ -469,11 +560,31 @@ def check_forecast_retraction(
                 "  Checking existing forecast %s for any updates",
                 str(existing_file_path)
                 )
-            # compare with forecast files already merged into hub repo
-            compare_result: RetractionCheckResult = compare_forecasts(
-                old_forecast_file_path=existing_file_path,
-                new_forecast_file_path=file
-            )
+            compare_result: RetractionCheckResult
+            if is_unchanged:
+                # same git blob as on master, see check_modified_forecasts
+                compare_result = RetractionCheckResult(
+                    error="Forecast is all duplicate.",
+                    is_all_duplicate=True
+                )
+            else:
+                # compare with forecast files already merged into hub repo;
+                # if either version is too large to parse whole, both are
+                # diffed chunk by chunk
+                chunk_rows = (
+                    chunk_rows_for(store, existing_file_path) or
+                    chunk_rows_for(store, file)
+                )
+                compare_result = compare_forecasts(
+                    old_forecast_file_path=existing_file_path,
+                    new_forecast_file_path=file,
+                    chunk_rows=chunk_rows
+                ) if chunk_rows is not None else compare_forecasts(
+                    old_forecast_file_path=get_forecast_frame(
+                        store, existing_file_path
+                    ),
+                    new_forecast_file_path=get_forecast_frame(store, file)
+                )
             if compare_result.is_all_duplicate & (existing_file_path not in deleted_file_paths):
                 success = False
                 logger.error(
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Optional
 from github.File import File
 from github.Label import Label
 from github.Repository import Repository
@@ -10,8 +10,10 @@ from forecast_validation import (
     PullRequestFileType
 )
 from forecast_validation.validation import ValidationStepResult
+from forecast_validation.utilities.fetch import get_fetcher
 from forecast_validation.utilities.github import (
-    get_existing_forecast_file
+    get_blob_sha,
+    get_existing_files
 )
 
 logger = logging.getLogger("hub-validations")
@@ -151,8 +153,10 @@ def check_modified_forecasts(store: dict[str, Any]) -> ValidationStepResult:
     labels: set[Label] = set()
     comments: list[str] = []
     downloaded_existing_files: set[os.PathLike] = set()
-    
-    repository: Repository = store["repository"]
+    unchanged_existing_files: set[str] = set()
+
+    # None with offline backends, whose tree index reads blobs itself
+    repository: Optional[Repository] = store.get("repository")
     filtered_files: dict[PullRequestFileType, list[File]] = (
         store["filtered_files"]
     )
@@ -161,22 +165,44 @@ def check_modified_forecasts(store: dict[str, Any]) -> ValidationStepResult:
 
     forecasts = filtered_files.get(PullRequestFileType.FORECAST, [])
     changed_forecasts: bool = False
+    forecasts_to_download: list[File] = []
     for forecast_file in forecasts:
         # GitHub PR file statuses: unofficial, nothing official yet as of 9-4-21
         # "added", "modified", "renamed", "removed"
         # https://stackoverflow.com/questions/10804476/what-are-the-status-types-for-files-in-the-github-api-v3
         # https://github.com/jitterbit/get-changed-files/commit/cfe8ad4269ed4d2edb7f4e39682a649f6675bf89#diff-4fab5baaca5c14d2de62d8d2fceef376ddddcc8e9509d86cfa5643f51b89ce3dR5
         if forecast_file.status == "modified":
-            # if file is modified, fetch the original one and
-            # save it to the hub (mirrored) directory
-            downloaded_existing_files.add(get_existing_forecast_file(
-                repository,
-                forecast_file,
-                store["HUB_MIRRORED_DIRECTORY_ROOT"]
-            ))
-
             changed_forecasts = True
-            
+
+            # a PR file whose git blob SHA equals the one on master is
+            # byte-identical to the existing forecast; no need to download
+            # and diff it
+            if get_blob_sha(
+                repository, "master", forecast_file.filename,
+                store.get("hub_tree_index")
+            ) == forecast_file.sha:
+                logger.info(
+                    "  %s is identical to the existing forecast",
+                    forecast_file.filename
+                )
+                unchanged_existing_files.add(forecast_file.filename)
+                continue
+
+            forecasts_to_download.append(forecast_file)
+
+    # if file is modified, fetch the original one and
+    # save it to the hub (mirrored) directory; the hub index is only
+    # looked up for PRs that modify forecasts
+    if forecasts_to_download:
+        for existing_forecast_file in get_existing_files(
+            repository,
+            forecasts_to_download,
+            store["HUB_MIRRORED_DIRECTORY_ROOT"],
+            store.get("hub_tree_index"),
+            get_fetcher(store)
+        ):
+            if existing_forecast_file is not None:
+                downloaded_existing_files.add(existing_forecast_file)
 
     if changed_forecasts:
         logger.info("💡 PR contains updates to existing forecasts")
@@ -186,7 +212,8 @@ def check_modified_forecasts(store: dict[str, Any]) -> ValidationStepResult:
     return ValidationStepResult(
         success=True,
         to_store={
-            "downloaded_existing_files": downloaded_existing_files
+            "downloaded_existing_files": downloaded_existing_files,
+            "unchanged_existing_files": unchanged_existing_files
         },
         labels=labels,
         comments=comments
@@ -200,7 +227,8 @@ def check_removed_files(store: dict[str, Any]) -> ValidationStepResult:
     errors: dict[os.PathLike, list[str]] = {}
     deleted_files_in_hub_mirrored_dir: set[os.PathLike] = set()
     
-    repository: Repository = store["repository"]
+    # None with offline backends, whose tree index reads blobs itself
+    repository: Optional[Repository] = store.get("repository")
     filtered_files: dict[PullRequestFileType, list[File]] = (
         store["filtered_files"]
     )
@@ -212,35 +240,24 @@ def check_removed_files(store: dict[str, Any]) -> ValidationStepResult:
     removed_files: bool = False
     success: bool = True
 
-    for forecast_file in forecasts:
-        if forecast_file.status == "removed":
-            existing_forecast_file = get_existing_forecast_file(
-                repository,
-                forecast_file,
-                store["HUB_MIRRORED_DIRECTORY_ROOT"]
-            )
-            if existing_forecast_file is not None:
-                removed_files = True
-                deleted_files_in_hub_mirrored_dir.add(existing_forecast_file)
-                path = pathlib.Path(forecast_file.filename)
-                errors[path] = [(
-                "The forecast CSV or metadata file is deleted."
-                "Please put the file back as we do not allow file deletion at the moment.")]
-
-    for metadata_file in metadatas:
-        if metadata_file.status == "removed":
-            existing_forecast_file = get_existing_forecast_file(
-                repository,
-                metadata_file,
-                store["HUB_MIRRORED_DIRECTORY_ROOT"]
-            )
-            if existing_forecast_file is not None:
-                removed_files = True
-                deleted_files_in_hub_mirrored_dir.add(existing_forecast_file)
-                path = pathlib.Path(metadata_file.filename)
-                errors[path] = [(
-                "The forecast CSV or metadata file is deleted. "
-                "Please put the file back as we do not allow file deletion at the moment.")]
+    removed: list[File] = [
+        file for file in forecasts + metadatas if file.status == "removed"
+    ]
+    existing_files: list[Optional[os.PathLike]] = get_existing_files(
+        repository,
+        removed,
+        store["HUB_MIRRORED_DIRECTORY_ROOT"],
+        store.get("hub_tree_index"),
+        get_fetcher(store)
+    ) if removed else []
+    for removed_file, existing_file in zip(removed, existing_files):
+        if existing_file is not None:
+            removed_files = True
+            deleted_files_in_hub_mirrored_dir.add(existing_file)
+            path = pathlib.Path(removed_file.filename)
+            errors[path] = [(
+            "The forecast CSV or metadata file is deleted. "
+            "Please put the file back as we do not allow file deletion at the moment.")]
 
     if removed_files:
         success = False
@@ -5,7 +5,6 @@ import logging
 import os
 import os.path
 import pathlib
-import urllib.request
 from typing import Any
 
 from github import Github
@@ -22,9 +21,20 @@ from forecast_validation.checks.forecast_file_type import (
     filter_files,
     is_forecast_submission
 )
+from forecast_validation.utilities.fetch import get_fetcher
+from forecast_validation.utilities.git_mirror import LocalGitMirror
 from forecast_validation.utilities.github import (
+    HubTreeIndex,
     get_existing_models
 )
+from forecast_validation.utilities.http_cache import enable_http_cache
+from forecast_validation.utilities.hub_backend import (
+    GitHubBackend,
+    HubBackend
+)
+from forecast_validation.utilities.rate_limit import (
+    enable_rate_limit_scheduler
+)
 from forecast_validation.validation import ValidationStepResult
 
 
@@ -40,6 +50,11 @@ def establish_github_connection(store: dict[str, Any]) -> ValidationStepResult:
     can help rate-limiting be less stringent. See https://docs.github.com/en/rest/overview/resources-in-the-rest-api#rate-limiting
     for more details.
 
+    API responses go through the store's HTTP_CACHE, if set (see
+    `forecast_validation.utilities.http_cache`), and the requests sent to
+    GitHub through its RATE_LIMIT_SCHEDULER, if set (see
+    `forecast_validation.utilities.rate_limit`).
+
     Uses the repository named in the system environment variable
     "GITHUB_REPOSITORY" if it exists. If not, default to the hub repository
     which is named in the configurations (loaded in using the store).
@@ -48,9 +63,11 @@ def establish_github_connection(store: dict[str, Any]) -> ValidationStepResult:
         A ValidationStepResult object with
             * the Github object,
             * the object of the repository from which the pull
-                request originated
-            * a dictionary of label names to labels that can be applied to the
-                pull request.
+                request originated,
+            * the `GitHubBackend` through which the other steps read the
+                hub; it uses the git mirror at the store's
+                HUB_GIT_MIRROR_DIRECTORY, if set.
+        The labels of the repository are listed by `get_possible_labels()`.
     """
 
     logger.info(
@@ -75,6 +92,12 @@ def establish_github_connection(store: dict[str, Any]) -> ValidationStepResult:
         "GH_TOKEN"
     ))
     github: Github = Github(github_PAT) if github_PAT is not None else Github()
+    http_cache = store.get("HTTP_CACHE")
+    scheduler = store.get("RATE_LIMIT_SCHEDULER")
+    if http_cache is not None:
+        enable_http_cache(github, http_cache, scheduler)
+    elif scheduler is not None:
+        enable_rate_limit_scheduler(github, scheduler)
 
     # Get specific repository
     repository_name = os.environ.get(
@@ -85,30 +108,53 @@ def establish_github_connection(store: dict[str, Any]) -> ValidationStepResult:
         raise RuntimeError("FAILURE: could not find GitHub repository")
     repository: Repository = github.get_repo(repository_name)
 
-    # Get list of possible labels to apply to PR
-    possible_labels = {l.name: l for l in repository.get_labels()}
-
     logger.info("Repository successfully retrieved")
     logger.info("Github repository: %s", repository.full_name)
 
+    mirror_directory = store.get("HUB_GIT_MIRROR_DIRECTORY")
+    mirror = LocalGitMirror(
+        mirror_directory, repository.clone_url, github_PAT
+    ) if mirror_directory is not None else None
+
     return ValidationStepResult(
         success=True,
         to_store={
             "github": github,
             "repository": repository,
-            "possible_labels": possible_labels
+            "hub_backend": GitHubBackend(repository, mirror)
         }
     )
 
 
+def get_possible_labels(store: dict[str, Any]) -> ValidationStepResult:
+    """Lists the labels that can be applied to pull requests of the
+    repository, keyed by name."""
+    backend: HubBackend = store["hub_backend"]
+
+    possible_labels: dict[str, Label] = {
+        l.name: l for l in backend.get_labels()
+    }
+
+    return ValidationStepResult(
+        success=True,
+        to_store={"possible_labels": possible_labels}
+    )
+
+
 def extract_pull_request(store: dict[str, Any]) -> ValidationStepResult:
     """Extracts the pull request that the validations will be run on.
+
+    The pull request number is taken from the store's PULL_REQUEST_NUMBER
+    if set (e.g. by the queue worker), and from the GitHub Actions event
+    otherwise.
     """
-    repository: Repository = store["repository"]
-    with open(os.environ.get("GITHUB_EVENT_PATH")) as event_file:
-        event: dict = json.load(event_file)
-    pull_request_number: str = event['number']
-    pull_request: PullRequest = repository.get_pull(pull_request_number)
+    backend: HubBackend = store["hub_backend"]
+    pull_request_number = store.get("PULL_REQUEST_NUMBER")
+    if pull_request_number is None:
+        with open(os.environ.get("GITHUB_EVENT_PATH")) as event_file:
+            event: dict = json.load(event_file)
+        pull_request_number = event['number']
+    pull_request: PullRequest = backend.get_pull_request(pull_request_number)
 
     logger.info("Using PR number: %s", pull_request_number)
 
@@ -167,14 +213,32 @@ def determine_pull_request_type(store: dict[str, Any]) -> ValidationStepResult:
     )
 
 
+def index_hub_repository(store: dict[str, Any]) -> ValidationStepResult:
+    """Indexes every path of the hub repository's master branch once, so
+    that later steps can look up existing files without further tree
+    fetches.
+    """
+    logger.info("Indexing the hub repository's master branch...")
+
+    backend: HubBackend = store["hub_backend"]
+    tree_index: HubTreeIndex = backend.get_tree_index("master")
+
+    return ValidationStepResult(
+        success=True,
+        to_store={"hub_tree_index": tree_index}
+    )
+
+
 def get_all_models_from_repository(
         store: dict[str, Any]
 ) -> ValidationStepResult:
-    repository: Repository = store["repository"]
-
     logger.info("Retrieving all existing model names...")
 
-    model_names: set[str] = get_existing_models(repository, store["FORECAST_FOLDER_NAME"])
+    model_names: set[str] = get_existing_models(
+        store.get("repository"),
+        store["FORECAST_FOLDER_NAME"],
+        store.get("hub_tree_index")
+    )
 
     logger.info("All model names successfully retrieved")
 
@@ -197,14 +261,10 @@ def download_all_forecast_and_metadata_files(store: dict[str, Any]) -> Validatio
     if not root_directory.exists():
         os.makedirs(root_directory, exist_ok=True)
 
-    for file in files:
-        filepath = pathlib.Path(file.filename)
-        parent_directory = (root_directory / filepath.parent).resolve()
-        if not parent_directory.exists():
-            os.makedirs(parent_directory)
-
-        local_path = (root_directory / pathlib.Path(file.filename)).resolve()
-        urllib.request.urlretrieve(file.raw_url, local_path)
+    backend: HubBackend = store["hub_backend"]
+    backend.download_pull_request_files(
+        files, root_directory, get_fetcher(store)
+    )
 
     logger.info("Download successful")
     return ValidationStepResult(success=True)
@@ -0,0 +1,196 @@
+# external dependencies
+import dataclasses
+import filecmp
+import logging
+import os
+import pathlib
+from typing import Any, Iterable
+
+# internal dependencies
+from forecast_validation import (
+    PullRequestFileType
+)
+from forecast_validation.checks.forecast_file_type import (
+    filter_files,
+    is_forecast_submission
+)
+from forecast_validation.utilities.hub_backend import DEFAULT_LABEL_NAMES
+from forecast_validation.validation import ValidationStepResult
+
+
+logger = logging.getLogger("hub-validations")
+
+
+@dataclasses.dataclass(frozen=True)
+class LocalFile:
+    """
+    Stands in for the PyGithub File of a pull request when validating a
+    local directory; only the attributes that the validation steps use are
+    provided.
+
+    Fields:
+        filename: path of the file relative to the submission directory,
+            which is laid out like the hub repository
+        status: "modified" if the hub checkout has a file at the same path,
+            "added" otherwise
+    """
+    filename: str
+    status: str
+
+
+class LocalLabels(dict):
+    """Possible labels of a local run: each label that the validation steps
+    apply, as its own name.
+
+    The labels are entries rather than computed on lookup, so that worker
+    processes, which are sent label names only (see `_worker_store()`), see
+    the same labels.
+    """
+
+    def __init__(self, label_names: Iterable[str] = DEFAULT_LABEL_NAMES) -> None:
+        super().__init__((name, name) for name in label_names)
+
+
+def collect_local_files(store: dict[str, Any]) -> ValidationStepResult:
+    """Collects the files of a local submission directory and determines
+    whether they form a forecast submission.
+
+    Plays the part of `extract_pull_request()` and
+    `determine_pull_request_type()` in local runs: every file under
+    LOCAL_SUBMISSION_DIRECTORY counts as part of the submission.
+    """
+    submission_directory: pathlib.Path = store["LOCAL_SUBMISSION_DIRECTORY"]
+    hub_directory: pathlib.Path = store["HUB_MIRRORED_DIRECTORY_ROOT"]
+
+    logger.info("Collecting files in %s...", submission_directory)
+
+    files: list[LocalFile] = []
+    for directory, subdirectories, filenames in os.walk(submission_directory):
+        subdirectories[:] = sorted(
+            d for d in subdirectories if not d.startswith(".")
+        )
+        for filename in sorted(filenames):
+            path = pathlib.Path(directory)/filename
+            relative_path = path.relative_to(submission_directory).as_posix()
+            files.append(LocalFile(
+                filename=relative_path,
+                status=(
+                    "modified" if (hub_directory/relative_path).is_file()
+                    else "added"
+                )
+            ))
+
+    filtered_files: dict[PullRequestFileType, list[LocalFile]] = filter_files(
+        files, store["FILENAME_PATTERNS"]
+    )
+    possible_labels: LocalLabels = LocalLabels()
+
+    if not is_forecast_submission(filtered_files):
+        logger.info(
+            "Directory does not contain files that can be interpreted "
+            "as part of a forecast submission; validations skipped."
+        )
+        return ValidationStepResult(
+            success=True,
+            skip_steps_after=True,
+            to_store={
+                "filtered_files": filtered_files,
+                "possible_labels": possible_labels
+            }
+        )
+
+    labels: set[str] = set()
+    if PullRequestFileType.FORECAST in filtered_files:
+        labels.add(possible_labels["data-submission"])
+    logger.info(
+        "Directory can be interpreted as a forecast submission, "
+        "proceeding with validations."
+    )
+
+    return ValidationStepResult(
+        success=True,
+        labels=labels,
+        to_store={
+            "filtered_files": filtered_files,
+            "possible_labels": possible_labels
+        }
+    )
+
+
+def check_local_modified_forecasts(
+    store: dict[str, Any]
+) -> ValidationStepResult:
+    """Finds the forecasts that a local submission updates.
+
+    Local counterpart of `check_modified_forecasts()`: the existing version
+    of each forecast is read straight from the hub checkout, and forecasts
+    whose content is identical to it are reported as unchanged.
+    """
+    hub_directory: pathlib.Path = store["HUB_MIRRORED_DIRECTORY_ROOT"]
+    submission_directory: pathlib.Path = store["LOCAL_SUBMISSION_DIRECTORY"]
+    filtered_files: dict[PullRequestFileType, list[LocalFile]] = (
+        store["filtered_files"]
+    )
+    existing_files: set[os.PathLike] = set()
+    unchanged_existing_files: set[str] = set()
+
+    logger.info("Checking if the directory contains updates to existing forecasts...")
+
+    for forecast_file in filtered_files.get(PullRequestFileType.FORECAST, []):
+        if forecast_file.status != "modified":
+            continue
+        existing_file = (hub_directory/forecast_file.filename).resolve()
+        if filecmp.cmp(
+            submission_directory/forecast_file.filename, existing_file,
+            shallow=False
+        ):
+            logger.info(
+                "  %s is identical to the existing forecast",
+                forecast_file.filename
+            )
+            unchanged_existing_files.add(forecast_file.filename)
+        else:
+            existing_files.add(existing_file)
+
+    if existing_files or unchanged_existing_files:
+        logger.info("💡 Directory contains updates to existing forecasts")
+    else:
+        logger.info("✔️ Directory does not contain updates to existing forecasts")
+
+    return ValidationStepResult(
+        success=True,
+        to_store={
+            "downloaded_existing_files": existing_files,
+            "unchanged_existing_files": unchanged_existing_files,
+            # a directory cannot express deletions
+            "deleted_existing_files_paths": set()
+        }
+    )
+
+
+def get_all_models_from_local_hub(
+    store: dict[str, Any]
+) -> ValidationStepResult:
+    """Lists the existing models: the team-model directories in the forecast
+    folder of the hub checkout."""
+    forecast_directory: pathlib.Path = (
+        store["HUB_MIRRORED_DIRECTORY_ROOT"]/store["FORECAST_FOLDER_NAME"]
+    )
+
+    logger.info("Retrieving all existing model names...")
+
+    model_names: set[str] = set()
+    if forecast_directory.is_dir():
+        model_names = {
+            entry.name for entry in forecast_directory.iterdir()
+            if entry.is_dir()
+        }
+
+    logger.info("All model names successfully retrieved")
+
+    return ValidationStepResult(
+        success=True,
+        to_store={
+            "model_names": model_names
+        }
+    )
@@ -1,5 +1,6 @@
 import collections
 import copy
+import functools
 import logging
 import os
 import pathlib
@@ -13,10 +14,12 @@ import yaml
 from github.File import File
 
 from forecast_validation import PullRequestFileType
+from forecast_validation.utilities.github import get_file_content
 from forecast_validation.validation import ValidationStepResult
 
 
 SCHEMA_FILE = 'forecast_validation/static/schema.yml'
+LICENSES_FILE = 'forecast_validation/static/accepted-licenses.csv'
 DESIGNATED_MODEL_CACHE_KEY = 'designated_model_cache'
 
 logger = logging.getLogger("hub-validations")
@@ -30,6 +33,13 @@ def get_all_metadata_filepaths(store: dict[str, Any]) -> ValidationStepResult:
                                               {directory / pathlib.Path(f.filename) for f in metadata_files}})
 
 
+@functools.lru_cache(maxsize=None)
+def _accepted_licenses():
+    """The accepted licenses, read once per process."""
+    license_df = pd.read_csv(LICENSES_FILE)
+    return frozenset(license_df['license'])
+
+
 def validate_metadata_contents(metadata, filepath):
     # Initialize output
     is_metadata_error = False
@@ -81,8 +91,7 @@ def validate_metadata_contents(metadata, filepath):
                 (filepath, field, metadata[field])]
 
     # Validate licenses
-    license_df = pd.read_csv('forecast_validation/static/accepted-licenses.csv')
-    accepted_licenses = list(license_df['license'])
+    accepted_licenses = _accepted_licenses()
     if ('license' in metadata) and (metadata['license'] not in accepted_licenses):
         is_metadata_error = True
         metadata_error_output += [
@@ -226,11 +235,24 @@ def _team_model_desig_dict_from_pr(store):
 
 def _team_model_desig_dict_from_repo(store, team_abbrs):
     """
-    :param store: a dict containing the "repository" key -> a github.Repository
+    :param store: a dict containing the "hub_tree_index" key -> a HubTreeIndex of the hub and/or the "repository"
+        key -> a github.Repository; the hub checkout at HUB_MIRRORED_DIRECTORY_ROOT is read if it has neither
     :param team_abbrs: a set of team_abbr's to limit the search to. typically pulled from metadata files in a PR
     :return: a model_designation_dict (same as `_team_model_desig_dict_from_pr()` - see)
     """
+    tree_index = store.get("hub_tree_index")
+    if tree_index is None and "repository" not in store:
+        return _team_model_desig_dict_from_directory(
+            store["HUB_MIRRORED_DIRECTORY_ROOT"], store["FORECAST_FOLDER_NAME"], team_abbrs
+        )
+
+    if tree_index is not None:
+        return _team_model_desig_dict_from_tree_index(
+            tree_index, store["FORECAST_FOLDER_NAME"], team_abbrs
+        )
+
     repo = store["repository"]
+
     data_processed_dirs = repo.get_contents(store["FORECAST_FOLDER_NAME"])
     team_model_designation_dict = collections.defaultdict(collections.defaultdict)
     for data_processed_dir in data_processed_dirs:
@@ -244,3 +266,48 @@ def _team_model_desig_dict_from_repo(store, team_abbrs):
         team_model_designation_dict[team_abbr][metadata['model_name']] = metadata['team_model_designation']
 
     return team_model_designation_dict
+
+
+def _team_model_desig_dict_from_tree_index(tree_index, forecast_folder_name, team_abbrs):
+    """
+    `_team_model_desig_dict_from_repo()` helper that finds the teams' model directories in a `HubTreeIndex` of the
+    repo, so that only the matching metadata files are read, through the index's backend.
+    """
+    team_model_designation_dict = collections.defaultdict(collections.defaultdict)
+    for model_dir_name in tree_index.children(forecast_folder_name, type="tree"):
+        team_abbr = model_dir_name.split('-')[0]  # e.g., 'COVIDhub'
+        if team_abbr not in team_abbrs:
+            continue
+
+        metadata_file_path = f'{forecast_folder_name}/{model_dir_name}/metadata-{model_dir_name}.txt'
+        content = get_file_content(metadata_file_path, tree_index)
+        if content is None:
+            continue
+        metadata = yaml.safe_load(content)
+        team_model_designation_dict[team_abbr][metadata['model_name']] = metadata['team_model_designation']
+
+    return team_model_designation_dict
+
+
+def _team_model_desig_dict_from_directory(hub_directory, forecast_folder_name, team_abbrs):
+    """
+    `_team_model_desig_dict_from_repo()` helper for local runs, which read the metadata files from a checkout of the
+    hub repository at `hub_directory`.
+    """
+    team_model_designation_dict = collections.defaultdict(collections.defaultdict)
+    forecast_directory = pathlib.Path(hub_directory)/forecast_folder_name
+    if not forecast_directory.is_dir():
+        return team_model_designation_dict
+    for model_dir in forecast_directory.iterdir():
+        team_abbr = model_dir.name.split('-')[0]  # e.g., 'COVIDhub'
+        if team_abbr not in team_abbrs:
+            continue
+
+        metadata_file_path = model_dir/f'metadata-{model_dir.name}.txt'
+        if not metadata_file_path.is_file():
+            continue
+        with open(metadata_file_path) as fp:
+            metadata = yaml.safe_load(fp)
+        team_model_designation_dict[team_abbr][metadata['model_name']] = metadata['team_model_designation']
+
+    return team_model_designation_dict
@@ -0,0 +1,431 @@
+"""
+Queue-driven validation of many pull requests by one long-running worker.
+
+Pull request events are taken from an `EventQueue`: a directory of JSON
+files (`DirectoryQueue`), a SQLite table (`SQLiteQueue`), or any stand-in
+with the same methods. A `PullRequestWorker` runs the validation of up to
+`concurrency` pull requests at once. The runs share the hub-level state held
+by `SharedHubState`: the GitHub connection, `possible_labels`, the hub tree
+index, `model_names` and the population table. That state is rebuilt only
+when the head of the hub's master branch moves.
+"""
+from __future__ import annotations
+from typing import Any, Callable, Iterator, Optional, Union
+import abc
+import concurrent.futures
+import contextlib
+import dataclasses
+import json
+import logging
+import os
+import pathlib
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+from forecast_validation.utilities.github import get_existing_models
+from forecast_validation.utilities.hub_backend import HubBackend
+from forecast_validation.utilities.log_context import (
+    enable_log_context,
+    logging_context
+)
+from forecast_validation.validation import ValidationRun
+from forecast_validation.validation_logic.github_connection import (
+    establish_github_connection,
+    get_possible_labels
+)
+
+logger = logging.getLogger("hub-validations")
+
+# seconds between checks of the hub's master branch head
+DEFAULT_REFRESH_INTERVAL: float = 30.0
+# seconds to wait before polling an empty queue again
+DEFAULT_POLL_INTERVAL: float = 2.0
+
+
+@dataclasses.dataclass(frozen=True)
+class PullRequestEvent:
+    """
+    Data class for a queued request to validate a pull request.
+
+    Fields:
+        event_id: id of the event in its queue
+        pull_request_number: number of the pull request to validate
+        payload: the full queued JSON object, e.g. a GitHub webhook payload
+            with a "number" field
+    """
+    event_id: str
+    pull_request_number: int
+    payload: dict[str, Any]
+
+    @classmethod
+    def from_payload(cls, event_id: str, payload: dict[str, Any]) -> PullRequestEvent:
+        number = payload.get("pull_request_number", payload.get("number"))
+        if number is None:
+            raise ValueError(f"event {event_id} has no pull request number")
+        return cls(event_id, int(number), payload)
+
+
+class EventQueue(abc.ABC):
+    """A queue of pull request events that several consumers may share.
+
+    `claim()` hands each event to one consumer; the consumer then calls
+    either `ack()` or `fail()` for it.
+    """
+
+    @abc.abstractmethod
+    def put(self, payload: dict[str, Any]) -> str:
+        """Adds an event; returns its id."""
+
+    @abc.abstractmethod
+    def claim(self) -> Optional[PullRequestEvent]:
+        """Takes the oldest pending event; None if there is none."""
+
+    @abc.abstractmethod
+    def ack(self, event: PullRequestEvent) -> None:
+        """Marks a claimed event as done."""
+
+    @abc.abstractmethod
+    def fail(self, event: PullRequestEvent, error: str) -> None:
+        """Marks a claimed event as failed."""
+
+
+class DirectoryQueue(EventQueue):
+    """
+    Queue of JSON files in `<directory>/pending`.
+
+    An event is claimed by renaming its file into `processing/`, which is
+    atomic, so several workers can share the directory. Done and failed
+    events are moved to `done/` and `failed/`; failed ones get an `.error`
+    file next to them.
+    """
+
+    def __init__(self, directory: Union[str, os.PathLike]) -> None:
+        self.directory: pathlib.Path = pathlib.Path(directory)
+        for state in ["pending", "processing", "done", "failed"]:
+            os.makedirs(self.directory/state, exist_ok=True)
+
+    def put(self, payload: dict[str, Any]) -> str:
+        # ids sort in arrival order
+        event_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        temporary_path = self.directory/"pending"/f".{event_id}.tmp"
+        temporary_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(temporary_path, self.directory/"pending"/f"{event_id}.json")
+        return event_id
+
+    def claim(self) -> Optional[PullRequestEvent]:
+        for path in sorted((self.directory/"pending").glob("*.json")):
+            claimed_path = self.directory/"processing"/path.name
+            try:
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                # claimed by another worker
+                continue
+            event_id = path.stem
+            try:
+                payload = json.loads(claimed_path.read_text(encoding="utf-8"))
+                return PullRequestEvent.from_payload(event_id, payload)
+            except (ValueError, OSError) as e:
+                self._move(event_id, "failed")
+                self._write_error(event_id, f"unreadable event: {e}")
+        return None
+
+    def ack(self, event: PullRequestEvent) -> None:
+        self._move(event.event_id, "done")
+
+    def fail(self, event: PullRequestEvent, error: str) -> None:
+        self._move(event.event_id, "failed")
+        self._write_error(event.event_id, error)
+
+    def _move(self, event_id: str, state: str) -> None:
+        os.replace(
+            self.directory/"processing"/f"{event_id}.json",
+            self.directory/state/f"{event_id}.json"
+        )
+
+    def _write_error(self, event_id: str, error: str) -> None:
+        (self.directory/"failed"/f"{event_id}.error").write_text(
+            error, encoding="utf-8"
+        )
+
+
+class SQLiteQueue(EventQueue):
+    """
+    Queue of events in a table of a SQLite database.
+
+    Claims run in an immediate transaction, so several worker processes can
+    share the database file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path: str = str(path)
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " payload TEXT NOT NULL,"
+                " state TEXT NOT NULL DEFAULT 'pending',"
+                " error TEXT,"
+                " updated_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS events_state ON events (state, id)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # autocommit mode; claims manage their transaction explicitly
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def put(self, payload: dict[str, Any]) -> str:
+        with self._lock, self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO events (payload, updated_at) VALUES (?, ?)",
+                (json.dumps(payload), time.time())
+            )
+            return str(cursor.lastrowid)
+
+    def claim(self) -> Optional[PullRequestEvent]:
+        with self._lock, self._connect() as connection:
+            while True:
+                connection.execute("BEGIN IMMEDIATE")
+                row = connection.execute(
+                    "SELECT id, payload FROM events WHERE state = 'pending' "
+                    "ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                event_id, payload = str(row[0]), row[1]
+                connection.execute(
+                    "UPDATE events SET state = 'processing', updated_at = ? "
+                    "WHERE id = ?",
+                    (time.time(), row[0])
+                )
+                connection.execute("COMMIT")
+                try:
+                    return PullRequestEvent.from_payload(
+                        event_id, json.loads(payload)
+                    )
+                except ValueError as e:
+                    self._set_state(event_id, "failed", f"unreadable event: {e}")
+
+    def ack(self, event: PullRequestEvent) -> None:
+        self._set_state(event.event_id, "done")
+
+    def fail(self, event: PullRequestEvent, error: str) -> None:
+        self._set_state(event.event_id, "failed", error)
+
+    def _set_state(
+        self,
+        event_id: str,
+        state: str,
+        error: Optional[str] = None
+    ) -> None:
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE events SET state = ?, error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (state, error, time.time(), int(event_id))
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Number of events in each state."""
+        with self._connect() as connection:
+            return dict(connection.execute(
+                "SELECT state, COUNT(*) FROM events GROUP BY state"
+            ).fetchall())
+
+
+class SharedHubState:
+    """
+    Hub-level store entries shared by the validation runs of a worker.
+
+    `get()` returns the entries of `initial_store()` plus the connection to
+    the hub (`hub_backend`, `possible_labels`, and `github` and `repository`
+    unless a `backend` is given) and the state of the hub's master branch
+    (`hub_tree_index`, `model_names`). The head of
+    master is checked at most every `refresh_interval` seconds; when it has
+    moved, the labels, the tree index and the model names are reloaded, and
+    so are the initial entries and the population table, which may have
+    changed with it.
+    """
+
+    def __init__(
+        self,
+        initial_store: Callable[[], dict[str, Any]],
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+        backend: Optional[HubBackend] = None
+    ) -> None:
+        self._initial_store: Callable[[], dict[str, Any]] = initial_store
+        self._backend: Optional[HubBackend] = backend
+        self.refresh_interval: float = refresh_interval
+        self._clock: Callable[[], float] = clock
+        self._lock = threading.Lock()
+        self._entries: Optional[dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+
+    @property
+    def commit_sha(self) -> Optional[str]:
+        if self._entries is None:
+            return None
+        return self._entries["hub_tree_index"].commit_sha
+
+    def get(self) -> dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            if self._entries is None:
+                self._entries = self._load(None)
+                self._checked_at = now
+            elif now - self._checked_at >= self.refresh_interval:
+                self._checked_at = now
+                commit_sha = self._entries["hub_backend"].get_branch_sha()
+                if commit_sha != self.commit_sha:
+                    logger.info(
+                        "Hub master moved from %s to %s; reloading hub state",
+                        self.commit_sha, commit_sha
+                    )
+                    self._entries = self._load(commit_sha)
+            return dict(self._entries)
+
+    def _load(self, commit_sha: Optional[str]) -> dict[str, Any]:
+        # the population index (and pandas) is only imported by runs that
+        # validate forecasts; there is nothing to clear before that
+        population_index = sys.modules.get(
+            "forecast_validation.utilities.population_index"
+        )
+        if population_index is not None:
+            population_index.clear_population_index_cache()
+        entries = self._initial_store()
+        if self._backend is not None:
+            entries["hub_backend"] = self._backend
+        elif self._entries is None:
+            entries |= establish_github_connection(entries).to_store
+        else:
+            # the client keeps the scheduler it was connected with
+            entries |= {
+                key: self._entries[key] for key in (
+                    "github", "repository", "hub_backend",
+                    "RATE_LIMIT_SCHEDULER"
+                ) if key in self._entries
+            }
+        entries |= get_possible_labels(entries).to_store
+        tree_index = entries["hub_backend"].get_tree_index(
+            "master", commit_sha
+        )
+        entries["hub_tree_index"] = tree_index
+        entries["model_names"] = get_existing_models(
+            entries.get("repository"), entries["FORECAST_FOLDER_NAME"],
+            tree_index
+        )
+        return entries
+
+
+class PullRequestWorker:
+    """
+    Validates the pull requests of queued events, up to `concurrency` at a
+    time.
+
+    `run_factory` makes the validation run of one pull request from its
+    event, the shared hub entries and a work directory of its own; the
+    worker removes the work directory once the run is done.
+    """
+
+    def __init__(
+        self,
+        queue: EventQueue,
+        hub_state: SharedHubState,
+        run_factory: Callable[
+            [PullRequestEvent, dict[str, Any], pathlib.Path], ValidationRun
+        ],
+        work_directory: Union[str, os.PathLike],
+        concurrency: int = 4,
+        poll_interval: float = DEFAULT_POLL_INTERVAL
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.queue: EventQueue = queue
+        self.hub_state: SharedHubState = hub_state
+        self.run_factory = run_factory
+        self.work_directory: pathlib.Path = pathlib.Path(work_directory)
+        self.concurrency: int = concurrency
+        self.poll_interval: float = poll_interval
+        self._stop = threading.Event()
+        enable_log_context()
+
+    def stop(self) -> None:
+        """Makes `run()` return once the running validations are done."""
+        self._stop.set()
+
+    def run(self, exit_when_empty: bool = False) -> dict[str, int]:
+        """Processes events until `stop()` is called or, with
+        `exit_when_empty`, until the queue is empty. Returns the number of
+        "succeeded", "failed" (validation errors) and "errored" events."""
+        counts: dict[str, int] = {"succeeded": 0, "failed": 0, "errored": 0}
+        running: dict[concurrent.futures.Future, PullRequestEvent] = {}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="pull-request"
+        ) as executor:
+            while not self._stop.is_set() or running:
+                while not self._stop.is_set() and len(running) < self.concurrency:
+                    event = self.queue.claim()
+                    if event is None:
+                        break
+                    logger.info(
+                        "Validating PR %d (event %s)",
+                        event.pull_request_number, event.event_id
+                    )
+                    running[executor.submit(self._validate, event)] = event
+
+                if not running:
+                    if exit_when_empty:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                done, _ = concurrent.futures.wait(
+                    running,
+                    timeout=self.poll_interval,
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    event = running.pop(future)
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        logger.error(
+                            "Validation of PR %d failed: %s",
+                            event.pull_request_number, e,
+                            exc_info=(type(e), e, e.__traceback__)
+                        )
+                        self.queue.fail(event, f"{type(e).__name__}: {e}")
+                        counts["errored"] += 1
+                        continue
+                    self.queue.ack(event)
+                    counts["succeeded" if success else "failed"] += 1
+        return counts
+
+    def _validate(self, event: PullRequestEvent) -> bool:
+        with logging_context(f"PR {event.pull_request_number}"):
+            run_directory = self.work_directory/(
+                f"pr-{event.pull_request_number}-{uuid.uuid4().hex[:8]}"
+            )
+            os.makedirs(run_directory)
+            try:
+                validation_run = self.run_factory(
+                    event, self.hub_state.get(), run_directory
+                )
+                validation_run.run()
+                return validation_run.success
+            finally:
+                shutil.rmtree(run_directory, ignore_errors=True)
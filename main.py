@@ -4,27 +4,33 @@ import logging.config
 import os
 import os.path
 import pathlib
-import re
 import sys
 import argparse
-import json
+import hashlib
+from typing import Any, Optional
 
 # internal dep.'s
 from forecast_validation import (
-    PullRequestFileType,
     VALIDATIONS_VERSION
 )
+from forecast_validation.server import ValidationServer
+from forecast_validation.worker import (
+    DirectoryQueue,
+    EventQueue,
+    PullRequestEvent,
+    PullRequestWorker,
+    SharedHubState,
+    SQLiteQueue
+)
 from forecast_validation.validation import (
+    FORECAST_FILES_KEY,
+    LazyLogic,
     ValidationStep,
     ValidationPerFileStep,
-    ValidationRun
-)
-from forecast_validation.validation_logic.forecast_file_content import (
-    check_forecast_retraction,
-    check_new_model,
-    get_all_forecast_filepaths,
-    filename_match_forecast_date_check,
-    validate_forecast_files
+    ValidationRun,
+    ValidationStore,
+    step_provider,
+    workers_from_environment
 )
 from forecast_validation.validation_logic.forecast_file_type import (
     check_multiple_model_names,
@@ -36,133 +42,670 @@ from forecast_validation.validation_logic.github_connection import (
     establish_github_connection,
     extract_pull_request,
     determine_pull_request_type,
+    get_possible_labels,
+    index_hub_repository,
     get_all_models_from_repository,
     download_all_forecast_and_metadata_files
 )
-from forecast_validation.validation_logic.metadata import (
-    get_all_metadata_filepaths,
-    validate_metadata_files
+from forecast_validation.validation_logic.local_files import (
+    collect_local_files,
+    check_local_modified_forecasts,
+    get_all_models_from_local_hub
+)
+from forecast_validation.utilities.fetch import (
+    DEFAULT_MAX_WORKERS,
+    Fetcher,
+    max_workers_from_environment
+)
+from forecast_validation.utilities.git_mirror import (
+    git_mirror_directory_from_environment
+)
+from forecast_validation.utilities.http_cache import (
+    HTTPCache,
+    http_cache_enabled_from_environment
+)
+from forecast_validation.utilities.hub_backend import HubBackend
+from forecast_validation.utilities.hub_config import (
+    CompiledHubConfig,
+    forecast_schema,
+    load_compiled_hub_config
+)
+from forecast_validation.utilities.rate_limit import (
+    RateLimitScheduler,
+    rate_limit_scheduler_enabled_from_environment
+)
+from forecast_validation.utilities.tracing import (
+    TRACE_ENVIRONMENT_VARIABLE,
+    disable_tracing,
+    enable_tracing
+)
+from forecast_validation.utilities.result_cache import (
+    ResultCache,
+    max_bytes_from_environment
 )
 
 logging.config.fileConfig("logging.conf")
 
+# dependency name for the PR files downloaded to PULL_REQUEST_DIRECTORY_ROOT
+PULL_REQUEST_DOWNLOADS = "pull_request_downloads"
+
+DEFAULT_SERVER_PORT = 8765
+
+# The steps that check forecasts and metadata import pandas, numpy, pytz,
+# zoltpy, pykwalify and yaml; they are only imported when such a step runs,
+# so a pull request that changes no forecasts or metadata is classified and
+# labeled without them (see benchmarks/startup_benchmark.py)
+_FORECAST_FILE_CONTENT = "forecast_validation.validation_logic.forecast_file_content"
+_METADATA = "forecast_validation.validation_logic.metadata"
+get_all_forecast_filepaths = LazyLogic(
+    _FORECAST_FILE_CONTENT, "get_all_forecast_filepaths"
+)
+filename_match_forecast_date_check = LazyLogic(
+    _FORECAST_FILE_CONTENT, "filename_match_forecast_date_check",
+    ("store", "files")
+)
+validate_forecast_files = LazyLogic(
+    _FORECAST_FILE_CONTENT, "validate_forecast_files", ("store", "files")
+)
+check_new_model = LazyLogic(
+    _FORECAST_FILE_CONTENT, "check_new_model", ("store", "files")
+)
+check_forecast_retraction = LazyLogic(
+    _FORECAST_FILE_CONTENT, "check_forecast_retraction", ("store", "files")
+)
+get_all_metadata_filepaths = LazyLogic(_METADATA, "get_all_metadata_filepaths")
+validate_metadata_files = LazyLogic(_METADATA, "validate_metadata_files")
+
 # --- configurations and constants end ---
 
-def setup_validation_run_for_pull_request(project_dir: str) -> ValidationRun:
-    # load config file
-    config = os.path.join(project_dir, "project-config.json")
-    f = open(config)
-    config_dict = json.load(f)
-    f.close()
-    
+def _initial_store(project_dir: str) -> dict[str, Any]:
+    """The store entries shared by pull request and local runs."""
+    REPOSITORY_ROOT_ONDISK = (pathlib.Path(__file__)/".."/"..").resolve()
+    CACHE_DIRECTORY_ROOT = pathlib.Path(os.environ.get(
+        "HUB_VALIDATIONS_CACHE_DIR",
+        REPOSITORY_ROOT_ONDISK/".hub-validations-cache"
+    )).resolve()
+
+    # load config file; the compiled config is cached by content hash
+    compiled_config: CompiledHubConfig = load_compiled_hub_config(
+        os.path.join(project_dir, "project-config.json"),
+        cache_directory=CACHE_DIRECTORY_ROOT
+    )
+    config_dict = compiled_config.config
+
+    # per-file results are cached across runs; the cached format and value
+    # checks also depend on the locations file
+    population_dataframe_path = os.path.join(
+        project_dir, config_dict['location_filepath']
+    )
+    with open(population_dataframe_path, "rb") as population_file:
+        result_cache_config_hash = hashlib.sha256((
+            compiled_config.content_hash +
+            hashlib.sha256(population_file.read()).hexdigest()
+        ).encode("utf-8")).hexdigest()
+
+    return {
+        "VALIDATIONS_VERSION": VALIDATIONS_VERSION,
+        "REPOSITORY_ROOT_ONDISK": REPOSITORY_ROOT_ONDISK,
+        "HUB_REPOSITORY_NAME": config_dict['hub_repository_name'],
+        "HUB_MIRRORED_DIRECTORY_ROOT": (REPOSITORY_ROOT_ONDISK/"hub").resolve(),
+        "PULL_REQUEST_DIRECTORY_ROOT":  (REPOSITORY_ROOT_ONDISK/"pull_request").resolve(),
+        "POPULATION_DATAFRAME_PATH": population_dataframe_path,
+        "CACHE_DIRECTORY_ROOT": CACHE_DIRECTORY_ROOT,
+        "HUB_GIT_MIRROR_DIRECTORY": git_mirror_directory_from_environment(
+            CACHE_DIRECTORY_ROOT
+        ),
+        "result_cache": ResultCache(
+            CACHE_DIRECTORY_ROOT/"results", max_bytes_from_environment()
+        ),
+        "RESULT_CACHE_CONFIG_HASH": result_cache_config_hash,
+        "HTTP_CACHE": (
+            HTTPCache(CACHE_DIRECTORY_ROOT/"http")
+            if http_cache_enabled_from_environment() else None
+        ),
+        # shared by every GitHub API request of the process
+        "RATE_LIMIT_SCHEDULER": (
+            RateLimitScheduler()
+            if rate_limit_scheduler_enabled_from_environment() else None
+        ),
+        "FILENAME_PATTERNS": compiled_config.filename_patterns,
+        "IS_GITHUB_ACTIONS": os.environ.get("GITHUB_ACTIONS") == "true",
+        "GITHUB_TOKEN_ENVIRONMENT_VARIABLE_NAME": "GH_TOKEN",
+        "CONFIG_FILE": config_dict,
+        "COMPILED_CONFIG": compiled_config,
+        "FORECAST_DATES": compiled_config.forecast_dates,
+        "UPDATES_ALLOWED": config_dict['updates_allowed'],
+        "AUTOMERGE": config_dict['automerge_on_passed_validation'],
+        "FORECAST_FOLDER_NAME": config_dict['forecast_folder_name'],
+        "FORECAST_SCHEMA": forecast_schema(compiled_config),
+        "SUBMISSION_FORMATTING_INSTRUCTION": config_dict["submission_formatting_instruction"]
+    }
+
+def _register_pull_request_providers(
+    store: ValidationStore,
+    connect_to_hub: bool = True
+) -> None:
+    """Registers the store entries of a pull request run that are only
+    computed when a step needs them: the download of the PR files and, with
+    `connect_to_hub`, the labels, the hub tree index and the existing
+    models. A PR that changes no forecasts or metadata never downloads or
+    indexes anything."""
+    if connect_to_hub:
+        store.register_provider(
+            "possible_labels",
+            step_provider(get_possible_labels, "possible_labels")
+        )
+        store.register_provider(
+            "hub_tree_index",
+            step_provider(index_hub_repository, "hub_tree_index")
+        )
+        store.register_provider(
+            "model_names",
+            step_provider(get_all_models_from_repository, "model_names")
+        )
+    store.register_provider(
+        PULL_REQUEST_DOWNLOADS,
+        step_provider(download_all_forecast_and_metadata_files)
+    )
+
+def _pull_request_steps(connect_to_hub: bool = True) -> list[ValidationStep]:
+    """The steps of a pull request run. Without `connect_to_hub`, the step
+    that connects to GitHub is left out, and the store must provide the
+    hub_backend (see `forecast_validation.utilities.hub_backend`) and,
+    unless they are registered as providers, possible_labels,
+    hub_tree_index and model_names (see
+    `forecast_validation.worker.SharedHubState`).
+
+    Steps only declare the lazy entries (see
+    `_register_pull_request_providers()`) that they always use; the others
+    are computed if and when a step reads them."""
+    # Each step declares the store keys it reads and writes so that the run
+    # can execute independent steps concurrently.
     steps = []
    
     # Connect to GitHub
-    steps.append(ValidationStep(establish_github_connection))
+    if connect_to_hub:
+        steps.append(ValidationStep(
+            establish_github_connection,
+            writes=["github", "repository", "hub_backend"]
+        ))
 
     # Extract PR
-    steps.append(ValidationStep(extract_pull_request))
+    steps.append(ValidationStep(
+        extract_pull_request,
+        reads=["hub_backend"], writes=["pull_request"]
+    ))
 
     # Determine whether this PR is a forecast submission
-    steps.append(ValidationStep(determine_pull_request_type))
+    steps.append(ValidationStep(
+        determine_pull_request_type,
+        reads=["pull_request", "possible_labels"], writes=["filtered_files"]
+    ))
 
     # Check if the PR tries to add to/update multiple models
-    steps.append(ValidationStep(check_multiple_model_names))
+    steps.append(ValidationStep(
+        check_multiple_model_names, reads=["filtered_files"]
+    ))
 
     # Check the locations of some PR files to apply appropriate labels:
     #   other-files-updated, metadata-change
-    steps.append(ValidationStep(check_file_locations))
+    steps.append(ValidationStep(
+        check_file_locations, reads=["filtered_files", "possible_labels"]
+    ))
 
     # Check if the PR has updated existing forecasts
-    steps.append(ValidationStep(check_modified_forecasts))
+    steps.append(ValidationStep(
+        check_modified_forecasts,
+        reads=["hub_backend", "filtered_files"],
+        writes=["downloaded_existing_files", "unchanged_existing_files"]
+    ))
 
     # Check if the PR has removed existing forecasts/metadata
-    steps.append(ValidationStep(check_removed_files))
-
-    # Get all current models from hub repository
-    steps.append(ValidationStep(get_all_models_from_repository))
-
-    # Download all forecast and metadata files
-    steps.append(ValidationStep(download_all_forecast_and_metadata_files))
+    steps.append(ValidationStep(
+        check_removed_files,
+        reads=["hub_backend", "filtered_files", "possible_labels"],
+        writes=["deleted_existing_files_paths"]
+    ))
 
     # Extract filepaths for downloaded *.csv files
-    steps.append(ValidationStep(get_all_forecast_filepaths))
+    steps.append(ValidationStep(
+        get_all_forecast_filepaths,
+        reads=["filtered_files"], writes=[FORECAST_FILES_KEY]
+    ))
 
     # Extract filepaths for downloaded *.txt files
-    steps.append(ValidationStep(get_all_metadata_filepaths))
+    steps.append(ValidationStep(
+        get_all_metadata_filepaths,
+        reads=["filtered_files"], writes=["metadata_files"]
+    ))
 
     # All forecast date checks
-    steps.append(ValidationPerFileStep(filename_match_forecast_date_check))
+    steps.append(ValidationPerFileStep(
+        filename_match_forecast_date_check, parallel=True,
+        reads=[
+            PULL_REQUEST_DOWNLOADS, "downloaded_existing_files",
+            "unchanged_existing_files"
+        ]
+    ))
 
     # All forecast format and value sanity checks
-    steps.append(ValidationPerFileStep(validate_forecast_files))
+    steps.append(ValidationPerFileStep(
+        validate_forecast_files, parallel=True, cacheable=True,
+        reads=[PULL_REQUEST_DOWNLOADS]
+    ))
 
     # All metadata format and value sanity checks
-    steps.append(ValidationStep(validate_metadata_files))
+    steps.append(ValidationStep(
+        validate_metadata_files,
+        reads=[PULL_REQUEST_DOWNLOADS, "metadata_files", "hub_backend"]
+    ))
 
     # Check for new team submission
-    steps.append(ValidationPerFileStep(check_new_model))
+    steps.append(ValidationPerFileStep(
+        check_new_model,
+        reads=[PULL_REQUEST_DOWNLOADS, "filtered_files", "possible_labels"]
+    ))
 
     # Check updates/retractions
-    steps.append(ValidationPerFileStep(check_forecast_retraction))
+    steps.append(ValidationPerFileStep(
+        check_forecast_retraction, parallel=True,
+        reads=[
+            PULL_REQUEST_DOWNLOADS, "possible_labels",
+            "downloaded_existing_files", "unchanged_existing_files",
+            "deleted_existing_files_paths"
+        ]
+    ))
   
+
+    return steps
+
+def setup_validation_run_for_pull_request(
+    project_dir: str,
+    max_downloads: Optional[int] = None,
+    workers: Optional[int] = None,
+    backend: Optional[HubBackend] = None,
+    pull_request_number: Optional[int] = None
+) -> ValidationRun:
+    """Sets up the run of a pull request of the hub. The hub is read
+    through `backend` if given (e.g. an `InMemoryHubBackend` for offline
+    runs), and through GitHub otherwise; the pull request is the one of the
+    GitHub Actions event unless `pull_request_number` is given."""
     # make new validation run
-    validation_run = ValidationRun(steps)
+    validation_run = ValidationRun(
+        _pull_request_steps(connect_to_hub=backend is None), workers=workers
+    )
 
-    REPOSITORY_ROOT_ONDISK = (pathlib.Path(__file__)/".."/"..").resolve()
-    FILENAME_PATTERNS: dict[PullRequestFileType, re.Pattern] = {
-    PullRequestFileType.FORECAST:
-        re.compile(r"^%s/(.+)/\d\d\d\d-\d\d-\d\d-\1\.csv$" % config_dict['forecast_folder_name']),
-    PullRequestFileType.METADATA:
-        re.compile(r"^%s/(.+)/metadata-\1\.txt$" % config_dict['forecast_folder_name']),
-    PullRequestFileType.LICENSE:
-        re.compile(r"^%s/(.+)/LICENSE|license\.*\.txt$" % config_dict['forecast_folder_name']),
-    PullRequestFileType.MODEL_OTHER_FS:
-        re.compile(r"^%s/(.+)/.*(?<!(csv|txt))$" % config_dict['forecast_folder_name']),
-    PullRequestFileType.OTHER_FS:
-        re.compile(r"^%s/(.+)\.(csv|txt)$" % config_dict['forecast_folder_name']),
-}
     # add initial values to store
+    validation_run.store.update(_initial_store(project_dir))
+    if backend is not None:
+        validation_run.store["hub_backend"] = backend
+    if pull_request_number is not None:
+        validation_run.store["PULL_REQUEST_NUMBER"] = pull_request_number
+    validation_run.store["fetcher"] = Fetcher(
+        max_downloads or max_workers_from_environment()
+    )
+    _register_pull_request_providers(validation_run.store)
+
+    return validation_run
+
+def setup_validation_run_for_local_directory(
+    project_dir: str,
+    local_dir: str,
+    hub_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    initial_store: Optional[dict[str, Any]] = None
+) -> ValidationRun:
+    """Sets up a run that validates the files in `local_dir`, which is laid
+    out like the hub repository, against the hub checkout in `hub_dir`
+    (default: `project_dir`) without connecting to GitHub.
+
+    `initial_store` lets long-running callers load the project once, see
+    `_initial_store()`."""
+    steps = []
+
+    # Collect the submitted files in place of the PR files
+    steps.append(ValidationStep(
+        collect_local_files, writes=["filtered_files", "possible_labels"]
+    ))
+
+    # Check if the submission adds to/updates multiple models
+    steps.append(ValidationStep(
+        check_multiple_model_names, reads=["filtered_files"]
+    ))
+
+    # Check the locations of the submitted files
+    steps.append(ValidationStep(
+        check_file_locations, reads=["filtered_files", "possible_labels"]
+    ))
+
+    # Check if the submission updates existing forecasts of the checkout
+    steps.append(ValidationStep(
+        check_local_modified_forecasts,
+        reads=["filtered_files"],
+        writes=[
+            "downloaded_existing_files", "unchanged_existing_files",
+            "deleted_existing_files_paths"
+        ]
+    ))
+
+    # Extract filepaths for submitted *.csv files
+    steps.append(ValidationStep(
+        get_all_forecast_filepaths,
+        reads=["filtered_files"], writes=[FORECAST_FILES_KEY]
+    ))
+
+    # Extract filepaths for submitted *.txt files
+    steps.append(ValidationStep(
+        get_all_metadata_filepaths,
+        reads=["filtered_files"], writes=["metadata_files"]
+    ))
+
+    # All forecast date checks
+    steps.append(ValidationPerFileStep(
+        filename_match_forecast_date_check, parallel=True,
+        reads=["downloaded_existing_files", "unchanged_existing_files"]
+    ))
+
+    # All forecast format and value sanity checks
+    steps.append(ValidationPerFileStep(
+        validate_forecast_files, parallel=True, cacheable=True, reads=[]
+    ))
+
+    # All metadata format and value sanity checks
+    steps.append(ValidationStep(
+        validate_metadata_files, reads=["metadata_files"]
+    ))
+
+    # Check for new team submission
+    steps.append(ValidationPerFileStep(
+        check_new_model, reads=["filtered_files", "possible_labels"]
+    ))
+
+    # Check updates/retractions
+    steps.append(ValidationPerFileStep(
+        check_forecast_retraction, parallel=True,
+        reads=[
+            "possible_labels", "downloaded_existing_files",
+            "unchanged_existing_files", "deleted_existing_files_paths"
+        ]
+    ))
+
+    # make new validation run
+    validation_run = ValidationRun(steps, workers=workers)
+
+    # add initial values to store; the submitted files are validated in
+    # place and compared with the hub checkout
+    local_directory = pathlib.Path(local_dir).resolve()
+    validation_run.store.update(
+        initial_store if initial_store is not None
+        else _initial_store(project_dir)
+    )
     validation_run.store.update({
-        "VALIDATIONS_VERSION": VALIDATIONS_VERSION,
-        "REPOSITORY_ROOT_ONDISK": REPOSITORY_ROOT_ONDISK,
-        "HUB_REPOSITORY_NAME": config_dict['hub_repository_name'],
-        "HUB_MIRRORED_DIRECTORY_ROOT": (REPOSITORY_ROOT_ONDISK/"hub").resolve(),
-        "PULL_REQUEST_DIRECTORY_ROOT":  (REPOSITORY_ROOT_ONDISK/"pull_request").resolve(),
-        "POPULATION_DATAFRAME_PATH": os.path.join(project_dir, config_dict['location_filepath']),
-        "FILENAME_PATTERNS": FILENAME_PATTERNS,
-        "IS_GITHUB_ACTIONS": os.environ.get("GITHUB_ACTIONS") == "true",
-        "GITHUB_TOKEN_ENVIRONMENT_VARIABLE_NAME": "GH_TOKEN",
-        "CONFIG_FILE": config_dict,
-        "FORECAST_DATES": config_dict['forecast_dates'],
-        "UPDATES_ALLOWED": config_dict['updates_allowed'],
-        "AUTOMERGE": config_dict['automerge_on_passed_validation'],
-        "FORECAST_FOLDER_NAME": config_dict['forecast_folder_name'],
-        "SUBMISSION_FORMATTING_INSTRUCTION": config_dict["submission_formatting_instruction"]
+        "LOCAL_SUBMISSION_DIRECTORY": local_directory,
+        "PULL_REQUEST_DIRECTORY_ROOT": local_directory,
+        "HUB_MIRRORED_DIRECTORY_ROOT": pathlib.Path(
+            hub_dir if hub_dir is not None else project_dir
+        ).resolve()
     })
+    # existing models are only listed for submissions with forecasts
+    validation_run.store.register_provider(
+        "model_names",
+        step_provider(get_all_models_from_local_hub, "model_names")
+    )
 
     return validation_run
 
-def validate_from_pull_request(project_dir: str) -> bool:
-    validation_run: ValidationRun = setup_validation_run_for_pull_request(project_dir)
+def run_validation(
+    validation_run: ValidationRun,
+    trace_path: Optional[str] = None
+) -> None:
+    """Runs a validation run, writing a Chrome trace of it to `trace_path`
+    (default: $HUB_VALIDATIONS_TRACE) if one is given."""
+    trace_path = trace_path or os.environ.get(TRACE_ENVIRONMENT_VARIABLE)
+    if not trace_path:
+        validation_run.run()
+        return
+
+    tracer = enable_tracing()
+    try:
+        validation_run.run()
+    finally:
+        disable_tracing()
+        tracer.write(trace_path)
+
+def validate_from_pull_request(
+    project_dir: str,
+    max_downloads: Optional[int] = None,
+    workers: Optional[int] = None,
+    trace_path: Optional[str] = None
+) -> bool:
+    validation_run: ValidationRun = setup_validation_run_for_pull_request(
+        project_dir, max_downloads, workers
+    )
     
-    validation_run.run()
+    run_validation(validation_run, trace_path)
 
     return validation_run.success
+
+def validate_from_local_directory(
+    project_dir: str,
+    local_dir: str,
+    hub_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    trace_path: Optional[str] = None
+) -> bool:
+    validation_run: ValidationRun = setup_validation_run_for_local_directory(
+        project_dir, local_dir, hub_dir, workers
+    )
+
+    run_validation(validation_run, trace_path)
+
+    print(validation_run.report())
+    return validation_run.success
     
+def serve(
+    project_dir: str,
+    hub_dir: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_SERVER_PORT,
+    workers: Optional[int] = None
+) -> None:
+    """Serves local validations over HTTP until interrupted; see
+    `forecast_validation.server`."""
+    initial_store = _initial_store(project_dir)
+
+    def make_validation_run(submission_directory: pathlib.Path) -> ValidationRun:
+        return setup_validation_run_for_local_directory(
+            project_dir, submission_directory, hub_dir, workers, initial_store
+        )
+
+    server = ValidationServer(
+        (host, port), make_validation_run,
+        work_directory=initial_store["CACHE_DIRECTORY_ROOT"]/"submissions"
+    )
+    logging.getLogger("hub-validations").info(
+        "Serving validations on http://%s:%d", *server.server_address[:2]
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def setup_validation_run_for_queued_pull_request(
+    event: PullRequestEvent,
+    hub_entries: dict[str, Any],
+    run_directory: pathlib.Path,
+    workers: Optional[int] = None
+) -> ValidationRun:
+    """Sets up the run of a queued pull request on the shared hub entries of
+    a worker; the run downloads files into its own `run_directory`."""
+    validation_run = ValidationRun(
+        _pull_request_steps(connect_to_hub=False), workers=workers
+    )
+    validation_run.store.update(hub_entries)
+    validation_run.store.update({
+        "PULL_REQUEST_NUMBER": event.pull_request_number,
+        "HUB_MIRRORED_DIRECTORY_ROOT": run_directory/"hub",
+        "PULL_REQUEST_DIRECTORY_ROOT": run_directory/"pull_request"
+    })
+    _register_pull_request_providers(
+        validation_run.store, connect_to_hub=False
+    )
+    return validation_run
+
+def work(
+    project_dir: str,
+    queue_path: str,
+    concurrency: int = 4,
+    max_downloads: Optional[int] = None,
+    workers: Optional[int] = None,
+    exit_when_empty: bool = False
+) -> None:
+    """Validates the pull requests of the events queued at `queue_path` (a
+    SQLite database if it ends in .db/.sqlite, else a directory) until
+    interrupted; see `forecast_validation.worker`."""
+    queue: EventQueue = (
+        SQLiteQueue(queue_path)
+        if queue_path.endswith((".db", ".sqlite", ".sqlite3"))
+        else DirectoryQueue(queue_path)
+    )
+    # one pooled fetcher for all pull requests of the worker
+    fetcher = Fetcher(max_downloads or max_workers_from_environment())
+    hub_state = SharedHubState(
+        lambda: _initial_store(project_dir) | {"fetcher": fetcher}
+    )
+    worker = PullRequestWorker(
+        queue, hub_state,
+        lambda event, hub_entries, run_directory: (
+            setup_validation_run_for_queued_pull_request(
+                event, hub_entries, run_directory, workers
+            )
+        ),
+        work_directory=hub_state.get()["CACHE_DIRECTORY_ROOT"]/"pull_requests",
+        concurrency=concurrency
+    )
+    try:
+        counts = worker.run(exit_when_empty=exit_when_empty)
+    except KeyboardInterrupt:
+        worker.stop()
+        return
+    logging.getLogger("hub-validations").info(
+        "Processed queued pull requests: %s", counts
+    )
+
+def revalidate_hub(
+    project_dir: str,
+    output_path: str,
+    hub_dir: Optional[str] = None,
+    shard: str = "1/1",
+    workers: Optional[int] = None
+) -> bool:
+    """Revalidates the forecast and metadata files of shard `shard` ("i/N")
+    of the hub checkout in `hub_dir` (default: `project_dir`), writing one
+    result per file to `output_path`."""
+    from forecast_validation.bulk_validation import (
+        find_hub_files,
+        in_shard,
+        parse_shard,
+        revalidate_files,
+        write_result_file
+    )
+    shard_index, shard_count = parse_shard(shard)
+    store = _initial_store(project_dir)
+    store["HUB_MIRRORED_DIRECTORY_ROOT"] = pathlib.Path(
+        hub_dir if hub_dir is not None else project_dir
+    ).resolve()
+
+    files = [
+        file for file in find_hub_files(
+            store["HUB_MIRRORED_DIRECTORY_ROOT"],
+            store["FORECAST_FOLDER_NAME"],
+            store["FILENAME_PATTERNS"]
+        )
+        if in_shard(file[0], shard_index, shard_count)
+    ]
+    logging.getLogger("hub-validations").info(
+        "Revalidating %d files of shard %s", len(files), shard
+    )
+
+    failures = write_result_file(
+        revalidate_files(
+            store, files,
+            workers if workers is not None else workers_from_environment()
+        ),
+        output_path
+    )
+    print(f"{len(files) - failures} of {len(files)} files passed; results written to {output_path}")
+    return failures == 0
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Validate Pull Request (named arguments refer to config file)'
     )
     main_args = parser.add_argument_group("main arguments")
     main_args.add_argument('--project_dir', help='directory that contains config file at root and location_filepath key in your config file(default: validation-config.json)')
+    main_args.add_argument('--max_downloads', type=int, default=None, help='maximum number of concurrent file downloads (default: $HUB_VALIDATIONS_MAX_DOWNLOADS or %d)' % DEFAULT_MAX_WORKERS)
+    main_args.add_argument('--workers', type=int, default=None, help='number of processes used to validate forecast files in parallel (default: $HUB_VALIDATIONS_WORKERS or 1)')
+    main_args.add_argument('--trace', default=None, help='write a Chrome trace-event JSON of the run to this path (default: $HUB_VALIDATIONS_TRACE)')
+    local_args = parser.add_argument_group("local validation (outside of GitHub Actions)")
+    local_args.add_argument('--local_dir', help='directory of forecast and metadata files to validate, laid out like the hub repository (e.g. data-processed/<team>-<model>/...)')
+    local_args.add_argument('--hub_dir', default=None, help='local checkout of the hub repository to compare the files with (default: --project_dir)')
+    server_args = parser.add_argument_group("validation server")
+    server_args.add_argument('--serve', action='store_true', help='serve validations of submitted files over HTTP, comparing them with the hub checkout (--hub_dir)')
+    server_args.add_argument('--host', default="127.0.0.1", help='address to serve on (default: 127.0.0.1)')
+    server_args.add_argument('--port', type=int, default=DEFAULT_SERVER_PORT, help='port to serve on (default: %d)' % DEFAULT_SERVER_PORT)
+    worker_args = parser.add_argument_group("queue worker")
+    worker_args.add_argument('--queue', default=None, help='validate the pull requests of events queued in this directory or SQLite database (.db/.sqlite)')
+    worker_args.add_argument('--concurrency', type=int, default=4, help='number of pull requests validated at once by the queue worker (default: 4)')
+    worker_args.add_argument('--exit_when_empty', action='store_true', help='stop the queue worker once the queue is empty')
+    bulk_args = parser.add_argument_group("bulk revalidation of the hub checkout")
+    bulk_args.add_argument('--revalidate_all', action='store_true', help='revalidate every forecast and metadata file of the hub checkout (--hub_dir) and write the results to --output')
+    bulk_args.add_argument('--shard', default="1/1", help='only revalidate shard i of N of the files, given as i/N (default: 1/1)')
+    bulk_args.add_argument('--merge_results', nargs='+', default=None, metavar='RESULT_FILE', help='merge the result files of several shards into --output')
+    bulk_args.add_argument('--output', default=None, help='path of the (JSON lines) result file to write')
     args = parser.parse_args()
-    if os.environ.get("GITHUB_ACTIONS") == "true":
-        success =  validate_from_pull_request(args.project_dir)
+    if args.queue:
+        work(
+            args.project_dir, args.queue, args.concurrency,
+            args.max_downloads, args.workers, args.exit_when_empty
+        )
+    elif args.serve:
+        serve(args.project_dir, args.hub_dir, args.host, args.port, args.workers)
+    elif args.revalidate_all or args.merge_results:
+        if args.output is None:
+            parser.error("--output is required with --revalidate_all and --merge_results")
+        from forecast_validation.bulk_validation import (
+            merge_result_files,
+            parse_shard
+        )
+        if args.merge_results:
+            failures = merge_result_files(args.merge_results, args.output)
+            print(f"{failures} failed files; results written to {args.output}")
+            sys.exit(0 if failures == 0 else 1)
+        try:
+            parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        success = revalidate_hub(
+            args.project_dir, args.output, args.hub_dir, args.shard,
+            args.workers
+        )
+        sys.exit(0 if success else 1)
+    elif os.environ.get("GITHUB_ACTIONS") == "true":
+        success =  validate_from_pull_request(
+            args.project_dir, args.max_downloads, args.workers, args.trace
+        )
         if success:
             print("****************** success! ******************")
         else:
             sys.exit("\n Errors found during validation...")
     else:
-        # TODO: add local version
-        pass
\ No newline at end of file
+        if args.local_dir is None:
+            parser.error("--local_dir is required outside of GitHub Actions")
+        success = validate_from_local_directory(
+            args.project_dir, args.local_dir, args.hub_dir, args.workers,
+            args.trace
+        )
+        sys.exit(0 if success else 1)
@@ -0,0 +1,123 @@
+import json
+import os
+import pathlib
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation import PullRequestFileType
+from forecast_validation.bulk_validation import (
+    FORECAST_KIND,
+    METADATA_KIND,
+    BulkFileResult,
+    find_hub_files,
+    in_shard,
+    merge_result_files,
+    parse_shard,
+    read_result_file,
+    revalidate_files,
+    write_result_file
+)
+from forecast_validation.utilities.hub_config import as_compiled_hub_config
+
+FORECAST = "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+METADATA = "data-processed/teamA-modelA/metadata-teamA-modelA.txt"
+FILENAME_PATTERNS = {
+    PullRequestFileType.FORECAST:
+        re.compile(r"^data-processed/(.+)/\d\d\d\d-\d\d-\d\d-\1\.csv$"),
+    PullRequestFileType.METADATA:
+        re.compile(r"^data-processed/(.+)/metadata-\1\.txt$"),
+    PullRequestFileType.OTHER_FS:
+        re.compile(r"^data-processed/(.+)\.(csv|txt)$"),
+}
+
+
+def result(path, success=True, config_hash="config"):
+    return BulkFileResult(
+        path=path, kind=FORECAST_KIND, content_hash="hash", success=success,
+        errors=[] if success else ["bad"], config_hash=config_hash,
+        validations_version="4"
+    )
+
+
+class BulkValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.hub = self.directory/"hub"
+        for path in [FORECAST, METADATA]:
+            os.makedirs((self.hub/path).parent, exist_ok=True)
+            shutil.copy("tests/testfiles/" + path, self.hub/path)
+        (self.hub/"data-processed"/"teamA-modelA"/"notes.md").write_text("")
+        (self.hub/"data-processed"/"misplaced.csv").write_text("")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for shard in ["0/4", "5/4", "2", "a/b"]:
+            with self.assertRaises(ValueError):
+                parse_shard(shard)
+
+    def test_shards_partition_files(self):
+        paths = [f"data-processed/team-model/{i}.csv" for i in range(200)]
+        shards = [
+            {p for p in paths if in_shard(p, i, 3)} for i in range(1, 4)
+        ]
+        self.assertEqual(sum(len(s) for s in shards), len(paths))
+        self.assertEqual(set.union(*shards), set(paths))
+        self.assertTrue(all(shards))
+
+    def test_find_hub_files(self):
+        self.assertEqual(
+            find_hub_files(self.hub, "data-processed", FILENAME_PATTERNS),
+            [(FORECAST, FORECAST_KIND), (METADATA, METADATA_KIND)]
+        )
+
+    def test_revalidate_forecast(self):
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            config = json.load(f)
+        store = {
+            "HUB_MIRRORED_DIRECTORY_ROOT": self.hub,
+            "POPULATION_DATAFRAME_PATH": "forecast_validation/static/locations.csv",
+            "COMPILED_CONFIG": as_compiled_hub_config(config),
+            "RESULT_CACHE_CONFIG_HASH": "config",
+            "VALIDATIONS_VERSION": 4
+        }
+        (forecast_result,) = revalidate_files(store, [(FORECAST, FORECAST_KIND)])
+        self.assertEqual(forecast_result.path, FORECAST)
+        self.assertTrue(forecast_result.success, forecast_result.errors)
+        self.assertEqual(forecast_result.config_hash, "config")
+        self.assertEqual(forecast_result.validations_version, "4")
+
+    def test_merge_result_files(self):
+        write_result_file([result("b.csv"), result("a.csv")], self.directory/"1.jsonl")
+        write_result_file([result("c.csv", success=False)], self.directory/"2.jsonl")
+
+        failures = merge_result_files(
+            [self.directory/"1.jsonl", self.directory/"2.jsonl"],
+            self.directory/"all.jsonl"
+        )
+
+        self.assertEqual(failures, 1)
+        self.assertEqual(
+            [r.path for r in read_result_file(self.directory/"all.jsonl")],
+            ["a.csv", "b.csv", "c.csv"]
+        )
+
+    def test_merge_result_files_of_different_configs_raises(self):
+        write_result_file([result("a.csv")], self.directory/"1.jsonl")
+        write_result_file([result("b.csv", config_hash="other")], self.directory/"2.jsonl")
+
+        with self.assertRaises(ValueError):
+            merge_result_files(
+                [self.directory/"1.jsonl", self.directory/"2.jsonl"],
+                self.directory/"all.jsonl"
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import pandas as pd
+
+from forecast_validation.checks.chunked import (
+    chunk_rows_for,
+    count_column_values,
+    validate_forecast_file_in_chunks
+)
+from forecast_validation.checks.forecast_diff import (
+    RowChange,
+    diff_forecast_files,
+    diff_forecasts
+)
+from forecast_validation.checks.forecast_file_content import (
+    validate_forecast_values
+)
+from forecast_validation.checks.quantile_csv import validate_quantile_csv_file
+from forecast_validation.utilities.forecast_frames import read_forecast_frame
+from forecast_validation.utilities.hub_config import as_compiled_hub_config
+from forecast_validation.utilities.population_index import (
+    load_population_index
+)
+
+FORECAST = "tests/testfiles/data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+CONFIG = "tests/testfiles/covid-validation-config.json"
+LOCATIONS = "forecast_validation/static/locations.csv"
+
+
+class ChunkedValidationTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        with open(CONFIG) as config_file:
+            self.config = as_compiled_hub_config(json.load(config_file))
+        self.population = load_population_index(LOCATIONS)
+        self.frame = pd.read_csv(FORECAST, dtype=str)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _write(self, frame, name="forecast.csv"):
+        path = os.path.join(self.tmp, name)
+        frame.to_csv(path, index=False)
+        return path
+
+    def _assert_same_as_whole(self, path):
+        whole = read_forecast_frame(path)
+        for chunk_rows in (1, 5, 1000):
+            self.assertEqual(
+                validate_forecast_file_in_chunks(
+                    path, self.config, self.population, chunk_rows
+                ),
+                (
+                    validate_quantile_csv_file(whole, self.config),
+                    validate_forecast_values(whole, self.population)
+                )
+            )
+
+    def test_valid_file(self):
+        path = self._write(self.frame)
+        self.assertEqual(
+            validate_forecast_file_in_chunks(
+                path, self.config, self.population, 5
+            ),
+            ("no errors", None)
+        )
+
+    def test_errors_spanning_chunks(self):
+        # decimal values, so that no chunk infers an integer value column
+        frame = self.frame.assign(
+            value=self.frame["value"].astype(float).astype(str)
+        )
+        frame.loc[[2, 13], "target"] = "bad target"
+        frame.loc[[4, 20], "location"] = "ZZ"
+        frame.loc[7, "value"] = "1e12"
+        # decreasing values across the boundary of two chunks
+        frame.loc[11, "value"] = "3.0"
+        # duplicates of rows in earlier chunks
+        frame = pd.concat([frame, frame.iloc[[1, 8]]], ignore_index=True)
+        self._assert_same_as_whole(self._write(frame))
+
+    def test_monotonicity_message(self):
+        frame = self.frame.copy()
+        frame.loc[3, "value"] = "0.5"
+        format_result, _ = validate_forecast_file_in_chunks(
+            self._write(frame), self.config, self.population, 5
+        )
+        self.assertEqual(format_result, [
+            "Entries in `value` must be non-decreasing as quantiles "
+            "increase. row=['2021-11-29', '1 wk ahead inc death', "
+            "'2021-12-04', 'US', 'quantile', 0.05, 0.5]"
+        ])
+
+    def test_header_error(self):
+        path = self._write(self.frame.drop(columns=["quantile"]))
+        format_result, value_error = validate_forecast_file_in_chunks(
+            path, self.config, self.population, 5
+        )
+        self.assertEqual(len(format_result), 1)
+        self.assertIn("invalid header", format_result[0])
+        self.assertIsNone(value_error)
+
+    def test_count_column_values(self):
+        frame = self.frame.copy()
+        frame.loc[[3, 17], "forecast_date"] = "2021-11-30"
+        path = self._write(frame)
+        self.assertEqual(
+            count_column_values(path, "forecast_date", 5).to_dict(),
+            {"2021-11-29": len(frame) - 2, "2021-11-30": 2}
+        )
+        self.assertIsNone(count_column_values(path, "missing", 5))
+
+    def test_diff_forecast_files(self):
+        new = self.frame.copy()
+        new.loc[0, "value"] = "1"
+        new.loc[1, "value"] = None
+        new = new.drop(index=2).iloc[::-1]
+        old_path = self._write(self.frame, "old.csv")
+        new_path = self._write(new, "new.csv")
+
+        whole = diff_forecasts(
+            read_forecast_frame(old_path), read_forecast_frame(new_path)
+        )
+        chunked = diff_forecast_files(old_path, new_path, 5)
+        self.assertEqual(chunked.counts, whole.counts)
+        self.assertEqual(chunked.counts[RowChange.CHANGED], 1)
+        self.assertEqual(chunked.counts[RowChange.EXPLICITLY_RETRACTED], 1)
+        self.assertEqual(chunked.counts[RowChange.IMPLICITLY_RETRACTED], 1)
+        self.assertEqual(
+            chunked.examples[RowChange.IMPLICITLY_RETRACTED][0][:4],
+            self.frame.iloc[2].tolist()[:4]
+        )
+        self.assertTrue(diff_forecast_files(old_path, old_path, 5).identical)
+
+    def test_chunk_rows_for(self):
+        path = self._write(self.frame)
+        self.assertIsNone(chunk_rows_for(
+            {"FORECAST_MEMORY_LIMIT": 1024 * 1024 * 1024}, path
+        ))
+        self.assertEqual(chunk_rows_for(
+            {"FORECAST_MEMORY_LIMIT": 0, "FORECAST_CHUNK_ROWS": 7}, path
+        ), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
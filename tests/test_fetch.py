@@ -0,0 +1,81 @@
+import http.server
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+
+from forecast_validation.utilities.fetch import Fetcher
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    failures_left = {}
+
+    def do_GET(self):
+        failures = FlakyHandler.failures_left.get(self.path, 0)
+        if failures > 0:
+            FlakyHandler.failures_left[self.path] = failures - 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FetcherTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+        cls.url = "http://127.0.0.1:%d" % cls.server.server_address[1]
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.fetcher = Fetcher(max_workers=4, backoff_factor=0)
+
+    def tearDown(self):
+        self.fetcher.close()
+        shutil.rmtree(self.directory)
+
+    def test_fetch_all_keeps_input_order(self):
+        paths = self.fetcher.fetch_all(
+            (f"{self.url}/file-{i}", self.directory/"nested"/f"file-{i}.csv")
+            for i in range(10)
+        )
+        self.assertEqual(
+            [path.read_text() for path in paths],
+            [f"/file-{i}" for i in range(10)]
+        )
+
+    def test_retries_server_errors(self):
+        FlakyHandler.failures_left["/flaky"] = 2
+        path = self.fetcher.fetch(f"{self.url}/flaky", self.directory/"flaky.csv")
+        self.assertEqual(path.read_text(), "/flaky")
+
+    def test_failed_download_leaves_no_file(self):
+        with self.assertRaises(requests.HTTPError):
+            self.fetcher.fetch(f"{self.url}/missing", self.directory/"missing.csv")
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,10 +6,17 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from forecast_validation import PullRequestFileType
 from forecast_validation.validation_logic.forecast_file_content import validate_forecast_files
 from forecast_validation.validation_logic.forecast_file_content import filename_match_forecast_date_check
+from forecast_validation.validation_logic.forecast_file_content import check_forecast_retraction
+from forecast_validation.validation_logic.forecast_file_type import check_modified_forecasts
+from forecast_validation.checks.forecast_file_content import check_distinct_dates
 from unittest.mock import MagicMock
 import re
 import json
 import datetime
+import pathlib
+import shutil
+import tempfile
+import pandas as pd
 import pytz
 
 class ValidationFileContentTest(unittest.TestCase):
@@ -131,6 +138,122 @@ class TestWithSetupForFlu(ValidationFileContentTest):
                 success = self.late_submission(self.HUB_REPOSITORY_NAME, "data-forecasts/teamA-modelA/"+self.early+"-teamA-modelA.csv")
                 self.a_late_submission(success)
                 
+class TestForecastDateCheck(unittest.TestCase):
+
+        def setUp(self):
+                self.directory = tempfile.mkdtemp()
+                self.pull_request_directory = pathlib.Path(self.directory)/"pull_request"
+                self.hub_directory = pathlib.Path(self.directory)/"hub"
+                self.store = {
+                        "FORECAST_DATES": [],
+                        "HUB_REPOSITORY_NAME": "cdcepi/Flusight-forecast-data",
+                        "HUB_MIRRORED_DIRECTORY_ROOT": self.hub_directory,
+                        "PULL_REQUEST_DIRECTORY_ROOT": self.pull_request_directory,
+                }
+
+        def tearDown(self):
+                shutil.rmtree(self.directory)
+
+        def write_forecast(self, filename_date, forecast_dates):
+                path = self.pull_request_directory/"data-forecasts"/"teamA-modelA"/(filename_date + "-teamA-modelA.csv")
+                os.makedirs(path.parent)
+                pd.DataFrame({
+                        "forecast_date": forecast_dates,
+                        "value": range(len(forecast_dates))
+                }).to_csv(path, index=False)
+                return path
+
+        def test_check_distinct_dates_counts_rows(self):
+                results = check_distinct_dates(pd.Series(["2021-11-29"] * 5 + ["2021-11-5"] * 2))
+                by_value = {r.value: r for r in results}
+                self.assertEqual(by_value["2021-11-29"].row_count, 5)
+                self.assertEqual(by_value["2021-11-29"].date, datetime.date(2021, 11, 29))
+                self.assertIsNone(by_value["2021-11-29"].format_error)
+                self.assertEqual(by_value["2021-11-5"].row_count, 2)
+                self.assertIn("must have 2-digit day", by_value["2021-11-5"].format_error)
+
+        def test_matching_dates(self):
+                today = str(datetime.datetime.now(pytz.timezone('US/Eastern')).date())
+                path = self.write_forecast(today, [today] * 1000)
+                result = filename_match_forecast_date_check(self.store, {path})
+                self.assertTrue(result.success, result.file_errors)
+
+        def test_bad_dates_are_reported_once_per_distinct_value(self):
+                today = str(datetime.datetime.now(pytz.timezone('US/Eastern')).date())
+                path = self.write_forecast(today, [today] * 10 + ["2021-13-01"] * 20)
+                result = filename_match_forecast_date_check(self.store, {path})
+                self.assertFalse(result.success)
+                errors = list(result.file_errors.values())[0]
+                self.assertEqual(len(errors), 1)
+                self.assertIn("not parseable", errors[0])
+                self.assertIn("(in 20 row(s))", errors[0])
+
+        def test_multiple_forecast_dates(self):
+                today = datetime.datetime.now(pytz.timezone('US/Eastern')).date()
+                other = today - datetime.timedelta(days=7)
+                path = self.write_forecast(str(today), [str(today), str(other)])
+                result = filename_match_forecast_date_check(self.store, {path})
+                self.assertFalse(result.success)
+                errors = list(result.file_errors.values())[0]
+                self.assertTrue(any("multiple forecast dates" in e for e in errors))
+                self.assertTrue(any("does not match" in e for e in errors))
+
+        def test_old_forecast_date_allowed_for_unchanged_existing_file(self):
+                path = self.write_forecast("2021-11-29", ["2021-11-29"] * 3)
+                self.store["unchanged_existing_files"] = {
+                        "data-forecasts/teamA-modelA/2021-11-29-teamA-modelA.csv"
+                }
+                result = filename_match_forecast_date_check(self.store, {path})
+                self.assertTrue(result.success, result.file_errors)
+
+
+class TestUnchangedForecastShortCircuit(unittest.TestCase):
+
+        filename = "data-forecasts/teamA-modelA/2021-11-29-teamA-modelA.csv"
+
+        def setUp(self):
+                self.directory = pathlib.Path(tempfile.mkdtemp())
+                self.repository = MagicMock()
+                self.repository.get_git_tree.return_value.tree = [
+                        MagicMock(path=self.filename, sha="abc123")
+                ]
+                self.store = {
+                        "repository": self.repository,
+                        "HUB_MIRRORED_DIRECTORY_ROOT": self.directory/"hub",
+                        "PULL_REQUEST_DIRECTORY_ROOT": self.directory/"pull_request",
+                        "UPDATES_ALLOWED": True,
+                        "deleted_existing_files_paths": set(),
+                        "possible_labels": {
+                                name: name for name in [
+                                        "duplicate-forecast", "forecast-updated",
+                                        "forecast-retraction", "forecast-implicit-retractions"
+                                ]
+                        },
+                }
+
+        def tearDown(self):
+                shutil.rmtree(self.directory)
+
+        def check_modified(self, sha):
+                self.store["filtered_files"] = {PullRequestFileType.FORECAST: [
+                        MagicMock(filename=self.filename, status="modified", sha=sha)
+                ]}
+                return check_modified_forecasts(self.store)
+
+        def test_identical_blob_is_not_downloaded(self):
+                result = self.check_modified("abc123")
+                self.assertEqual(result.to_store["unchanged_existing_files"], {self.filename})
+                self.assertEqual(result.to_store["downloaded_existing_files"], set())
+                self.repository.get_git_blob.assert_not_called()
+
+        def test_identical_blob_is_reported_as_duplicate(self):
+                self.store["unchanged_existing_files"] = {self.filename}
+                result = check_forecast_retraction(
+                        self.store, {self.store["PULL_REQUEST_DIRECTORY_ROOT"]/self.filename}
+                )
+                self.assertFalse(result.success)
+                self.assertEqual(result.labels, {"duplicate-forecast"})
+
 
 if __name__ == '__main__':
     unittest.main()
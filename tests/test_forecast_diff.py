@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.checks.forecast_diff import (
+    RowChange,
+    diff_forecasts,
+    forecast_fingerprint
+)
+from forecast_validation.utilities.forecast_frames import read_forecast_frame
+
+ORIGINAL_FORECAST = "tests/testfiles/data-processed/teamA-modelA/forecast_content-original_forecast.csv"
+
+
+class ForecastDiffTest(unittest.TestCase):
+    def setUp(self):
+        self.old = read_forecast_frame(ORIGINAL_FORECAST)
+
+    def test_fingerprint_ignores_row_order(self):
+        shuffled = self.old.iloc[::-1].reset_index(drop=True)
+        self.assertEqual(
+            forecast_fingerprint(self.old), forecast_fingerprint(shuffled)
+        )
+        diff = diff_forecasts(self.old, shuffled)
+        self.assertTrue(diff.identical)
+        self.assertEqual(diff.counts[RowChange.UNCHANGED], len(self.old))
+
+    def test_classifies_each_row(self):
+        new = self.old.copy()
+        new.loc[0, "value"] = new.loc[0, "value"] + 1
+        new.loc[1, "value"] = np.nan
+        new = new.drop(index=2)
+        added = self.old.iloc[[3]].assign(location="XX")
+        new = pd.concat([new, added])
+
+        diff = diff_forecasts(self.old, new)
+        self.assertFalse(diff.identical)
+        self.assertEqual(diff.counts[RowChange.CHANGED], 1)
+        self.assertEqual(diff.counts[RowChange.EXPLICITLY_RETRACTED], 1)
+        self.assertEqual(diff.counts[RowChange.IMPLICITLY_RETRACTED], 1)
+        self.assertEqual(diff.counts[RowChange.ADDED], 1)
+        self.assertEqual(
+            diff.counts[RowChange.UNCHANGED], len(self.old) - 3
+        )
+        self.assertEqual(diff.old_row_count, len(self.old))
+        self.assertEqual(
+            diff.examples[RowChange.IMPLICITLY_RETRACTED][0][:6],
+            self.old.iloc[2][:6].tolist()
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities.forecast_frames import (
+    ForecastFrameCache,
+    forecast_schema,
+    get_forecast_frame,
+    read_forecast_frame
+)
+from forecast_validation.utilities.hub_config import compile_hub_config
+
+FORECAST_FILE = "tests/testfiles/data-processed/teamA-modelA/forecast_content-original_forecast.csv"
+DUPLICATE_FILE = "tests/testfiles/data-processed/teamA-modelA/forecast_content-duplicate.csv"
+
+
+class ForecastFrameCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = pathlib.Path(self.directory)/"2021-03-29-teamA-modelA.csv"
+        shutil.copy(FORECAST_FILE, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_file_is_parsed_once(self):
+        cache = ForecastFrameCache()
+        first = cache.get(self.path)
+        second = cache.get(self.path)
+        self.assertIs(first, second)
+        self.assertEqual(cache.parse_count, 1)
+
+    def test_location_is_read_as_string(self):
+        frame = ForecastFrameCache().get(self.path)
+        self.assertEqual(frame["location"].iloc[0], "US")
+        self.assertTrue(all(isinstance(l, str) for l in frame["location"]))
+
+    def test_changed_content_is_parsed_again(self):
+        cache = ForecastFrameCache()
+        first = cache.get(self.path)
+        shutil.copy(DUPLICATE_FILE, self.path)
+        second = cache.get(self.path)
+        self.assertIsNot(first, second)
+        self.assertEqual(cache.parse_count, 2)
+
+    def test_identical_content_shares_one_frame(self):
+        other = pathlib.Path(self.directory)/"copy.csv"
+        shutil.copy(FORECAST_FILE, other)
+        cache = ForecastFrameCache()
+        self.assertIs(cache.get(self.path), cache.get(other))
+        self.assertEqual(cache.parse_count, 1)
+
+    def test_frame_is_evicted_after_last_consumer(self):
+        cache = ForecastFrameCache()
+        cache.retain([self.path], 2)
+        cache.get(self.path)
+        cache.release([self.path])
+        cache.release_transient()
+        self.assertIn(self.path, cache)
+        cache.release([self.path])
+        self.assertNotIn(self.path, cache)
+
+    def test_unregistered_frame_is_transient(self):
+        cache = ForecastFrameCache()
+        cache.get(self.path)
+        self.assertIn(self.path, cache)
+        cache.release_transient()
+        self.assertNotIn(self.path, cache)
+
+    def test_get_forecast_frame_without_cache_reads_file(self):
+        frame = get_forecast_frame({}, self.path)
+        self.assertEqual(len(frame), 192)
+
+
+class ForecastSchemaTest(unittest.TestCase):
+    def setUp(self):
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            self.config = compile_hub_config(json.load(f))
+        self.frame = read_forecast_frame(
+            FORECAST_FILE, forecast_schema(self.config)
+        )
+
+    def test_codes_follow_the_config_vocabularies(self):
+        self.assertEqual(
+            self.frame["location"].cat.codes.iloc[0],
+            self.config.location_index["US"]
+        )
+        quantile_rows = self.frame["type"] == "quantile"
+        self.assertEqual(
+            self.frame.loc[quantile_rows, "quantile"].cat.codes.tolist(),
+            [
+                self.config.quantile_slots[q] for q in
+                self.frame.loc[quantile_rows, "quantile"].astype(float)
+            ]
+        )
+
+    def test_values_outside_the_vocabularies_are_kept(self):
+        path = pathlib.Path(tempfile.mkdtemp())/"forecast.csv"
+        try:
+            with open(FORECAST_FILE) as source:
+                path.write_text(source.read().replace(",US,", ",ZZ,", 1))
+            frame = read_forecast_frame(path, forecast_schema(self.config))
+        finally:
+            shutil.rmtree(path.parent)
+        self.assertEqual(frame["location"].iloc[0], "ZZ")
+        self.assertEqual(frame["location"].cat.categories[-1], "ZZ")
+
+
+if __name__ == '__main__':
+    unittest.main()
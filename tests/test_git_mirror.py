@@ -0,0 +1,141 @@
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities.git_mirror import (
+    GitMirrorError,
+    LocalGitMirror,
+    git_mirror_directory_from_environment
+)
+from forecast_validation.utilities.github import (
+    get_existing_forecast_file,
+    get_existing_models
+)
+from forecast_validation.utilities.hub_backend import GitHubBackend
+
+FORECAST = "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+
+
+def git(directory, *args):
+    return subprocess.run(
+        [
+            "git", "-c", "user.name=hub", "-c", "user.email=hub@example.com",
+            *args
+        ],
+        cwd=directory, check=True, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    ).stdout.decode("utf-8").strip()
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class LocalGitMirrorTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        self.hub = self.tmp/"hub"
+        self.hub.mkdir()
+        git(self.hub, "init", "--quiet", "--initial-branch=master")
+        git(self.hub, "config", "uploadpack.allowFilter", "true")
+        self._commit({
+            FORECAST: "forecast_date,value\n2021-11-29,1\n",
+            "data-processed/teamA-modelA/metadata-teamA-modelA.txt": "a\n",
+            "data-processed/teamB-modelB/metadata-teamB-modelB.txt": "b\n",
+            "README.md": "hub\n",
+        })
+        self.mirror = LocalGitMirror(
+            self.tmp/"cache"/"hub.git", self.hub.as_uri()
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _commit(self, files):
+        for path, content in files.items():
+            os.makedirs((self.hub/path).parent, exist_ok=True)
+            (self.hub/path).write_text(content)
+        git(self.hub, "add", "-A")
+        git(self.hub, "commit", "--quiet", "-m", "update")
+        return git(self.hub, "rev-parse", "HEAD")
+
+    def test_index(self):
+        commit_sha = self.mirror.update()
+        self.assertEqual(commit_sha, git(self.hub, "rev-parse", "HEAD"))
+        index = self.mirror.tree_index(commit_sha)
+        self.assertEqual(index.commit_sha, commit_sha)
+        self.assertEqual(index.get("data-processed").type, "tree")
+        self.assertEqual(
+            sorted(index.children("data-processed", "tree")),
+            ["teamA-modelA", "teamB-modelB"]
+        )
+        self.assertEqual(
+            get_existing_models(None, "data-processed", index),
+            {"teamA-modelA", "teamB-modelB"}
+        )
+        self.assertEqual(
+            index.read_blob(index.blob_sha(FORECAST)),
+            b"forecast_date,value\n2021-11-29,1\n"
+        )
+
+    def test_incremental_update(self):
+        first_sha = self.mirror.update()
+        second_sha = self._commit({FORECAST: "forecast_date,value\n"})
+        self.assertEqual(self.mirror.update(), second_sha)
+        self.assertEqual(
+            self.mirror.read_blob(
+                self.mirror.tree_index(second_sha).blob_sha(FORECAST)
+            ),
+            b"forecast_date,value\n"
+        )
+        # earlier commits stay indexable
+        self.assertIsNotNone(
+            self.mirror.tree_index(first_sha).blob_sha(FORECAST)
+        )
+
+    def test_existing_file_is_read_locally(self):
+        index = self.mirror.tree_index(self.mirror.update())
+        repository = MagicMock()
+        local_path = get_existing_forecast_file(
+            repository, MagicMock(filename=FORECAST), self.tmp/"existing",
+            index
+        )
+        with open(local_path) as local_file:
+            self.assertEqual(local_file.readline(), "forecast_date,value\n")
+        repository.get_git_blob.assert_not_called()
+
+    def test_missing_remote(self):
+        mirror = LocalGitMirror(
+            self.tmp/"other.git", (self.tmp/"missing").as_uri()
+        )
+        with self.assertRaises(GitMirrorError):
+            mirror.update()
+
+    def test_falls_back_to_the_api(self):
+        repository = MagicMock()
+        mirror = LocalGitMirror(
+            self.tmp/"other.git", (self.tmp/"missing").as_uri()
+        )
+        with patch(
+            "forecast_validation.utilities.hub_backend"
+            ".HubTreeIndex.from_repository"
+        ) as from_repository:
+            GitHubBackend(repository, mirror).get_tree_index()
+        from_repository.assert_called_once_with(repository, "master", None)
+
+    def test_directory_from_environment(self):
+        for value, expected in [
+            ("", None), ("0", None), ("true", self.tmp/"hub.git"),
+            ("/srv/hub.git", pathlib.Path("/srv/hub.git"))
+        ]:
+            with patch.dict(os.environ, {"HUB_VALIDATIONS_GIT_MIRROR": value}):
+                self.assertEqual(
+                    git_mirror_directory_from_environment(self.tmp), expected
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
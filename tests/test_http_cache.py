@@ -0,0 +1,111 @@
+import http.server
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from github import Github
+
+from forecast_validation.utilities.http_cache import (
+    HTTPCache,
+    enable_http_cache
+)
+
+
+class LabelsHandler(http.server.BaseHTTPRequestHandler):
+    # set by the test: the label names served, their ETag and the
+    # If-None-Match header of every request received
+    labels = []
+    etag = ""
+    requests = []
+
+    def do_GET(self):
+        LabelsHandler.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.etag)
+            self.send_header("X-RateLimit-Remaining", "4999")
+            self.end_headers()
+            return
+        body = json.dumps([{"name": name} for name in self.labels]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HTTPCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        LabelsHandler.labels = ["automerge", "code"]
+        LabelsHandler.etag = '"v1"'
+        LabelsHandler.requests = []
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), LabelsHandler
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def labels(self, cache):
+        github = Github(
+            base_url="http://127.0.0.1:%d" % self.server.server_address[1],
+            seconds_between_requests=0, retry=0, lazy=True
+        )
+        self.assertTrue(enable_http_cache(github, cache))
+        repository = github.get_repo("owner/hub")
+        return [label.name for label in repository.get_labels()]
+
+    def test_conditional_requests(self):
+        cache = HTTPCache(self.directory, ttls=())
+        self.assertEqual(self.labels(cache), ["automerge", "code"])
+        # a new client (e.g. the next run) revalidates the cached response
+        self.assertEqual(self.labels(cache), ["automerge", "code"])
+        self.assertEqual(LabelsHandler.requests, [None, '"v1"'])
+        self.assertEqual(cache.counts, {"fetched": 1, "revalidated": 1})
+
+        LabelsHandler.labels = ["code"]
+        LabelsHandler.etag = '"v2"'
+        self.assertEqual(self.labels(cache), ["code"])
+        self.assertEqual(self.labels(cache), ["code"])
+        self.assertEqual(LabelsHandler.requests[2:], ['"v1"', '"v2"'])
+
+    def test_ttl(self):
+        cache = HTTPCache(self.directory, ttls=((r"/labels$", 3600.0),))
+        self.labels(cache)
+        LabelsHandler.labels = ["code"]
+        LabelsHandler.etag = '"v2"'
+        # still fresh: answered without a request
+        self.assertEqual(self.labels(cache), ["automerge", "code"])
+        self.assertEqual(LabelsHandler.requests, [None])
+        self.assertEqual(cache.counts["fresh"], 1)
+
+    def test_ttl_by_endpoint(self):
+        cache = HTTPCache(self.directory)
+        self.assertEqual(cache.ttl(
+            "https://api.github.com/repos/o/r/git/blobs/" + "a" * 40
+        ), float("inf"))
+        self.assertEqual(
+            cache.ttl("https://api.github.com/repos/o/r/labels"), 600.0
+        )
+        self.assertEqual(
+            cache.ttl("https://api.github.com/repos/o/r/git/ref/heads/master"),
+            0.0
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import main
+from forecast_validation.utilities.git_mirror import LocalGitMirror
+from forecast_validation.utilities.hub_backend import (
+    GitHubBackend,
+    HubFile,
+    InMemoryHubBackend,
+    LocalGitBackend,
+    git_blob_sha
+)
+
+FORECAST = "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+METADATA = "data-processed/teamA-modelA/metadata-teamA-modelA.txt"
+
+
+def read_testfile(path):
+    with open(os.path.join("tests/testfiles", path), "rb") as f:
+        return f.read()
+
+
+def updated_forecast():
+    lines = read_testfile(FORECAST).decode("utf-8").splitlines(True)
+    lines[1] = lines[1].rsplit(",", 1)[0] + ",12345\n"
+    return "".join(lines).encode("utf-8")
+
+
+class InMemoryHubBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.backend = InMemoryHubBackend(
+            {FORECAST: b"old", METADATA: b"meta", "README.md": b"readme"},
+            {
+                1: {FORECAST: b"new", "README.md": None, "code/a.py": b""},
+                2: {FORECAST: b"old"},
+            },
+            latency={"read_blob": 0.5},
+            sleep=self.sleeps.append
+        )
+
+    def test_pull_request_files(self):
+        self.assertEqual(self.backend.list_pull_requests(), [1, 2])
+        self.assertEqual(
+            self.backend.get_pull_request(1).get_files(),
+            [
+                HubFile("README.md", "removed", git_blob_sha(b"readme")),
+                HubFile("code/a.py", "added", git_blob_sha(b"")),
+                HubFile(FORECAST, "modified", git_blob_sha(b"new")),
+            ]
+        )
+        # an unchanged file is not part of the pull request
+        self.assertEqual(self.backend.pull_request_files(2), [])
+
+    def test_git_blob_sha(self):
+        self.assertEqual(
+            git_blob_sha(b""), "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391"
+        )
+
+    def test_tree_index(self):
+        index = self.backend.get_tree_index()
+        self.assertEqual(index.children("data-processed"), ["teamA-modelA"])
+        self.assertEqual(index.get(FORECAST).size, 3)
+        self.assertEqual(index.read_blob(index.blob_sha(FORECAST)), b"old")
+
+        old_sha = index.commit_sha
+        new_sha = self.backend.commit({"README.md": None})
+        self.assertNotEqual(new_sha, old_sha)
+        self.assertEqual(self.backend.get_branch_sha(), new_sha)
+        self.assertNotIn("README.md", self.backend.get_tree_index())
+        self.assertIn("README.md", self.backend.get_tree_index(
+            commit_sha=old_sha
+        ))
+
+    def test_latency_and_calls(self):
+        self.backend.read_blob(git_blob_sha(b"old"))
+        self.backend.get_labels()
+        self.assertEqual(self.sleeps, [0.5])
+        self.assertEqual(self.backend.calls["read_blob"], 1)
+        self.assertEqual(self.backend.calls["get_labels"], 1)
+
+    def test_labels_and_comments(self):
+        pull_request = self.backend.get_pull_request(1)
+        labels = {label.name: label for label in self.backend.get_labels()}
+        pull_request.set_labels(labels["code"], labels["other-files-updated"])
+        pull_request.create_issue_comment("hello")
+        self.assertEqual(
+            self.backend.applied_labels, {1: {"code", "other-files-updated"}}
+        )
+        self.assertEqual(self.backend.comments[1], ["hello"])
+
+
+class GitHubBackendTest(unittest.TestCase):
+    def test_writes_reuse_the_pull_request(self):
+        repository = MagicMock()
+        backend = GitHubBackend(repository)
+        pull_request = backend.get_pull_request(3)
+
+        backend.pull_request_files(3)
+        backend.set_labels(3, ["code"])
+        backend.create_comment(3, "hello")
+
+        repository.get_pull.assert_called_once_with(3)
+        pull_request.set_labels.assert_called_once_with("code")
+        pull_request.create_issue_comment.assert_called_once_with("hello")
+
+    def test_tree_index_reads_blobs_through_the_backend(self):
+        repository = MagicMock()
+        backend = GitHubBackend(repository)
+        with patch(
+            "forecast_validation.utilities.hub_backend"
+            ".HubTreeIndex.from_repository"
+        ):
+            index = backend.get_tree_index()
+        self.assertEqual(index.read_blob, backend.read_blob)
+
+
+class OfflinePullRequestRunTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            config = json.load(f)
+        config["submission_formatting_instruction"] = "https://example.com"
+        with open(self.tmp/"project-config.json", "w") as f:
+            json.dump(config, f)
+        os.makedirs(self.tmp/"data-locations")
+        shutil.copy(
+            "forecast_validation/static/locations.csv",
+            self.tmp/"data-locations"/"locations.csv"
+        )
+        environment = patch.dict(
+            os.environ, {"HUB_VALIDATIONS_CACHE_DIR": str(self.tmp/"cache")}
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def run_pull_request(self, backend, number):
+        validation_run = main.setup_validation_run_for_pull_request(
+            str(self.tmp), backend=backend, pull_request_number=number
+        )
+        validation_run.store["HUB_MIRRORED_DIRECTORY_ROOT"] = (
+            self.tmp/f"run-{number}"/"hub"
+        )
+        validation_run.store["PULL_REQUEST_DIRECTORY_ROOT"] = (
+            self.tmp/f"run-{number}"/"pull_request"
+        )
+        validation_run.run()
+        return validation_run
+
+    def test_runs_without_github(self):
+        backend = InMemoryHubBackend(
+            {
+                FORECAST: read_testfile(FORECAST),
+                METADATA: read_testfile(METADATA),
+                "README.md": b"hub",
+            },
+            {1: {"README.md": b"notes"}, 2: {FORECAST: updated_forecast()}}
+        )
+
+        self.assertTrue(self.run_pull_request(backend, 1).success)
+        self.assertEqual(backend.applied_labels[1], {"other-files-updated"})
+        self.assertNotIn(1, backend.comments)
+
+        self.assertTrue(self.run_pull_request(backend, 2).success)
+        self.assertEqual(
+            backend.applied_labels[2],
+            {"data-submission", "forecast-updated", "passed-validation"}
+        )
+        self.assertIn("No validation errors", backend.comments[2][0])
+
+
+def git(directory, *args):
+    return subprocess.run(
+        [
+            "git", "-c", "user.name=hub", "-c", "user.email=hub@example.com",
+            *args
+        ],
+        cwd=directory, check=True, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    ).stdout.decode("utf-8").strip()
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class LocalGitBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        self.hub = self.tmp/"hub"
+        self.hub.mkdir()
+        git(self.hub, "init", "--quiet", "--initial-branch=master")
+        self._commit({FORECAST: "old\n", "README.md": "hub\n"})
+        # a pull request branched off master, which moves on afterwards
+        git(self.hub, "checkout", "--quiet", "-b", "pull-request")
+        (self.hub/"README.md").unlink()
+        self._commit({FORECAST: "new\n", METADATA: "meta\n"})
+        git(self.hub, "update-ref", "refs/pull/7/head", "HEAD")
+        git(self.hub, "checkout", "--quiet", "master")
+        self._commit({"code/a.py": "\n"})
+        self.backend = LocalGitBackend(
+            LocalGitMirror(self.tmp/"hub.git", self.hub.as_uri())
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _commit(self, files):
+        for path, content in files.items():
+            os.makedirs((self.hub/path).parent, exist_ok=True)
+            (self.hub/path).write_text(content)
+        git(self.hub, "add", "-A")
+        git(self.hub, "commit", "--quiet", "-m", "update")
+
+    def test_pull_request(self):
+        self.assertEqual(
+            self.backend.get_branch_sha(), git(self.hub, "rev-parse", "master")
+        )
+        self.assertEqual(self.backend.list_pull_requests(), [7])
+        files = self.backend.get_pull_request(7).get_files()
+        self.assertEqual(
+            [(file.filename, file.status) for file in files],
+            [("README.md", "removed"), (FORECAST, "modified"),
+             (METADATA, "added")]
+        )
+        self.assertEqual(self.backend.read_blob(files[1].sha), b"new\n")
+        self.assertEqual(self.backend.read_blob(files[0].sha), b"hub\n")
+
+        index = self.backend.get_tree_index()
+        self.assertIn("code/a.py", index)
+        self.assertEqual(
+            index.read_blob(index.blob_sha(FORECAST)), b"old\n"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
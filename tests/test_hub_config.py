@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation import PullRequestFileType
+from forecast_validation.utilities.hub_config import (
+    compile_hub_config,
+    load_compiled_hub_config
+)
+
+CONFIG_FILE = "tests/testfiles/covid-validation-config.json"
+
+
+class CompiledHubConfigTest(unittest.TestCase):
+    def setUp(self):
+        with open(CONFIG_FILE) as f:
+            self.config_dict = json.load(f)
+        self.compiled = compile_hub_config(self.config_dict)
+
+    def test_targets_map_to_their_group(self):
+        for group_id, group in enumerate(self.config_dict["target_groups"]):
+            for target in group["targets"]:
+                self.assertEqual(self.compiled.target_to_group[target], group_id)
+
+    def test_location_tables_match_target_groups(self):
+        for group_id, group in enumerate(self.config_dict["target_groups"]):
+            self.assertEqual(
+                self.compiled.group_locations(group_id),
+                frozenset(group["locations"])
+            )
+
+    def test_quantile_slots_are_sorted(self):
+        quantiles = self.compiled.quantiles
+        self.assertEqual(quantiles, sorted(quantiles))
+        self.assertEqual(
+            [self.compiled.quantile_slots[q] for q in quantiles],
+            list(range(len(quantiles)))
+        )
+
+    def test_filename_patterns(self):
+        patterns = self.compiled.filename_patterns
+        self.assertTrue(patterns[PullRequestFileType.FORECAST].match(
+            "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+        ))
+        self.assertTrue(patterns[PullRequestFileType.METADATA].match(
+            "data-processed/teamA-modelA/metadata-teamA-modelA.txt"
+        ))
+
+    def test_warm_load_skips_json_parsing(self):
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cold = load_compiled_hub_config(CONFIG_FILE, cache_directory)
+            self.assertEqual(len(os.listdir(cache_directory)), 1)
+            with patch("json.loads") as loads:
+                warm = load_compiled_hub_config(CONFIG_FILE, cache_directory)
+                loads.assert_not_called()
+        self.assertEqual(warm.content_hash, cold.content_hash)
+        self.assertEqual(warm.target_to_group, cold.target_to_group)
+        self.assertEqual(warm.location_index, cold.location_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
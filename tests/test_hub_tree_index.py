@@ -0,0 +1,101 @@
+import base64
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities.github import (
+    HubTreeIndex,
+    get_existing_models
+)
+from forecast_validation.utilities.hub_backend import GitHubBackend
+from forecast_validation.validation_logic.metadata import (
+    _team_model_desig_dict_from_repo
+)
+
+
+def tree(elements, truncated=False):
+    return MagicMock(
+        tree=[
+            MagicMock(path=path, sha=sha, size=None if type == "tree" else 10, type=type)
+            for path, sha, type in elements
+        ],
+        raw_data={"truncated": truncated}
+    )
+
+
+class HubTreeIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.trees = {
+            ("commit", True): tree([
+                ("data-processed", "t1", "tree"),
+                ("data-processed/teamA-modelA", "t2", "tree"),
+                ("data-processed/teamA-modelA/metadata-teamA-modelA.txt", "b1", "blob"),
+                ("data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv", "b2", "blob"),
+                ("data-processed/teamB-modelB", "t3", "tree"),
+                ("data-processed/README.md", "b3", "blob"),
+            ]),
+        }
+        self.repository = MagicMock()
+        self.repository.get_git_ref.return_value.object.sha = "commit"
+        self.repository.get_git_tree.side_effect = (
+            lambda sha, recursive=False: self.trees[(sha, recursive)]
+        )
+
+    def test_single_tree_fetch(self):
+        index = HubTreeIndex.from_repository(self.repository)
+        self.assertEqual(self.repository.get_git_tree.call_count, 1)
+        self.assertEqual(
+            index.blob_sha("data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"),
+            "b2"
+        )
+        self.assertIsNone(index.blob_sha("data-processed/teamA-modelA"))
+        self.assertIsNone(index.blob_sha("data-processed/missing.csv"))
+
+    def test_existing_models(self):
+        index = HubTreeIndex.from_repository(self.repository)
+        self.assertEqual(
+            get_existing_models(self.repository, "data-processed", index),
+            {"teamA-modelA", "teamB-modelB"}
+        )
+        self.repository.get_contents.assert_not_called()
+
+    def test_truncated_tree_is_fetched_by_subtree(self):
+        self.trees = {
+            ("commit", True): tree([("data-processed", "t1", "tree")], truncated=True),
+            ("commit", False): tree([
+                ("data-processed", "t1", "tree"), ("README.md", "b0", "blob")
+            ]),
+            ("t1", True): tree([
+                ("teamA-modelA", "t2", "tree"),
+                ("teamA-modelA/metadata-teamA-modelA.txt", "b1", "blob"),
+            ]),
+        }
+        index = HubTreeIndex.from_repository(self.repository)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(
+            index.blob_sha("data-processed/teamA-modelA/metadata-teamA-modelA.txt"),
+            "b1"
+        )
+        self.assertEqual(index.children("data-processed"), ["teamA-modelA"])
+
+    def test_team_model_designation_from_index(self):
+        self.repository.get_git_blob.return_value.content = base64.b64encode(
+            b"model_name: modelA\nteam_model_designation: primary\n"
+        )
+        store = {
+            "repository": self.repository,
+            "FORECAST_FOLDER_NAME": "data-processed",
+            "hub_tree_index": GitHubBackend(self.repository).get_tree_index(),
+        }
+        self.assertEqual(
+            _team_model_desig_dict_from_repo(store, {"teamA"}),
+            {"teamA": {"modelA": "primary"}}
+        )
+        self.repository.get_git_blob.assert_called_once_with("b1")
+        self.repository.get_contents.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import json
+import os
+import pathlib
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import main
+
+from forecast_validation import PullRequestFileType
+from forecast_validation.validation import (
+    ValidationRun,
+    ValidationStep,
+    ValidationStepResult
+)
+from forecast_validation.validation_logic.local_files import (
+    LocalFile,
+    check_local_modified_forecasts,
+    collect_local_files,
+    get_all_models_from_local_hub
+)
+
+FORECAST = "data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+METADATA = "data-processed/teamA-modelA/metadata-teamA-modelA.txt"
+FILENAME_PATTERNS = {
+    PullRequestFileType.FORECAST:
+        re.compile(r"^data-processed/(.+)/\d\d\d\d-\d\d-\d\d-\1\.csv$"),
+    PullRequestFileType.METADATA:
+        re.compile(r"^data-processed/(.+)/metadata-\1\.txt$"),
+    PullRequestFileType.OTHER_FS:
+        re.compile(r"^data-processed/(.+)\.(csv|txt)$"),
+}
+
+
+class LocalFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.hub = self.directory/"hub"
+        self.submission = self.directory/"submission"
+        for root in [self.hub, self.submission]:
+            for path in [FORECAST, METADATA]:
+                os.makedirs((root/path).parent, exist_ok=True)
+                shutil.copy("tests/testfiles/" + path, root/path)
+        self.store = {
+            "LOCAL_SUBMISSION_DIRECTORY": self.submission,
+            "HUB_MIRRORED_DIRECTORY_ROOT": self.hub,
+            "FILENAME_PATTERNS": FILENAME_PATTERNS,
+            "FORECAST_FOLDER_NAME": "data-processed"
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_collect_local_files(self):
+        new_forecast = "data-processed/teamB-modelB/2021-11-29-teamB-modelB.csv"
+        os.makedirs((self.submission/new_forecast).parent)
+        shutil.copy(self.submission/FORECAST, self.submission/new_forecast)
+        (self.submission/"README.md").write_text("notes")
+
+        result = collect_local_files(self.store)
+
+        self.assertFalse(result.skip_steps_after)
+        self.assertEqual(result.labels, {"data-submission"})
+        filtered_files = result.to_store["filtered_files"]
+        self.assertEqual(
+            sorted(filtered_files[PullRequestFileType.FORECAST], key=lambda f: f.filename),
+            [LocalFile(FORECAST, "modified"), LocalFile(new_forecast, "added")]
+        )
+        self.assertEqual(
+            filtered_files[PullRequestFileType.METADATA],
+            [LocalFile(METADATA, "modified")]
+        )
+        self.assertEqual(
+            filtered_files[PullRequestFileType.OTHER_NONFS],
+            [LocalFile("README.md", "added")]
+        )
+        self.assertEqual(
+            result.to_store["possible_labels"]["forecast-updated"],
+            "forecast-updated"
+        )
+
+    def test_collect_local_files_without_submission_skips_steps_after(self):
+        shutil.rmtree(self.submission/"data-processed")
+        (self.submission/"README.md").write_text("notes")
+
+        self.assertTrue(collect_local_files(self.store).skip_steps_after)
+
+    def test_check_local_modified_forecasts(self):
+        self.store |= collect_local_files(self.store).to_store
+        result = check_local_modified_forecasts(self.store)
+        self.assertEqual(result.to_store["unchanged_existing_files"], {FORECAST})
+        self.assertEqual(result.to_store["downloaded_existing_files"], set())
+
+        with open(self.submission/FORECAST, "a") as forecast_file:
+            forecast_file.write("2021-11-29,1 wk ahead inc death,2021-12-04,01,point,NA,1\n")
+        result = check_local_modified_forecasts(self.store)
+        self.assertEqual(result.to_store["unchanged_existing_files"], set())
+        self.assertEqual(
+            result.to_store["downloaded_existing_files"],
+            {(self.hub/FORECAST).resolve()}
+        )
+        self.assertEqual(result.to_store["deleted_existing_files_paths"], set())
+
+    def test_get_all_models_from_local_hub(self):
+        os.makedirs(self.hub/"data-processed"/"teamB-modelB")
+        result = get_all_models_from_local_hub(self.store)
+        self.assertEqual(
+            result.to_store["model_names"], {"teamA-modelA", "teamB-modelB"}
+        )
+
+
+class LocalValidationRunTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = pathlib.Path(tempfile.mkdtemp())
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            config = json.load(f)
+        config["submission_formatting_instruction"] = "https://example.com"
+        with open(self.tmp/"project-config.json", "w") as f:
+            json.dump(config, f)
+        os.makedirs(self.tmp/"data-locations")
+        shutil.copy(
+            "forecast_validation/static/locations.csv",
+            self.tmp/"data-locations"/"locations.csv"
+        )
+        environment = patch.dict(
+            os.environ, {"HUB_VALIDATIONS_CACHE_DIR": str(self.tmp/"cache")}
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+
+        # an update of an existing forecast that drops some of its rows,
+        # submitted together with a new forecast
+        testfiles = pathlib.Path("tests/testfiles/data-processed/teamA-modelA")
+        updated = "data-processed/teamA-modelA/2021-03-29-teamA-modelA.csv"
+        for root, files in [
+            (self.tmp/"hub", {
+                updated: testfiles/"forecast_content-original_forecast.csv"
+            }),
+            (self.tmp/"submission", {
+                updated: testfiles/"forecast_content-implicit_retractions.csv",
+                FORECAST: "tests/testfiles/" + FORECAST
+            }),
+        ]:
+            for path, source in files.items():
+                os.makedirs((root/path).parent, exist_ok=True)
+                shutil.copy(source, root/path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_retraction_with_workers(self):
+        for workers in [1, 2]:
+            with self.subTest(workers=workers):
+                validation_run = main.setup_validation_run_for_local_directory(
+                    str(self.tmp), str(self.tmp/"submission"),
+                    str(self.tmp/"hub"), workers=workers
+                )
+                validation_run.run()
+
+                labels = validation_run.merged_outputs()[0]
+                self.assertFalse(validation_run.success)
+                self.assertIn("forecast-implicit-retractions", labels)
+
+
+class ValidationRunReportTest(unittest.TestCase):
+    def test_report_lists_errors_comments_and_labels(self):
+        run = ValidationRun([
+            ValidationStep(lambda: ValidationStepResult(
+                success=False,
+                labels={"forecast-updated"},
+                comments=["💡 updated"],
+                file_errors={"a.csv": ["bad value"]}
+            ))
+        ])
+        run.run()
+
+        report = run.report()
+
+        self.assertIn("❌ There are validation errors.", report)
+        self.assertIn("a.csv:\n  bad value", report)
+        self.assertIn("Comments:\n  💡 updated", report)
+        self.assertIn("Labels: forecast-updated", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
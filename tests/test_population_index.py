@@ -0,0 +1,49 @@
+import os
+import sys
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.checks.forecast_file_content import (
+    validate_forecast_values
+)
+from forecast_validation.utilities.population_index import (
+    PopulationIndex,
+    load_population_index
+)
+
+LOCATIONS_FILE = "forecast_validation/static/locations.csv"
+FORECAST_FILE = "tests/testfiles/data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+
+
+class PopulationIndexTest(unittest.TestCase):
+    def test_lookup(self):
+        index = PopulationIndex(
+            np.array(["US", "01", "02"]), np.array([300.0, 10.0, 20.0])
+        )
+        np.testing.assert_array_equal(
+            index.lookup(pd.Series(["02", "US", "99", None, "02"])),
+            [20.0, 300.0, np.nan, np.nan, 20.0]
+        )
+
+    def test_index_is_loaded_once(self):
+        self.assertIs(
+            load_population_index(LOCATIONS_FILE),
+            load_population_index(os.path.abspath(LOCATIONS_FILE))
+        )
+
+    def test_valid_forecast_values(self):
+        self.assertIsNone(validate_forecast_values(FORECAST_FILE, LOCATIONS_FILE))
+
+    def test_value_above_population(self):
+        forecast = pd.read_csv(FORECAST_FILE, dtype={"location": str})
+        forecast.loc[2, "value"] = 1e10
+        result = validate_forecast_values(forecast, LOCATIONS_FILE)
+        self.assertTrue(result.startswith("Found 1 predictions"), result)
+        self.assertIn("10000000000.0", result)
+
+
+if __name__ == '__main__':
+    unittest.main()
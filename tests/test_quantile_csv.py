@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+import pandas as pd
+
+from forecast_validation.checks.quantile_csv import (
+    MISSING_DAY,
+    day_numbers,
+    validate_quantile_csv_file
+)
+
+FORECAST_FILE = "tests/testfiles/data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+
+
+class QuantileCsvValidationTest(unittest.TestCase):
+    def setUp(self):
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            self.config = json.load(f)
+        self.frame = pd.read_csv(FORECAST_FILE, dtype=str)
+
+    def assertSingleError(self, frame, expected_start):
+        result = validate_quantile_csv_file(frame, self.config)
+        self.assertIsInstance(result, list)
+        self.assertEqual(len(result), 1, result)
+        self.assertTrue(result[0].startswith(expected_start), result[0])
+        return result[0]
+
+    def test_valid_file(self):
+        self.assertEqual(
+            validate_quantile_csv_file(FORECAST_FILE, self.config),
+            "no errors"
+        )
+
+    def test_missing_column(self):
+        self.assertSingleError(
+            self.frame.drop(columns="value"),
+            "invalid header. did not contain the required columns."
+        )
+
+    def test_invalid_target(self):
+        self.frame.loc[1, "target"] = "1 wk ahead inc flu"
+        self.assertSingleError(
+            self.frame, "invalid target name: '1 wk ahead inc flu'."
+        )
+
+    def test_invalid_location_for_target(self):
+        self.frame.loc[1, "location"] = "01001"
+        self.assertSingleError(
+            self.frame,
+            "invalid location for target. location='01001', "
+            "target='1 wk ahead inc death'."
+        )
+
+    def test_invalid_quantile_for_target(self):
+        self.frame.loc[3, "quantile"] = "0.06"
+        self.assertSingleError(
+            self.frame, "invalid quantile for target. quantile=0.06, "
+            "target='1 wk ahead inc death'."
+        )
+
+    def test_non_numeric_value(self):
+        self.frame.loc[2, "value"] = "many"
+        self.assertSingleError(
+            self.frame,
+            "entries in the `value` column must be an int or float: many."
+        )
+
+    def test_empty_value_is_allowed(self):
+        self.frame.loc[2, "value"] = None
+        self.assertEqual(
+            validate_quantile_csv_file(self.frame, self.config), "no errors"
+        )
+
+    def test_date_format(self):
+        self.frame.loc[2, "target_end_date"] = "12/04/2021"
+        self.assertSingleError(
+            self.frame,
+            "invalid forecast_date or target_end_date format."
+        )
+
+    def test_unexpected_saturday(self):
+        self.frame.loc[2, "target_end_date"] = "2021-12-11"
+        error = self.assertSingleError(
+            self.frame, "target_end_date was not the expected Saturday."
+        )
+        self.assertIn("exp_target_end_date=2021-12-04", error)
+
+    def test_repeated_errors_are_summarized(self):
+        self.frame["location"] = "00"
+        error = self.assertSingleError(
+            self.frame, "invalid location for target."
+        )
+        self.assertIn(f"(and {len(self.frame) - 1} more row(s)", error)
+
+    def test_decreasing_quantiles(self):
+        self.frame.loc[3, "value"] = "1"
+        self.assertSingleError(
+            self.frame,
+            "Entries in `value` must be non-decreasing as quantiles increase."
+        )
+
+    def test_duplicate_rows(self):
+        frame = pd.concat([self.frame, self.frame.iloc[[4]]])
+        self.assertSingleError(frame, "found duplicate prediction rows.")
+
+
+class TypedFrameMessageTest(unittest.TestCase):
+    """Messages for files read with their numeric dtypes, as in a run."""
+
+    def setUp(self):
+        with open("tests/testfiles/covid-validation-config.json") as f:
+            self.config = json.load(f)
+        with open(FORECAST_FILE) as f:
+            self.lines = f.read().splitlines(True)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def validate(self, row, value):
+        self.lines[row] = self.lines[row].rsplit(",", 1)[0] + f",{value}\n"
+        path = os.path.join(self.tmp, "forecast.csv")
+        with open(path, "w") as f:
+            f.writelines(self.lines)
+        return validate_quantile_csv_file(path, self.config)
+
+    def test_negative_value(self):
+        self.assertEqual(self.validate(1, -5970), [
+            "entries in the `value` column must be non-negative. "
+            "value=-5970.0. row=['2021-11-29', '1 wk ahead inc death', "
+            "'2021-12-04', 'US', 'point', nan, -5970.0]"
+        ])
+
+    def test_decreasing_quantiles(self):
+        self.assertEqual(self.validate(3, 0), [
+            "Entries in `value` must be non-decreasing as quantiles "
+            "increase. row=['2021-11-29', '1 wk ahead inc death', "
+            "'2021-12-04', 'US', 'quantile', 0.025, 0.0]"
+        ])
+
+
+class DayNumbersTest(unittest.TestCase):
+    def test_day_numbers(self):
+        days = day_numbers(pd.Series(
+            ["1970-01-02", "2021-11-29", None, "2021-1-1", "2021-11-29"],
+            dtype="category"
+        ))
+        self.assertEqual(days.dtype, np.int32)
+        self.assertEqual(
+            days.tolist(),
+            [1, 18960, MISSING_DAY, MISSING_DAY, 18960]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+from github import Github
+
+from forecast_validation.utilities.rate_limit import (
+    DATA,
+    WRITE,
+    RateLimitScheduler,
+    enable_rate_limit_scheduler,
+    record_api_usage
+)
+from forecast_validation.validation import (
+    ValidationRun,
+    ValidationStep,
+    ValidationStepResult
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def response(status=200, body=b"", **headers):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update({
+        name.replace("_", "-"): str(value) for name, value in headers.items()
+    })
+    result._content = body
+    return result
+
+
+class RateLimitSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RateLimitScheduler(
+            reserve=10, clock=self.clock, sleep=self.clock.sleep
+        )
+
+    def test_waits_for_the_reset(self):
+        self.scheduler.acquire(DATA)
+        self.assertIsNone(self.scheduler.release(response(
+            X_RateLimit_Remaining=0, X_RateLimit_Reset=1030
+        )))
+        self.assertEqual(self.scheduler.acquire(DATA), 30.0)
+        self.assertEqual(self.clock.sleeps, [30.0])
+
+    def test_writes_leave_the_reserve_to_reads(self):
+        self.scheduler.acquire(DATA)
+        self.scheduler.release(response(
+            X_RateLimit_Remaining=5, X_RateLimit_Reset=1060
+        ))
+        self.assertEqual(self.scheduler.acquire(DATA), 0.0)
+        self.scheduler.release()
+        self.assertEqual(self.scheduler.acquire(WRITE), 60.0)
+
+    def test_secondary_limit(self):
+        self.scheduler.acquire(DATA)
+        self.assertEqual(self.scheduler.release(response(403, Retry_After=5)), 5)
+        self.scheduler.acquire(DATA)
+        # without Retry-After, the backoff doubles
+        rejected = response(403, b'{"message": "You have exceeded a secondary rate limit"}')
+        self.assertEqual(self.scheduler.release(rejected), 60.0)
+        self.scheduler.acquire(DATA)
+        self.assertEqual(self.scheduler.release(rejected), 120.0)
+        self.assertEqual(self.clock.sleeps, [5.0, 60.0])
+        # other 403s are not rate limits
+        self.scheduler.acquire(DATA)
+        self.assertIsNone(self.scheduler.release(response(403, b"{}")))
+
+    def test_does_not_wait_longer_than_max_wait(self):
+        self.scheduler.acquire(DATA)
+        self.scheduler.release(response(
+            X_RateLimit_Remaining=0, X_RateLimit_Reset=1000 + 3600
+        ))
+        self.assertEqual(self.scheduler.acquire(DATA), 0.0)
+
+    def test_writes_go_after_waiting_reads(self):
+        scheduler = RateLimitScheduler(max_in_flight=1)
+        scheduler.acquire(DATA)
+        order = []
+
+        def send(priority, name):
+            scheduler.acquire(priority)
+            order.append(name)
+            scheduler.release()
+
+        threads = []
+        for priority, name in [(WRITE, "comment"), (DATA, "blob")]:
+            threads.append(threading.Thread(target=send, args=(priority, name)))
+            threads[-1].start()
+            while scheduler.waiting < len(threads):
+                time.sleep(0.01)
+        scheduler.release()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["blob", "comment"])
+
+
+class LabelsHandler(http.server.BaseHTTPRequestHandler):
+    # set by the test: the statuses of the next responses
+    statuses = []
+
+    def do_GET(self):
+        status = LabelsHandler.statuses.pop(0) if LabelsHandler.statuses else 200
+        body = json.dumps(
+            [{"name": "code"}] if status == 200 else
+            {"message": "You have exceeded a secondary rate limit."}
+        ).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "4321")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 600))
+        if status == 403:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ScheduledClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), LabelsHandler
+        )
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_run_retries_and_records_usage(self):
+        LabelsHandler.statuses = [403]
+        scheduler = RateLimitScheduler()
+        github = Github(
+            base_url="http://127.0.0.1:%d" % self.server.server_address[1],
+            seconds_between_requests=0, retry=0, lazy=True
+        )
+        self.assertTrue(enable_rate_limit_scheduler(github, scheduler))
+
+        def list_labels():
+            repository = github.get_repo("owner/hub")
+            labels = [label.name for label in repository.get_labels()]
+            record_api_usage(cached=1)
+            return ValidationStepResult(True, to_store={"labels": labels})
+
+        run = ValidationRun([ValidationStep(list_labels)], step_threads=2)
+        run.run()
+        self.assertEqual(run.store["labels"], ["code"])
+        usage = run.store["api_usage"]
+        self.assertEqual((usage.requests, usage.cached), (2, 1))
+        self.assertEqual(usage.remaining, 4321)
+        self.assertEqual(scheduler.remaining, 4321)
+
+
+if __name__ == '__main__':
+    unittest.main()
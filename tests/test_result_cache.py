@@ -0,0 +1,98 @@
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities.result_cache import (
+    CachedFileResult,
+    ResultCache,
+    result_cache_key
+)
+from forecast_validation.validation import (
+    ValidationPerFileStep,
+    ValidationStepResult
+)
+
+calls = []
+
+
+def check_files(store, files):
+    calls.extend(files)
+    file, = files
+    ok = pathlib.Path(file).read_text() == "ok"
+    return ValidationStepResult(
+        success=ok,
+        labels=set() if ok else {store["possible_labels"]["bad"]},
+        comments=[f"checked {file}"],
+        file_errors={} if ok else {file: [f"{file} is bad"]}
+    )
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        calls.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, content):
+        path = self.directory/name
+        path.write_text(content)
+        return path
+
+    def test_put_and_get(self):
+        cache = ResultCache(self.directory/"cache")
+        key = result_cache_key("step", "content", "config", "1.0")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, CachedFileResult(True, ["c"], [], ["label"]))
+        self.assertEqual(cache.get(key), CachedFileResult(True, ["c"], [], ["label"]))
+        self.assertNotEqual(key, result_cache_key("step", "content", "config", "1.1"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(self.directory/"cache", max_bytes=1000)
+        result = CachedFileResult(True, ["x" * 100], [], [])
+        keys = [result_cache_key("step", str(i), "config", "1.0") for i in range(20)]
+        for i, key in enumerate(keys):
+            cache.put(key, result)
+            os.utime(cache._path(key), (i, i))
+            if i == 5:
+                os.utime(cache._path(keys[0]), (time.time(), time.time()))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[-1]))
+        size = sum(p.stat().st_size for p in (self.directory/"cache").rglob("*.json"))
+        self.assertLessEqual(size, 1000)
+
+    def test_per_file_step_replays_cached_outcome(self):
+        cache = ResultCache(self.directory/"cache")
+        store = {
+            "result_cache": cache,
+            "RESULT_CACHE_CONFIG_HASH": "config",
+            "possible_labels": {"bad": object()},
+        }
+        good = self.write("good.csv", "ok")
+        bad = self.write("bad.csv", "not ok")
+        step = ValidationPerFileStep(check_files, cacheable=True)
+
+        first = step.execute(store, {good, bad})
+        self.assertEqual(len(calls), 2)
+
+        os.makedirs(self.directory/"moved")
+        moved = self.write("moved/bad.csv", "not ok")
+        second = step.execute(store, {good, moved})
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(second.success)
+        self.assertEqual(second.labels, first.labels)
+        self.assertEqual(second.file_errors, {moved: [f"{moved} is bad"]})
+        self.assertIn(f"checked {good}", second.comments)
+        self.assertEqual(cache.hit_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
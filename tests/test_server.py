@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+import sys
+import threading
+import unittest
+import urllib.error
+import urllib.request
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.server import ValidationServer
+from forecast_validation.validation import (
+    ValidationRun,
+    ValidationStep,
+    ValidationStepResult
+)
+
+logger = logging.getLogger("hub-validations")
+
+
+def make_run(submission_directory):
+    def check_files(store):
+        logger.info("checking %s", submission_directory)
+        errors = {}
+        for path in sorted(submission_directory.rglob("*.csv")):
+            if path.read_text() != "ok":
+                errors[path] = ["not ok"]
+        return ValidationStepResult(
+            success=not errors,
+            labels={"checked"},
+            comments=[f"{len(store)} store entries"],
+            file_errors=errors
+        )
+    run = ValidationRun([ValidationStep(check_files, writes=[])])
+    run.store["SUBMISSION"] = submission_directory
+    return run
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class ValidationServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ValidationServer(("127.0.0.1", 0), make_run)
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.log = ListHandler()
+        logger.addHandler(self.log)
+        self.level = logger.level
+        logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        logger.setLevel(self.level)
+        logger.removeHandler(self.log)
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def post(self, body):
+        request = urllib.request.Request(
+            self.url + "/validate", data=json.dumps(body).encode("utf-8")
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    def test_health(self):
+        with urllib.request.urlopen(self.url + "/health") as response:
+            self.assertEqual(json.load(response)["status"], "ok")
+
+    def test_validate_files(self):
+        status, body = self.post({"files": {
+            "data-processed/a/good.csv": "ok",
+            "data-processed/a/bad.csv": "not ok"
+        }})
+
+        self.assertEqual(status, 200)
+        self.assertFalse(body["success"])
+        self.assertEqual(body["errors"], {"data-processed/a/bad.csv": ["not ok"]})
+        self.assertEqual(body["labels"], ["checked"])
+        self.assertTrue(any(
+            m.startswith(f"[{body['request_id']}] checking")
+            for m in self.log.messages
+        ))
+
+    def test_concurrent_requests_have_isolated_stores(self):
+        results = {}
+
+        def post(i):
+            results[i] = self.post({"files": {f"{i}/x.csv": "ok"}})
+
+        threads = [threading.Thread(target=post, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({body["request_id"] for _, body in results.values()}), 4)
+        for status, body in results.values():
+            self.assertEqual(status, 200)
+            self.assertTrue(body["success"])
+            self.assertEqual(body["comments"], results[0][1]["comments"])
+
+    def test_rejects_paths_outside_the_submission(self):
+        for name in ["../escape.csv", "/etc/passwd"]:
+            status, body = self.post({"files": {name: "ok"}})
+            self.assertEqual(status, 400)
+            self.assertIn("invalid file path", body["error"])
+
+    def test_rejects_requests_without_files(self):
+        status, _ = self.post({"something": "else"})
+        self.assertEqual(status, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+BENCHMARK = os.path.join(
+    os.path.dirname(__file__), "..", "benchmarks", "startup_benchmark.py"
+)
+
+
+class StartupTest(unittest.TestCase):
+    def test_non_forecast_pull_request_skips_heavy_imports(self):
+        process = subprocess.run(
+            [sys.executable, BENCHMARK, "--repeat", "1", "--json"],
+            check=True, stdout=subprocess.PIPE, text=True
+        )
+        runs = {
+            run["kind"]: run
+            for run in map(json.loads, process.stdout.splitlines())
+        }
+        self.assertTrue(runs["other-files"]["success"])
+        self.assertEqual(runs["other-files"]["heavy_modules"], [])
+        # the forecast checks still import what they need
+        self.assertTrue(runs["forecast"]["success"])
+        self.assertIn("pandas", runs["forecast"]["heavy_modules"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities import tracing
+from forecast_validation.utilities.forecast_frames import read_forecast_frame
+from forecast_validation.validation import (
+    ValidationPerFileStep,
+    ValidationRun,
+    ValidationStep,
+    ValidationStepResult
+)
+
+FORECAST_FILE = "tests/testfiles/data-processed/teamA-modelA/2021-11-29-teamA-modelA.csv"
+
+
+def parse_files(files):
+    for file in files:
+        read_forecast_frame(file)
+    return ValidationStepResult(True)
+
+
+class TracingTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        tracing.disable_tracing()
+        shutil.rmtree(self.directory)
+
+    def test_span_is_a_no_op_when_disabled(self):
+        with tracing.span("nothing"):
+            pass
+        self.assertIsNone(tracing.get_tracer())
+
+    def test_run_records_nested_spans(self):
+        files = set()
+        for name in ["a.csv", "b.csv"]:
+            shutil.copy(FORECAST_FILE, self.directory/name)
+            files.add(self.directory/name)
+        run = ValidationRun([
+            ValidationStep(
+                lambda: ValidationStepResult(True, forecast_files=files)
+            ),
+            ValidationPerFileStep(parse_files, parallel=True),
+        ])
+        tracer = tracing.enable_tracing()
+
+        run.run()
+        tracer.write(self.directory/"trace.json")
+
+        with open(self.directory/"trace.json") as trace_file:
+            events = json.load(trace_file)["traceEvents"]
+        spans = {
+            (e["cat"], e["name"]): e for e in events if e["ph"] == "X"
+        }
+        self.assertIn(("run", "validation run"), spans)
+        self.assertIn(("step", "parse_files"), spans)
+        for name in ["a.csv", "b.csv"]:
+            file_span = spans[("file", name)]
+            parse_span = spans[("csv", "parse " + name)]
+            self.assertLessEqual(file_span["ts"], parse_span["ts"])
+            self.assertGreaterEqual(
+                file_span["ts"] + file_span["dur"],
+                parse_span["ts"] + parse_span["dur"]
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
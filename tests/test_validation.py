@@ -1,8 +1,59 @@
 import unittest
 import unittest.mock
-
+import concurrent.futures
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from forecast_validation import VALIDATIONS_VERSION, validation
+from forecast_validation.utilities.forecast_frames import (
+    get_forecast_frame,
+    hash_file_content
+)
+from forecast_validation.utilities.result_cache import (
+    CachedFileResult,
+    ResultCache,
+    result_cache_key
+)
 from forecast_validation.validation import *
 
+FORECAST_FILE = "tests/testfiles/data-processed/teamA-modelA/forecast_content-original_forecast.csv"
+
+
+def check_file_in_worker(store, files):
+    """Per-file logic for the process pool tests; must be importable."""
+    (file,) = files
+    return ValidationStepResult(
+        success=not file.startswith("bad"),
+        labels={store["possible_labels"]["checked"]},
+        comments=["checked files"],
+        file_errors={file: [f"pid {os.getpid()}", sorted(store)]}
+    )
+
+def read_file_in_worker(store, files):
+    """Per-file logic for the worker pool tests: reports whether reading the
+    file's frame parsed it, and in which process."""
+    (file,) = files
+    frames = store["forecast_frames"]
+    parses = frames.parse_count
+    get_forecast_frame(store, file)
+    return ValidationStepResult(
+        success=True,
+        file_errors={file: [(os.getpid(), frames.parse_count - parses)]}
+    )
+
+def read_frame(store, files):
+    """Cacheable per-file logic for the worker pool tests."""
+    (file,) = files
+    get_forecast_frame(store, file)
+    return ValidationStepResult(success=True)
+
+def frames_in_worker():
+    """Pool task: the number of frames cached in the worker process."""
+    return len(validation._worker_frames or ())
+
 class TestValidationStepResult(unittest.TestCase):
     def test_init_with_missing_success_argument_should_throw_TypeError(self):
         """ValidationStepResult() test: Missing success argument
@@ -287,5 +338,282 @@ class TestValidationPerFileStep(unittest.TestCase):
         self.assertFalse(step.success)
         self.assertIs(returned_result, result)
 
+class TestParallelValidationPerFileStep(unittest.TestCase):
+    def test_per_file_tasks_are_merged(self):
+        label = unittest.mock.MagicMock()
+        store = {
+            "possible_labels": {"checked": label},
+            "unpicklable": unittest.mock.MagicMock(),
+            "CONSTANT": 1,
+        }
+        step = ValidationPerFileStep(check_file_in_worker, parallel=True)
+        with concurrent.futures.ProcessPoolExecutor(2) as executor:
+            result = step.execute(store, {"a.csv", "b.csv", "bad.csv"}, executor)
+
+        self.assertFalse(result.success)
+        self.assertEqual(result.labels, {label})
+        self.assertEqual(result.comments, ["checked files"])
+        self.assertEqual(set(result.file_errors), {"a.csv", "b.csv", "bad.csv"})
+        for pid, store_keys in result.file_errors.values():
+            self.assertNotEqual(pid, f"pid {os.getpid()}")
+            self.assertEqual(store_keys, ["CONSTANT", "possible_labels"])
+
+    def write_forecasts(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        files = []
+        for i, value in enumerate(["1", "2", "3"]):
+            # different contents, so that no file shares another's frame
+            path = os.path.join(directory, f"2021-03-29-team{i}-model.csv")
+            with open(FORECAST_FILE) as source, open(path, "w") as target:
+                target.write(source.read() + f"2021-03-29,1 wk ahead inc death,"
+                             f"2021-04-03,US,point,NA,{value}\n")
+            files.append(path)
+        return files
+
+    def test_worker_pool_parses_each_file_once(self):
+        files = set(self.write_forecasts())
+        steps = [
+            ValidationStep(lambda: ValidationStepResult(
+                True, forecast_files=files
+            )),
+            *(ValidationPerFileStep(read_file_in_worker, parallel=True)
+              for _ in range(3))
+        ]
+
+        ValidationRun(steps, workers=2).run()
+
+        for path in files:
+            reads = [
+                error for step in steps[1:]
+                for error in step.result.file_errors[path]
+            ]
+            self.assertEqual(len({pid for pid, _ in reads}), 1)
+            self.assertNotEqual(reads[0][0], os.getpid())
+            self.assertEqual(sum(parses for _, parses in reads), 1)
+
+    def test_worker_pool_releases_frames_of_result_cache_hits(self):
+        files = self.write_forecasts()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = ResultCache(directory)
+        step_name = f"{read_frame.__module__}.{read_frame.__qualname__}"
+        # two files are replayed from the result cache, and the only miss is
+        # validated in this process
+        for path in files[:2]:
+            with open(path, "rb") as f:
+                content_hash = hash_file_content(f.read())
+            cache.put(
+                result_cache_key(
+                    step_name, content_hash, "config", VALIDATIONS_VERSION
+                ),
+                CachedFileResult(True, [], [], [])
+            )
+        steps = [
+            ValidationStep(lambda: ValidationStepResult(
+                True, forecast_files=set(files)
+            )),
+            ValidationPerFileStep(read_frame, parallel=True, cacheable=True),
+            ValidationPerFileStep(read_file_in_worker, parallel=True),
+        ]
+        run = ValidationRun(steps, workers=2)
+        run.store["result_cache"] = cache
+        run.store["RESULT_CACHE_CONFIG_HASH"] = "config"
+
+        left: dict[str, int] = {}
+        shutdown = WorkerPool.shutdown
+        def count_and_shutdown(pool):
+            for path in files:
+                left[path] = pool.submit_for_file(
+                    path, frames_in_worker
+                ).result()
+            shutdown(pool)
+        with unittest.mock.patch.object(
+            WorkerPool, "shutdown", count_and_shutdown
+        ):
+            run.run()
+
+        self.assertEqual(cache.hit_count, 2)
+        for path in files:
+            (pid, parses), = steps[2].result.file_errors[path]
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(parses, 1)
+        self.assertEqual(left, {path: 0 for path in files})
+
+    def test_run_without_workers_stays_in_process(self):
+        step = ValidationPerFileStep(check_file_in_worker, parallel=True)
+        result = step.execute({"possible_labels": {"checked": "checked"}}, {"a.csv"})
+        self.assertEqual(result.file_errors["a.csv"][0], f"pid {os.getpid()}")
+
+class TestValidationRunScheduling(unittest.TestCase):
+    def test_independent_steps_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        def first(store):
+            barrier.wait()
+            return ValidationStepResult(True, to_store={"a": 1})
+        def second(store):
+            barrier.wait()
+            return ValidationStepResult(True, to_store={"b": 2})
+        def third(store):
+            return ValidationStepResult(
+                True, to_store={"c": store["a"] + store["b"]}
+            )
+        run = ValidationRun([
+            ValidationStep(first, writes=["a"]),
+            ValidationStep(second, writes=["b"]),
+            ValidationStep(third, reads=["a", "b"], writes=["c"]),
+        ], step_threads=2)
+
+        run.run()
+
+        self.assertEqual(run.store["c"], 3)
+        self.assertTrue(run.success)
+
+    def test_undeclared_step_is_a_barrier(self):
+        order = []
+        def make(name):
+            def logic():
+                order.append(name)
+                return ValidationStepResult(True)
+            return logic
+        run = ValidationRun([
+            ValidationStep(make("first"), writes=["a"]),
+            ValidationStep(make("barrier")),
+            ValidationStep(make("last"), writes=["b"]),
+        ], step_threads=4)
+
+        run.run()
+
+        self.assertEqual(order, ["first", "barrier", "last"])
+
+    def test_skip_steps_after_discards_later_results(self):
+        pull_request = unittest.mock.MagicMock()
+        def skip(store):
+            time.sleep(0.1)
+            return ValidationStepResult(
+                True, skip_steps_after=True, labels=set()
+            )
+        independent = ValidationStep(
+            lambda: ValidationStepResult(False, to_store={"late": True}),
+            writes=["late"]
+        )
+        run = ValidationRun([
+            ValidationStep(skip, reads=["pull_request"]),
+            independent,
+        ], step_threads=2)
+        run.store["pull_request"] = pull_request
+
+        run.run()
+
+        self.assertFalse(independent.executed)
+        self.assertNotIn("late", run.store)
+        self.assertTrue(run.success)
+
+class TestValidationStore(unittest.TestCase):
+    def test_provider_runs_once_on_first_access(self):
+        provider = unittest.mock.MagicMock(return_value={"teamA-modelA"})
+        store = ValidationStore({"CONSTANT": 1})
+        store.register_provider("model_names", provider)
+
+        self.assertIn("model_names", store)
+        self.assertFalse(store.is_computed("model_names"))
+        provider.assert_not_called()
+
+        self.assertEqual(store["model_names"], {"teamA-modelA"})
+        self.assertEqual(store.get("model_names"), {"teamA-modelA"})
+        self.assertEqual(store.snapshot()["model_names"], {"teamA-modelA"})
+        provider.assert_called_once_with(store)
+
+    def test_missing_key_without_provider(self):
+        store = ValidationStore()
+        self.assertNotIn("a", store)
+        self.assertIsNone(store.get("a"))
+        with self.assertRaises(KeyError):
+            store["a"]
+
+    def test_assigned_value_overrides_provider(self):
+        provider = unittest.mock.MagicMock()
+        store = ValidationStore()
+        store.register_provider("a", provider)
+        store["a"] = 1
+
+        self.assertEqual(store["a"], 1)
+        provider.assert_not_called()
+
+    def test_concurrent_snapshots_compute_value_once(self):
+        calls = []
+        def provider(store):
+            calls.append(store["CONSTANT"])
+            time.sleep(0.05)
+            return object()
+        store = ValidationStore({"CONSTANT": 1})
+        store.register_provider("a", provider)
+
+        snapshots = [store.snapshot() for _ in range(4)]
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            values = list(executor.map(lambda s: s["a"], snapshots))
+
+        self.assertEqual(calls, [1])
+        self.assertTrue(all(value is values[0] for value in values))
+
+    def test_step_provider_returns_stored_value(self):
+        provider = step_provider(
+            lambda store: ValidationStepResult(True, to_store={"a": store["b"]}),
+            "a"
+        )
+        self.assertEqual(provider({"b": 2}), 2)
+        with self.assertRaises(RuntimeError):
+            step_provider(lambda store: ValidationStepResult(False))({})
+
+class TestValidationRunProviders(unittest.TestCase):
+    def test_declared_reads_are_computed_before_the_step(self):
+        provided = threading.Event()
+        def provider(store):
+            provided.set()
+            return None
+        def logic(store):
+            return ValidationStepResult(True, to_store={
+                "provided_first": provided.is_set()
+            })
+        run = ValidationRun([
+            ValidationStep(logic, reads=["downloads"], writes=["provided_first"])
+        ])
+        run.store.register_provider("downloads", provider)
+
+        run.run()
+
+        self.assertTrue(run.store["provided_first"])
+
+    def test_unused_provider_never_runs(self):
+        provider = unittest.mock.MagicMock()
+        def skip(store):
+            return ValidationStepResult(True, skip_steps_after=True)
+        run = ValidationRun([
+            ValidationStep(skip, writes=["filtered_files"]),
+            ValidationStep(
+                lambda store: ValidationStepResult(True),
+                reads=["filtered_files", "model_names"]
+            ),
+        ])
+        run.store.register_provider("model_names", provider)
+
+        run.run()
+
+        provider.assert_not_called()
+
+    def test_per_file_step_without_files_does_not_compute_reads(self):
+        provider = unittest.mock.MagicMock()
+        run = ValidationRun([
+            ValidationPerFileStep(
+                lambda store, files: ValidationStepResult(True),
+                reads=["downloads"]
+            )
+        ])
+        run.store.register_provider("downloads", provider)
+
+        run.run()
+
+        provider.assert_not_called()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,191 @@
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from forecast_validation.utilities.hub_backend import GitHubBackend
+from forecast_validation.validation import (
+    ValidationRun,
+    ValidationStep,
+    ValidationStepResult
+)
+from forecast_validation.worker import (
+    DirectoryQueue,
+    PullRequestWorker,
+    SharedHubState,
+    SQLiteQueue
+)
+
+
+class QueueTests:
+    def make_queue(self, directory):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.queue = self.make_queue(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_claims_events_in_order_once(self):
+        self.queue.put({"number": 1})
+        self.queue.put({"pull_request_number": 2})
+
+        first = self.queue.claim()
+        second = self.queue.claim()
+
+        self.assertEqual(first.pull_request_number, 1)
+        self.assertEqual(second.pull_request_number, 2)
+        self.assertIsNone(self.queue.claim())
+        self.queue.ack(first)
+        self.queue.fail(second, "boom")
+        self.assertIsNone(self.queue.claim())
+
+    def test_skips_events_without_pull_request_number(self):
+        self.queue.put({"action": "opened"})
+        self.queue.put({"number": 3})
+
+        self.assertEqual(self.queue.claim().pull_request_number, 3)
+
+
+class DirectoryQueueTest(QueueTests, unittest.TestCase):
+    def make_queue(self, directory):
+        return DirectoryQueue(directory/"queue")
+
+    def test_failed_events_keep_their_error(self):
+        self.queue.put({"number": 1})
+        event = self.queue.claim()
+        self.queue.fail(event, "boom")
+
+        failed = self.directory/"queue"/"failed"
+        self.assertTrue((failed/f"{event.event_id}.json").exists())
+        self.assertEqual((failed/f"{event.event_id}.error").read_text(), "boom")
+
+
+class SQLiteQueueTest(QueueTests, unittest.TestCase):
+    def make_queue(self, directory):
+        return SQLiteQueue(directory/"queue.db")
+
+    def test_counts(self):
+        for number in [1, 2, 3]:
+            self.queue.put({"number": number})
+        self.queue.ack(self.queue.claim())
+        self.queue.fail(self.queue.claim(), "boom")
+
+        self.assertEqual(
+            self.queue.counts(), {"done": 1, "failed": 1, "pending": 1}
+        )
+
+
+class SharedHubStateTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.repository = MagicMock()
+        self.initial_store = MagicMock(
+            side_effect=lambda: {"FORECAST_FOLDER_NAME": "data-processed"}
+        )
+        patches = [
+            patch(
+                "forecast_validation.worker.establish_github_connection",
+                return_value=ValidationStepResult(True, to_store={
+                    "github": MagicMock(), "repository": self.repository,
+                    "hub_backend": GitHubBackend(self.repository)
+                })
+            ),
+            patch(
+                "forecast_validation.utilities.hub_backend.HubTreeIndex.from_repository",
+                side_effect=lambda repository, branch, sha: MagicMock(
+                    commit_sha=sha or "sha1"
+                )
+            ),
+            patch(
+                "forecast_validation.worker.get_existing_models",
+                return_value={"teamA-modelA"}
+            ),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.state = SharedHubState(
+            self.initial_store, refresh_interval=10, clock=lambda: self.now
+        )
+
+    def set_master(self, sha):
+        self.repository.get_git_ref.return_value.object.sha = sha
+
+    def test_reloads_only_when_master_moves(self):
+        entries = self.state.get()
+        self.assertEqual(entries["model_names"], {"teamA-modelA"})
+        self.assertEqual(self.state.commit_sha, "sha1")
+
+        self.set_master("sha1")
+        self.now = 5
+        self.state.get()
+        self.repository.get_git_ref.assert_not_called()
+        self.now = 15
+        self.state.get()
+        self.assertEqual(self.initial_store.call_count, 1)
+
+        self.set_master("sha2")
+        self.now = 30
+        self.state.get()
+        self.assertEqual(self.state.commit_sha, "sha2")
+        self.assertEqual(self.initial_store.call_count, 2)
+
+
+class PullRequestWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = pathlib.Path(tempfile.mkdtemp())
+        self.queue = DirectoryQueue(self.directory/"queue")
+        self.hub_state = MagicMock(get=MagicMock(return_value={"shared": True}))
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.run_directories = []
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_run(self, event, hub_entries, run_directory):
+        self.run_directories.append(run_directory)
+        self.assertTrue(hub_entries["shared"])
+        if event.pull_request_number == 13:
+            raise RuntimeError("cannot set up")
+
+        def validate():
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            time.sleep(0.1)
+            with self.lock:
+                self.running -= 1
+            return ValidationStepResult(event.pull_request_number % 2 == 0)
+
+        return ValidationRun([ValidationStep(validate)])
+
+    def test_validates_queued_pull_requests_concurrently(self):
+        for number in [2, 4, 5, 13]:
+            self.queue.put({"number": number})
+        worker = PullRequestWorker(
+            self.queue, self.hub_state, self.make_run,
+            self.directory/"work", concurrency=3, poll_interval=0.01
+        )
+
+        counts = worker.run(exit_when_empty=True)
+
+        self.assertEqual(counts, {"succeeded": 2, "failed": 1, "errored": 1})
+        self.assertGreater(self.max_running, 1)
+        self.assertEqual(len(list((self.directory/"queue"/"done").glob("*.json"))), 3)
+        self.assertEqual(len(list((self.directory/"queue"/"failed").glob("*.error"))), 1)
+        self.assertFalse(any(d.exists() for d in self.run_directories))
+
+
+if __name__ == '__main__':
+    unittest.main()